@@ -4,10 +4,14 @@ from streamlit_option_menu  import option_menu
 import json
 import os
 import sys
+import uuid
 from datetime               import datetime
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from helper.streamlit_helper import styling, plot_title
 from engine.chat import ask_to_chat
+from setup import LOGGER, log_payload, setup_logging
+
+setup_logging()
 
 st.set_page_config(layout="wide")
 
@@ -89,9 +93,9 @@ def clear_current_chat(db_data):
     if st.session_state.get("messages", []):
         current_topic = st.session_state.get("current_topic", "")
         if current_topic.startswith("New Chat_") or len(st.session_state["messages"]) == 0:
-            print("New Chat topic is empty and will not be saved.")
+            LOGGER.debug("New Chat topic is empty and will not be saved.")
         elif any(entry["topic"] == current_topic for entry in db_data):
-            print("Current topic already saved in DB, skipping save.")
+            LOGGER.debug("Current topic already saved in DB, skipping save.")
         else:
             db_data.append({
                 "topic": current_topic,
@@ -99,12 +103,13 @@ def clear_current_chat(db_data):
                 "created_at": datetime.now().isoformat(),
                 "document": st.session_state.get("selected_doc", ""),
             })
-            print("Saved current topic to DB.")
+            LOGGER.debug("Saved current topic to DB.")
 
     # Reset session state for new chat
     st.session_state.messages = []
     st.session_state.chat_history = []
     st.session_state.current_topic = new_topic
+    st.session_state.session_id = uuid.uuid4().hex
 
     # Avoid duplicate new topics in db_data
     existing_topics = [entry["topic"] for entry in db_data]
@@ -115,9 +120,9 @@ def clear_current_chat(db_data):
             "created_at": datetime.now().isoformat(),
             "document": st.session_state.get("selected_doc", ""),
         })
-        print(f"Added new topic: {new_topic}")
+        LOGGER.debug(f"Added new topic: {new_topic}")
     else:
-        print(f"Topic {new_topic} already exists in DB.")
+        LOGGER.debug(f"Topic {new_topic} already exists in DB.")
 
     # Save changes to database
     save_chat_history_db(db_data)
@@ -145,10 +150,10 @@ def process_chat_messages(chat_history):
                     "content": msg.content
                 })
             else:
-                print(f"Skipping invalid message format: {msg}")
+                LOGGER.warning(f"Skipping invalid message format: {type(msg).__name__}")
                 
         except Exception as e:
-            print(f"Error processing message: {msg}, Error: {e}")
+            LOGGER.error(f"Error processing message: {str(e)}")
             continue
             
     return formatted_chat_history
@@ -170,6 +175,10 @@ def akabot_ui2():
     
     if 'chat_history' not in st.session_state:
         st.session_state.chat_history = []
+
+    # Id of this conversation, keeps its fetched records and filters apart from other users' chats
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
         
     text = plot_title()
     st.markdown(text, unsafe_allow_html=True)
@@ -218,7 +227,7 @@ def akabot_ui2():
             )
             
             selected_base_topic = selected_topic #.split(" (")[0] if selected_topic else None
-            print(f"\n\n selected: {selected_base_topic}")
+            LOGGER.debug(f"Selected topic: {selected_base_topic}")
             if selected_base_topic:
                 normalized_db_data = [
                     {
@@ -232,7 +241,7 @@ def akabot_ui2():
                     (item for item in normalized_db_data if item['normalized_topic'] == selected_base_topic), 
                     None
                 )
-                print(f"\n\n topic data: {topic_data}")
+                log_payload("Topic data", topic_data)
                             
                 if topic_data:
                     # Check if the key is 'message' or 'messages' 
@@ -243,7 +252,9 @@ def akabot_ui2():
                     else:
                         st.session_state.messages = []  
                     
-                    # Update current topic
+                    # Update current topic, a different topic starts a new conversation
+                    if st.session_state.current_topic != topic_data['topic']:
+                        st.session_state.session_id = uuid.uuid4().hex
                     st.session_state.current_topic = topic_data['topic']
 
             clear_button = st.button("Start New Chat", key="clear_button") 
@@ -277,9 +288,10 @@ def akabot_ui2():
                         message, chat_history, topics = ask_to_chat(
                             prompt,
                             st.session_state.chat_history,
-                            "" if st.session_state.current_topic.startswith("New Chat") else st.session_state.current_topic
+                            "" if st.session_state.current_topic.startswith("New Chat") else st.session_state.current_topic,
+                            st.session_state.session_id
                         )
-                        print(f"\n\n message_st {st.session_state.messages}")
+                        log_payload("Session messages", st.session_state.messages)
                        
                         st.session_state.chat_history = chat_history
                         st.session_state.current_topic = topics
@@ -299,7 +311,6 @@ def akabot_ui2():
                             # st.write(db_data)
                             # print(f"\n\n db_data {db_data}")
                             for entry in db_data:
-                                print(f"\n\n ENTRY {entry}")
                                 if entry["topic"] == topics:
                                     # Update the existing topic
                                     entry["message"] = st.session_state.messages
@@ -0,0 +1,158 @@
+# ********** IMPORT FRAMEWORK **********
+from fastapi            import FastAPI, HTTPException
+from fastapi.responses  import StreamingResponse
+from pydantic           import BaseModel, Field
+
+# ********** IMPORT LIBRARIES **********
+from contextlib import asynccontextmanager
+from typing     import AsyncIterator, Dict, List
+import asyncio
+import json
+import os
+import sys
+import uuid
+
+# ********** IMPORT **********
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from setup      import (SetupConfig,
+                        BASE_DIR,
+                        LOGGER,
+                        setup_logging,
+                      )
+
+# ********** IMPORT ENGINE **********
+from engine.chat import CHAT_RUNNABLE
+
+# ********** IMPORT HELPER **********
+from helper.topic_store_helper import get_topic_store
+from helper.structured_output_helper import get_parse_stats
+from helper.speculation_helper import get_speculation_stats
+
+STREAM_KEEPALIVE_S = 5
+
+class ChatRequest(BaseModel):
+    text_input: str = Field(..., min_length=1, description="The user's message")
+    topic: str = Field("", description="Topic to continue, empty for a new chat")
+    chat_history: List[Dict[str, str]] | None = Field(None, description="History to use instead of the stored topic history")
+    session_id: str = Field("", description="Conversation id returned by the previous turn, empty to start a new one")
+
+class ChatResponse(BaseModel):
+    response: str
+    topic: str
+    chat_history: List[Dict[str, str]]
+    session_id: str
+    elapsed_s: float
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # *************** Every worker process configures its own log file
+    setup_logging()
+    yield
+
+app = FastAPI(title="Weather Chat API", lifespan=lifespan)
+
+# *************** Function to run one chat turn and store it under its topic
+async def run_chat_turn(request: ChatRequest) -> Dict:
+    """
+    Run the chat pipeline for one message and append the turn to the topic store.
+
+    Args:
+        request (ChatRequest): The incoming message.
+
+    Returns:
+        Dict: The engine result with 'response', 'chat_history', 'topic', 'session_id' and 'elapsed_s'.
+    """
+    store = get_topic_store()
+    chat_history = request.chat_history
+    if chat_history is None:
+        chat_history = []
+        if request.topic:
+            entry = await asyncio.to_thread(store.load_topic, request.topic)
+            chat_history = (entry or {}).get("chat_history", [])
+
+    # *************** Fetched records and follow-up filters are kept per conversation, not per topic name
+    session_id = request.session_id or uuid.uuid4().hex
+    result = await CHAT_RUNNABLE.ainvoke({"text_input": request.text_input,
+                                          "chat_history": list(chat_history),
+                                          "topic": request.topic,
+                                          "session_id": session_id})
+    entry = await asyncio.to_thread(store.append_turn,
+                                    result["topic"],
+                                    request.topic,
+                                    request.text_input,
+                                    result["response"],
+                                    result["chat_history"])
+    # *************** A new chat may be stored under a disambiguated topic name
+    return {**result, "topic": entry["topic"], "session_id": session_id}
+
+# *************** Function to format a server-sent event
+def sse_event(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def stream_chat_turn(request: ChatRequest) -> AsyncIterator[str]:
+    # *************** Keep the connection alive while the pipeline runs, then send the answer
+    yield sse_event("accepted", {"topic": request.topic})
+    task = asyncio.create_task(run_chat_turn(request))
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=STREAM_KEEPALIVE_S)
+            if done:
+                break
+            yield ": keepalive\n\n"
+        result = task.result()
+    except Exception as e:
+        LOGGER.error(f"Error streaming chat: {str(e)}")
+        yield sse_event("error", {"detail": "The chat request failed."})
+        return
+    finally:
+        if not task.done():
+            task.cancel()
+
+    for paragraph in result["response"].split("\n\n"):
+        yield sse_event("message", {"delta": paragraph + "\n\n"})
+    yield sse_event("done", {"topic": result["topic"], "session_id": result["session_id"], "elapsed_s": result["elapsed_s"]})
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat(request: ChatRequest) -> Dict:
+    """Submit a message and wait for the full answer"""
+    return await run_chat_turn(request)
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest) -> StreamingResponse:
+    """Submit a message and receive the answer as server-sent events"""
+    return StreamingResponse(stream_chat_turn(request), media_type="text/event-stream")
+
+@app.get("/topics")
+async def list_topics() -> List[Dict]:
+    """List the stored topics"""
+    return await asyncio.to_thread(get_topic_store().list_topics)
+
+@app.get("/topics/{topic}")
+async def load_topic(topic: str) -> Dict:
+    """Load the messages of one topic"""
+    entry = await asyncio.to_thread(get_topic_store().load_topic, topic)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"Topic '{topic}' not found.")
+    return entry
+
+@app.get("/health")
+async def health() -> Dict:
+    return {"status": "ok"}
+
+@app.get("/metrics")
+async def metrics() -> Dict:
+    """Parse failure rates per stage, OpenWeather client and speculation counters of this worker"""
+    from helper.weather_api_helper import get_upstream_metrics
+    return {"parse": get_parse_stats(), "upstream": get_upstream_metrics(), "speculation": get_speculation_stats()}
+
+# *************** Run the service with several worker processes
+def main() -> None:
+    import uvicorn
+    uvicorn.run("engine.api:app",
+                host=SetupConfig.API_HOST,
+                port=SetupConfig.API_PORT,
+                workers=SetupConfig.API_WORKERS,
+                app_dir=BASE_DIR)
+
+if __name__ == "__main__":
+    main()
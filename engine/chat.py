@@ -1,34 +1,63 @@
 # ********** IMPORT FRAMEWORK **********
-from langchain_core.prompts             import ChatPromptTemplate, PromptTemplate
-from langchain_core.runnables           import RunnableParallel 
-from pydantic                           import Field, BaseModel
-from langchain_core.output_parsers      import JsonOutputParser, StrOutputParser
-from langchain_community.callbacks      import get_openai_callback
+from langchain_core.runnables           import RunnableParallel, RunnableLambda
+from langchain_core.output_parsers      import StrOutputParser
 from langchain_core.messages            import HumanMessage, AIMessage, BaseMessage
 
 # ********** IMPORT LIBRARIES **********
-import requests
+import argparse
+import json
 import sys 
+import time
 import os
-from typing     import List, Dict, Tuple
+from typing     import List, Dict, Tuple, TYPE_CHECKING
 from operator   import itemgetter
 import re
-import pandas   as pd
+
+# *************** pandas and Astra are imported on first use, only the create/read intents need them
+if TYPE_CHECKING:
+    import pandas   as pd
 
 # ********** IMPORT **********
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from setup      import (SetupApi, 
+                        SetupConfig,
                         LOGGER, 
+                        log_payload,
+                        setup_logging,
                         LIST_COLUMNS_FILTER, 
                       )
 
 # ********** IMPORT MODEL **********
-from model.llms import LLM
+from model.llms import LLM, invoke_with_deadline, request_deadline, remaining_budget, meter_tokens
+from model.weather_records import WeatherObservation, ForecastSeries, parse_weather_response
 
 # ********** IMPORT HELPER **********
-from helper.response_error_helper   import json_clean_output
-from helper.data_client_helper      import create_data, connection_col, WeatherDataManager
+from helper.location_helper         import get_location_resolver, ResolvedLocation
+from helper.local_fallback_helper   import (detect_intent_locally,
+                                            extract_filters_locally,
+                                            topic_from_history,
+                                            render_weather_template,
+                                            )
+from helper.session_store_helper    import (collect_turn_records,
+                                            record_turn_weather,
+                                            record_turn_fetch,
+                                            turn_fetches,
+                                            get_session_store,
+                                            records_to_documents,
+                                            FilterState,
+                                            )
+from helper.speculation_helper      import speculate, claim, discard
+from helper.followup_helper         import (is_followup,
+                                            resolve_followup_locally,
+                                            apply_filter_delta,
+                                            reuse_key,
+                                            )
+from helper.forecast_analytics_helper   import (analyze_forecast,
+                                                compare_locations,
+                                                answer_forecast_question,
+                                                )
 from helper.llm_prompt_template     import (prompt_convert_text_to_filter,
+                                            prompt_filter_delta,
                                             prompt_response_format_weather, 
                                             prompt_unrelated_question,
                                             prompt_incomplete_filters, 
@@ -38,7 +67,11 @@ from helper.llm_prompt_template     import (prompt_convert_text_to_filter,
                                             prompt_response_insert_data,
                                             prompt_template_query_df, 
                                             prompt_response_data_analysis,
-                                            LIST_DATA_COLUMNS
+                                            LIST_DATA_COLUMNS,
+                                            FilterExpect,
+                                            FilterDelta,
+                                            IntentDetected,
+                                            DataExtracted,
                                             )
 
 # ********** IMPORT VALIDATOR **********
@@ -76,17 +109,20 @@ def handle_query_to_code(question: str, description_columns: dict, chat_history:
     chain = ( 
              runnale_filter | 
              prompt | 
-             LLM() |
+             LLM("query_code") |
              StrOutputParser()
              )
     
     # ********* Invoke the chain
-    filter_response = chain.invoke(
+    filter_response = invoke_with_deadline(
+                                    chain,
                                     {
                                         "question": question, 
                                         "description_columns": description_columns,
                                         "chat_history": chat_history
-                                    }
+                                    },
+                                    local_fallback=lambda inputs: "",
+                                    stage="query_code"
                                 )
     
     return filter_response
@@ -120,16 +156,19 @@ def handle_response_data_analysis(data: str) -> str:
     chain = ( 
              runnale_filter | 
              prompt | 
-             LLM() |
+             LLM("analysis_response") |
              StrOutputParser()
              )
     
     # ********* Invoke the chain
-    filter_response = chain.invoke(
+    filter_response = invoke_with_deadline(
+                                    chain,
                                     {
                                         "data": data, 
                                         
-                                    }
+                                    },
+                                    local_fallback=lambda inputs: f"Here is the data I found:\n\n{inputs['data']}",
+                                    stage="analysis_response"
                                 )
     
     return filter_response
@@ -269,76 +308,233 @@ def convert_text_to_filter(text_input: str, field_names: list|dict, chat_history
     chain = ( 
              runnale_filter | 
              prompt | 
-             LLM()
+             LLM("filter", schema=FilterExpect)
              )
     
     # ********* Invoke the chain
-    filter_response = chain.invoke(
+    filter_response = invoke_with_deadline(
+                                    chain,
                                     {
                                         "text_input": text_input, 
                                         "field_names": field_names,
                                         "chat_history": chat_history
-                                    }
+                                    },
+                                    local_fallback=lambda inputs: extract_filters_locally(inputs["text_input"], inputs["chat_history"]),
+                                    stage="filter"
                                 )
     
-    # ********* Clean the output and logger info
-    clean_result = json_clean_output(filter_response)
-    LOGGER.info(f"Filter Creation:\n {clean_result}")
+    # ********* Logger info
+    log_payload("Filter Creation", filter_response)
+    
+    return filter_response
+
+# *************** Speculative weather stage, run next to intent detection
+def _speculate_weather(text_input: str, chat_history: List[dict]) -> dict:
+    """
+    Extract the filters as if the turn were a weather question and, with
+    CHAT_SPECULATIVE_PREFETCH, fetch the weather for the intent guessed by the local rules.
+    Fetched records are kept apart from the turn until claimed.
+
+    Args:
+        text_input (str): User's input text.
+        chat_history (List[dict]): Previous messages.
+
+    Returns:
+        dict: {"filters", "intent" (the guess), "fetches" (see call_weather_api 'reuse'), "tokens"}
+    """
+    with meter_tokens() as used:
+        filters = convert_text_to_filter(text_input, LIST_COLUMNS_FILTER, chat_history)
+    guess = detect_intent_locally(text_input, chat_history)["intent_detected"][0]["intent"]
+    fetches = {}
+    if SetupConfig.CHAT_SPECULATIVE_PREFETCH and guess in ("current_weather", "forecast"):
+        with collect_turn_records():
+            call_weather_api(filters, guess)
+            fetches = turn_fetches()
+    return {"filters": filters, "intent": guess, "fetches": fetches, "tokens": used[0]}
+
+# *************** Function to resolve a follow-up question against the previous filters
+def resolve_followup_filters(text_input: str, state: FilterState) -> dict | None:
+    """
+    Apply a follow-up question ("and tomorrow?", "same for Tokyo") as a patch to the filters of
+    the previous weather turn. Local rules are tried first, a short LLM prompt only when they
+    recognize nothing.
+
+    Args:
+        text_input (str): User's input text.
+        state (FilterState): Intent and filters of the previous weather turn.
+
+    Returns:
+        dict | None: {"intent": ..., "filter_created": [...]}, or None when the message is not a
+            follow-up or could not be resolved, and needs the full intent and filter stages.
+    """
+    if not is_followup(text_input):
+        return None
+    resolved = resolve_followup_locally(text_input, state)
+    if resolved is not None:
+        LOGGER.info("Follow-up resolved by local rules.")
+        return resolved
     
-    return clean_result
+    chain = prompt_filter_delta() | LLM("filter_delta", schema=FilterDelta)
+    delta = invoke_with_deadline(chain,
+                                 {"text_input": text_input,
+                                  "previous": json.dumps({"intent": state.intent, "filters": state.filters}),
+                                  "field_names": LIST_COLUMNS_FILTER},
+                                 local_fallback=lambda inputs: None,
+                                 stage="filter_delta")
+    # *************** The model declines messages that only look like follow-ups ("and how many records are saved?")
+    if not delta or not delta.get("is_followup"):
+        return None
+    return apply_filter_delta(state, delta["intent"], list(delta.get("changed_filters") or []), bool(delta.get("replace_locations", True)))
+
+# *************** Function to group filters into one canonical parameter set per location
+def build_location_params(filters: dict) -> List[Dict]:
+    """
+    Group the flat filter list into one OpenWeather parameter set per location. Free-form
+    city names are canonicalized to a city id through the local gazetteer / geocode cache,
+    so aliases like "KL" and "Kuala Lumpur, MY" become the same upstream request.
+
+    Args:
+        filters (dict): Filters created by convert_text_to_filter.
+
+    Returns:
+        List[Dict]: Query parameters for each location, with 'lang', 'units' and 'cnt' shared.
+    """
+    shared_params = {}
+    locations = []
+    coordinates = {}
+
+    # *************** Split location fields from the options shared by every location
+    for filter_item in filters.get("filter_created", []):
+        field_name = filter_item.get("field_name")
+        value_target = filter_item.get("value_target")
+        if value_target in (None, ""):
+            continue
+        if field_name in {"lang", "units", "cnt"}:
+            shared_params[field_name] = value_target
+        elif field_name in {"q", "zip"}:
+            locations.append({field_name: value_target})
+        elif field_name in {"lat", "lon"}:
+            coordinates[field_name] = value_target
+            if len(coordinates) == 2:
+                locations.append(coordinates)
+                coordinates = {}
+
+    # *************** Canonicalize city names so aliases share one request
+    resolver = get_location_resolver()
+    extracted_params = []
+    seen = set()
+    for location in locations:
+        if "q" in location:
+            resolved = resolver.resolve(location["q"])
+            if resolved:
+                location = resolved.to_params()
+
+        params = {**location, **shared_params}
+        key = tuple(sorted((k, str(v)) for k, v in params.items()))
+        if key not in seen:
+            seen.add(key)
+            extracted_params.append(params)
+
+    return extracted_params
 
 # *************** Function to call weather api
-def call_weather_api(filters: dict, intent_detected: str) -> List[Dict]:
+def call_weather_api(filters: dict, intent_detected: str, reuse: Dict[tuple, tuple] | None = None) -> List[WeatherObservation | ForecastSeries | Dict]:
     """
     Call the OpenWeather API to get the current weather data for multiple locations.
 
     Args:
         filters (dict): The filters to use in the API call.
+        reuse (Dict[tuple, tuple] | None): (record, fetched_at) pairs of the previous turn by
+            reuse_key; matching locations are converted to the requested units instead of fetched.
 
     Returns:
-        list: A list of responses from the OpenWeather API (one for each input).
+        list: One parsed record per location (WeatherObservation for current weather,
+              ForecastSeries for forecasts), or {"error": ...} when the call failed.
     """
+    # *************** requests and the upstream client load on the first weather call
+    import requests
+    from helper.weather_api_helper import fetch_weather, get_current_weather_batcher, WEATHER_URL, FORECAST_URL
+
     # *************** Validate the filters
     if not validate_dict_input(filters, 'filters'):
         LOGGER.error("'filters' must be a dict.")
         return [{"error": "'filters' must be a non-empty dictionary."}]
     
-    required_fields = {"q", "zip", "lat", "lon", "cnt"}
-    extracted_params = []
-    
-    # *************** Flatten filter_created into individual query parameters
-    for filter_item in filters.get("filter_created", []):
-        field_name = filter_item.get("field_name")
-        value_target = filter_item.get("value_target")
-        if field_name in required_fields or field_name in {"lang", "units"}:
-            extracted_params.append({field_name: value_target})
-    
+    extracted_params = build_location_params(filters)
+
     # *************** Ensure at least one valid input
-    if not any(param for param in extracted_params if any(key in required_fields for key in param)):
+    if not extracted_params:
         LOGGER.error("At least one of 'q', 'zip', 'lat', or 'lon' must be provided.")
-    
+
     # *************** Call OpenWeather API for each valid input
     if intent_detected == "current_weather":
-        url = "https://api.openweathermap.org/data/2.5/weather"
+        url = WEATHER_URL
     elif intent_detected == "forecast":
-        url = "https://api.openweathermap.org/data/2.5/forecast"
+        url = FORECAST_URL
+
+    # *************** Records of the previous turn are reused for follow-ups
+    keys = [reuse_key(intent_detected, params) for params in extracted_params]
+    reused = [(reuse or {}).get(key) for key in keys]
+
+    # *************** Current weather for resolved city ids goes through grouped requests
+    results = [None] * len(extracted_params)
+    if intent_detected == "current_weather":
+        batched = [index for index, params in enumerate(extracted_params) if "id" in params and reused[index] is None]
+        payloads = get_current_weather_batcher().fetch_many([extracted_params[index] for index in batched])
+        for index, payload in zip(batched, payloads):
+            results[index] = payload
+
+    # *************** Remaining inputs are fetched one by one
     responses = []
-    for params in extracted_params:
+    for params, result, key, previous in zip(extracted_params, results, keys, reused):
+        if previous is not None:
+            record, fetched_at = previous
+            record = record.with_units(params.get("units", "standard"))
+            record_turn_fetch(key, record, fetched_at)
+            responses.append(record)
+            continue
         try:
-            # *************** Add API key to parameters
-            full_params = {"appid": SetupApi.weather_key, **params}
-            response = requests.get(url, params=full_params)
-            response.raise_for_status()
-            responses.append(response.json())
+            if result is None:
+                result = fetch_weather(url, params)
+            if isinstance(result, Exception):
+                raise result
+            record = parse_weather_response(result, params.get("units", "standard"))
+            record = record if isinstance(record, ForecastSeries) else record[0]
+            # *************** A body without a city id is not a location worth remembering
+            if record.city_id:
+                get_location_resolver().learn_location(ResolvedLocation(id=record.city_id,
+                                                                        name=record.name,
+                                                                        country=record.country,
+                                                                        lat=record.lat,
+                                                                        lon=record.lon),
+                                                       params.get("q"))
+            record_turn_fetch(key, record)
+            responses.append(record)
         except requests.exceptions.RequestException as e:
             # *************** Log error if API call fails
             LOGGER.error(f"Error calling OpenWeather API: {e}")
             responses.append({"error": f"Error calling OpenWeather API: {e}"})
+        except (ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+            # *************** Malformed body (not JSON, empty list, unexpected shape): only this location fails
+            LOGGER.error(f"Unexpected OpenWeather response: {e}")
+            responses.append({"error": f"Unexpected OpenWeather response: {e}"})
     
+    record_turn_weather(responses)
     return responses
 
+# *************** Function to build the compact prompt view of the weather records
+def _weather_prompt_items(response: List[WeatherObservation | ForecastSeries | Dict]) -> List[Dict]:
+    # *************** Forecasts are summarized by the analytics module instead of listing every 3-hour step
+    items = [analyze_forecast(item) if isinstance(item, ForecastSeries)
+             else item.to_prompt() if hasattr(item, "to_prompt") else item
+             for item in response]
+    comparison = compare_locations([item for item in response if isinstance(item, ForecastSeries)])
+    if comparison:
+        items.append({"comparison": comparison})
+    return items
+
 # *************** Function to format the response from the OpenWeather API
-def response_format_weather(response: List[Dict]): 
+def response_format_weather(response: List[WeatherObservation | ForecastSeries | Dict]): 
     """
     Call the OpenWeather API to get the current weather data for multiple locations.
 
@@ -365,25 +561,31 @@ def response_format_weather(response: List[Dict]):
     chain = ( 
              runnale_filter | 
              prompt | 
-             LLM() | 
+             LLM("format_weather") | 
              StrOutputParser()
              )
     
-    filter_response = chain.invoke(
+    filter_response = invoke_with_deadline(
+                                    chain,
                                     {
-                                        "response": response
-                                    }
+                                        "response": _weather_prompt_items(response)
+                                    },
+                                    local_fallback=lambda inputs: render_weather_template(response),
+                                    stage="format_weather"
                                 )
     
     return filter_response
 
 # *************** Function to handle current weather request
-def handle_currrrent_weather(text_input:str, intent_detected: str, chat_history: list[dict]) -> str:
+def handle_currrrent_weather(text_input:str, intent_detected: str, chat_history: list[dict],
+                             filters: dict | None = None, reuse: Dict[tuple, tuple] | None = None) -> str:
     """
     Handle the user's request for current weather information.
 
     Args:
         text_input (str): The user's input text.
+        filters (dict | None): Filters already resolved for a follow-up, extracted when None.
+        reuse (Dict[tuple, tuple] | None): Records of the previous turn, see call_weather_api.
 
     Returns:
         response_formatted: The formatted response for the current weather information.
@@ -393,20 +595,22 @@ def handle_currrrent_weather(text_input:str, intent_detected: str, chat_history:
     if not validate_string_input(text_input, 'text_input'): 
         LOGGER.error("'text_input' must be a string.")
     
-    filters = convert_text_to_filter(text_input, LIST_COLUMNS_FILTER, chat_history)
-    print(f"\n\n filter: {filters}")
-    weather_output = call_weather_api(filters, intent_detected)
-    print(f"\n\n weather_api: {weather_output}")
+    filters = filters or convert_text_to_filter(text_input, LIST_COLUMNS_FILTER, chat_history)
+    weather_output = call_weather_api(filters, intent_detected, reuse)
+    log_payload("OpenWeather responses", weather_output)
     response_formatted = response_format_weather(weather_output)
     return response_formatted
 
 # *************** Function to handle forecast request
-def handle_forecast_weather(text_input:str, intent_detected: str, chat_history: list[dict]) -> str:
+def handle_forecast_weather(text_input:str, intent_detected: str, chat_history: list[dict],
+                            filters: dict | None = None, reuse: Dict[tuple, tuple] | None = None) -> str:
     """
     Handle the user's request for weather forecast information.
 
     Args:
         text_input (str): The user's input text.
+        filters (dict | None): Filters already resolved for a follow-up, extracted when None.
+        reuse (Dict[tuple, tuple] | None): Records of the previous turn, see call_weather_api.
 
     Returns:
         response_formatted: The formatted response for the weather forecast information
@@ -416,9 +620,16 @@ def handle_forecast_weather(text_input:str, intent_detected: str, chat_history:
     if not validate_string_input(text_input, 'text_input'):
         LOGGER.error("'text_input' must be a string.")
     
-    filters = convert_text_to_filter(text_input, LIST_COLUMNS_FILTER, chat_history)
-    print(f"\n\n filter: {filters}")
-    weather_ouput = call_weather_api(filters, intent_detected)
+    filters = filters or convert_text_to_filter(text_input, LIST_COLUMNS_FILTER, chat_history)
+    weather_ouput = call_weather_api(filters, intent_detected, reuse)
+    log_payload("OpenWeather responses", weather_ouput)
+    
+    # *************** Rain, warmest/coldest day and threshold questions are answered from the forecast arrays
+    if SetupConfig.FORECAST_TEMPLATED_ANSWERS and not any(isinstance(item, dict) for item in weather_ouput):
+        answer = answer_forecast_question(text_input, weather_ouput)
+        if answer is not None:
+            return answer
+    
     response_formatted = response_format_weather(weather_ouput)
     return response_formatted
 
@@ -443,9 +654,12 @@ def handle_unrelated_question(input_text:str, user_intent:str) -> str:
     template_prompt = prompt_unrelated_question()
     
     # *************** chaining prompt with llm 
-    chain_chat = template_prompt | LLM() | StrOutputParser()
-    result = chain_chat.invoke({"input_text": input_text, 
-                                "user_intent": user_intent})
+    chain_chat = template_prompt | LLM("reply") | StrOutputParser()
+    result = invoke_with_deadline(chain_chat,
+                                  {"input_text": input_text, 
+                                   "user_intent": user_intent},
+                                  local_fallback=lambda inputs: "I'm a weather assistant, I can help with current weather, forecasts and your saved weather data.",
+                                  stage="unrelated_reply")
     return result
 
 # *************** Function to response to incomplete filters user's input
@@ -469,9 +683,12 @@ def handle_incomplete_filters(input_text:str, list_filters:dict) -> str:
     template_prompt = prompt_incomplete_filters()
     
     # *************** chaining prompt with llm 
-    chain_chat = template_prompt | LLM() | StrOutputParser()
-    result = chain_chat.invoke({"input_text": input_text, 
-                                "list_filters": list_filters})
+    chain_chat = template_prompt | LLM("reply") | StrOutputParser()
+    result = invoke_with_deadline(chain_chat,
+                                  {"input_text": input_text, 
+                                   "list_filters": list_filters},
+                                  local_fallback=lambda inputs: "Please tell me the location you want the weather for (a city name, ZIP code, or latitude and longitude).",
+                                  stage="incomplete_reply")
     return result    
     
 # *************** Function to handle topic creation
@@ -489,15 +706,25 @@ def topic_creation(chat_history: List[dict]) -> str:
     if not validate_list_input(chat_history, 'chat_history'):
         LOGGER.error(f"Chat history must be in a list and not empty {chat_history}")
     
+    raw_history = chat_history
     chat_history = convert_chat_history(chat_history)
     prompt = prompt_topic_creation()
     
     # *************** Chain topic creation
-    chain = prompt | LLM() | StrOutputParser()
-    result = chain.invoke({"chat_history": chat_history})
+    chain = prompt | LLM("topic") | StrOutputParser()
+    result = invoke_with_deadline(chain,
+                                  {"chat_history": chat_history},
+                                  local_fallback=lambda inputs: topic_from_history(raw_history),
+                                  stage="topic")
     return result
 
 # *************** Function to execute the decision intent
+def _intent_ready(arguments: dict) -> bool:
+    # *************** A key streamed after "intent" means the intent string is complete
+    items = arguments.get("intent_detected") or []
+    keys = list(items[0]) if items and isinstance(items[0], dict) else []
+    return "intent" in keys and keys[-1] != "intent"
+
 def generate_decision(input_text:str, list_filters:dict, chat_history: list[dict]) -> str:
     """
     Generate the decision based on the input text.
@@ -524,13 +751,14 @@ def generate_decision(input_text:str, list_filters:dict, chat_history: list[dict
         "chat_history": itemgetter('chat_history')
     })
     # *************** chaining prompt with llm 
-    chain_chat = runnable_chain| template_prompt | LLM() 
-    result = chain_chat.invoke({"input_text": input_text,
-                                "list_filters": list_filters,
-                                "chat_history": context_window_history
-                                })
-    
-    result = json_clean_output(result)
+    chain_chat = runnable_chain| template_prompt | LLM("intent", schema=IntentDetected, ready=_intent_ready)
+    result = invoke_with_deadline(chain_chat,
+                                  {"input_text": input_text,
+                                   "list_filters": list_filters,
+                                   "chat_history": context_window_history
+                                   },
+                                  local_fallback=lambda inputs: detect_intent_locally(input_text, chat_history),
+                                  stage="intent")
     return result
 
 def extract_python_code(text):
@@ -542,23 +770,28 @@ def extract_python_code(text):
         return ans
     return ""
 
-def execute_analysis(code: str, df: pd.DataFrame) -> tuple[pd.DataFrame, str]:
+def execute_analysis(code: str, df: "pd.DataFrame", printed: List[str] | None = None) -> tuple["pd.DataFrame", str]:
     """
     Execute the generated analysis code on the DataFrame
     
     Args:
         code (str): Python code to execute
         df (pd.DataFrame): DataFrame to analyze
+        printed (List[str] | None): Collects what the code prints, when given
         
     Returns:
         tuple[pd.DataFrame, str]: Result DataFrame and any error message
     """
+    import pandas as pd
     try:
         # Create a local copy of the DataFrame
         local_df = df.copy()
         
         # Add the DataFrame to the local namespace
         local_vars = {'df': local_df, 'pd': pd}
+        if printed is not None:
+            # *************** Per-call print instead of redirecting the process-wide stdout
+            local_vars['print'] = lambda *args, sep=" ", **kwargs: printed.append(sep.join(str(arg) for arg in args))
         
         # Execute the code
         exec(code, globals(), local_vars)
@@ -572,82 +805,160 @@ def execute_analysis(code: str, df: pd.DataFrame) -> tuple[pd.DataFrame, str]:
         LOGGER.error(error_msg)
         return pd.DataFrame(), error_msg
     
-import streamlit as st
+# *************** Function to answer a read question with generated analysis code
+def handle_read_analysis(text_input: str, chat_history: List[dict]) -> str:
+    """
+    Generate analysis code for the question, run it on the stored weather data and describe the result.
+
+    Args:
+        text_input (str): The user's question.
+        chat_history (List[dict]): Previous messages.
+
+    Returns:
+        str: The analysis response.
+    """
+    import pandas as pd
+    from helper.data_client_helper import query_weather_data, history_since, hot_window_start
+    from helper.analysis_code_helper import referenced_columns, extract_predicates
+    
+    code_data_analysis = handle_query_to_code(text_input, LIST_DATA_COLUMNS, chat_history)
+    code = extract_python_code(code_data_analysis)
+    log_payload("Code extracted", code)
+    # At application startup
+    pd.set_option('display.max_columns', None)
+    pd.set_option('display.width', 1000)
+    # *************** Only the rows and columns the code reads; older periods named in it come from the cold store
+    columns = referenced_columns(code, LIST_DATA_COLUMNS)
+    predicates = extract_predicates(code, LIST_DATA_COLUMNS)
+    LOGGER.info(f"Analysis columns: {columns or 'all'}, pushed predicates: {predicates}")
+    since = history_since(code)
+    df = query_weather_data(predicates, columns=columns, since=since)
+    printed = []
+    result_df, error = execute_analysis(code, df, printed)
+    output = error or "\n".join(printed) or result_df.to_string(max_rows=SetupConfig.ANALYSIS_MAX_ROWS)
+    # *************** Row listings without a period only search the hot window, say so in the answer
+    window_start = hot_window_start() if since is None and not error else None
+    if window_start is not None:
+        output += f"\n(Only records observed since {window_start:%Y-%m-%d} were searched.)"
+    log_payload("Analysis output", output)
+    return handle_response_data_analysis(output)
+    
+# Answer of a turn that raised; the batch entry points count it as a failure
+CHAT_ERROR_RESPONSE = "Sorry, I couldn't process that request right now. Please try again."
+
 # *************** Main function to ask for weather information
-def ask_to_chat(text_input: str, chat_history: List[Dict[str, str]], topic:str) -> Tuple[str, List[Dict[str, str]], str]:
+def ask_to_chat(text_input: str, chat_history: List[Dict[str, str]], topic:str, session_id: str = "") -> Tuple[str, List[Dict[str, str]], str]:
     """
     Process chat input and generate appropriate weather-related responses.
     
     Args:
         text_input: User's input text
         chat_history: List of previous chat messages
+        topic: Topic of the chat, empty for a new one
+        session_id: Id of the conversation keeping its fetched records and filters between
+            turns; empty keeps none
     
     Returns:
         Tuple containing response information and updated chat history
     """
     try:
-        # *************** Validate input
-        if not validate_list_input(chat_history, 'chat_history', False):
-            LOGGER.error(f"Chat history must be in a list {chat_history}")
-        if not validate_string_input(text_input, "text_input"):
-            LOGGER.error("'input_text' must be a string.")
-        if not validate_string_input(topic, "text_input", False):
-            LOGGER.error("'topic' must be a string.")
-
-        # *************** Generate intent
-        intent_result = generate_decision(text_input, LIST_COLUMNS_FILTER, chat_history)
-        print(f"\n\n intent result: {intent_result}")
-        intent_detected = intent_result.get("intent_detected", [{}])[0].get("intent", "unknown")
+        # *************** Every LLM stage of the turn shares one time budget
+        with request_deadline(SetupConfig.CHAT_REQUEST_BUDGET_S), collect_turn_records() as turn_records:
+            # *************** Validate input
+            if not validate_list_input(chat_history, 'chat_history', False):
+                LOGGER.error(f"Chat history must be in a list {chat_history}")
+            if not validate_string_input(text_input, "text_input"):
+                LOGGER.error("'input_text' must be a string.")
+            if not validate_string_input(topic, "text_input", False):
+                LOGGER.error("'topic' must be a string.")
+
+            # *************** Follow-ups patch the filters of the last weather turn instead of detecting them again
+            previous = get_session_store().last_filters(session_id) if SetupConfig.FOLLOWUP_CARRY_OVER and session_id else None
+            followup = resolve_followup_filters(text_input, previous) if previous else None
+            speculation = None
+            if followup is not None:
+                log_payload("Follow-up filters", followup)
+                intent_detected = followup["intent"]
+            else:
+                # *************** Opt-in: extract the filters (and fetch the weather) while the intent is detected
+                if SetupConfig.CHAT_SPECULATIVE_FILTERS:
+                    speculation = speculate(_speculate_weather, text_input, chat_history)
+                # *************** Generate intent
+                intent_result = generate_decision(text_input, LIST_COLUMNS_FILTER, chat_history)
+                log_payload("Intent result", intent_result)
+                intent_detected = intent_result.get("intent_detected", [{}])[0].get("intent", "unknown")
         
-        LOGGER.info(f"Detected intent: {intent_detected}")
-
-        # *************** Intent handlers mapping
-        response_information = ""
-        data_saved = None
-        if intent_detected == "current_weather":
-            response_information = handle_currrrent_weather(text_input, intent_detected, chat_history)
-        elif intent_detected == "forecast":
-            response_information = handle_forecast_weather(text_input, intent_detected, chat_history)
-        elif intent_detected == "create":
-            data_extracted = handle_extract_data(chat_history)
-            print(f"\n\n data_extracted: {data_extracted}")
-            data_saved = create_data(data_extracted)
-            response_information = handle_response_inserted(data_saved)
-        elif intent_detected == "read":
-            code_data_analysis = handle_query_to_code(text_input, LIST_DATA_COLUMNS, chat_history)
-            code = extract_python_code(code_data_analysis)
-            print(f"\n\n code_extracted {code}")
-            # At application startup
-            pd.set_option('display.max_columns', None)
-            pd.set_option('display.width', 1000)
-            weather_manager = WeatherDataManager()
-
-            df, _ = weather_manager.get_dataframe()
-            output = execute_analysis(code, df)
-            print(f"\n\n output: {output}")
-            response_information = handle_response_data_analysis(output)
+            LOGGER.info(f"Detected intent: {intent_detected}")
+
+            # *************** Intent handlers mapping
+            response_information = ""
+            data_saved = None
+            filters = None
+            if intent_detected in ("current_weather", "forecast"):
+                speculated = claim(speculation, intent_detected, remaining_budget()) if speculation else None
+                filters = followup or (speculated or {}).get("filters") \
+                    or convert_text_to_filter(text_input, LIST_COLUMNS_FILTER, chat_history)
+                reuse = previous.reusable(SetupConfig.FOLLOWUP_REUSE_TTL_S) if followup else (speculated or {}).get("fetches")
+            elif speculation is not None:
+                discard(speculation)
+            if intent_detected == "current_weather":
+                response_information = handle_currrrent_weather(text_input, intent_detected, chat_history, filters, reuse)
+            elif intent_detected == "forecast":
+                response_information = handle_forecast_weather(text_input, intent_detected, chat_history, filters, reuse)
+            elif intent_detected == "create":
+                from helper.data_client_helper import create_data
+                # *************** Save the records fetched earlier in this session, the LLM only re-extracts without them
+                session_records = get_session_store().recent(session_id) if session_id else []
+                if session_records:
+                    data_extracted = records_to_documents(session_records)
+                else:
+                    data_extracted = handle_extract_data(chat_history)
+                log_payload("Data extracted", data_extracted)
+                data_saved = create_data(data_extracted)
+                response_information = handle_response_inserted(data_saved)
+            elif intent_detected == "read":
+                from helper.data_client_helper import get_weather_aggregates
+                from helper.aggregate_helper import match_aggregate_question, answer_from_aggregates
+                
+                # *************** Averages, extremes, counts and latest records come from the maintained aggregates
+                aggregate_output = None
+                if match_aggregate_question(text_input) is not None:
+                    aggregate_output = answer_from_aggregates(text_input, get_weather_aggregates())
+                if aggregate_output is not None:
+                    log_payload("Aggregate output", aggregate_output)
+                    response_information = handle_response_data_analysis(aggregate_output)
+                else:
+                    response_information = handle_read_analysis(text_input, chat_history)
             
-        elif intent_detected == "incomplete":
-            response_information = handle_incomplete_filters(text_input, LIST_COLUMNS_FILTER)
-        elif intent_detected == "unknown":
-            response_information = handle_unrelated_question(text_input, intent_detected)
+            elif intent_detected == "incomplete":
+                response_information = handle_incomplete_filters(text_input, LIST_COLUMNS_FILTER)
+            elif intent_detected == "unknown":
+                response_information = handle_unrelated_question(text_input, intent_detected)
         
-        # *************** Update history
-        history = save_chat_history(chat_history, text_input, response_information)
-        print(f"\n\nhistory mid {history}")
-         # *************** Topic creation
-        if topic == "": 
-            first_history = []
-            for history_chat in chat_history[:2]:
-                first_history.append(history_chat)
-            topic_created = topic_creation(first_history)
-        else: 
-            topic_created = "Weather Topic"
+            # *************** Update history
+            history = save_chat_history(chat_history, text_input, response_information)
+            log_payload("Chat history", history)
+             # *************** Topic creation
+            if topic == "": 
+                first_history = []
+                for history_chat in chat_history[:2]:
+                    first_history.append(history_chat)
+                topic_created = topic_creation(first_history)
+            else: 
+                topic_created = topic
+            get_session_store().remember(session_id, turn_records)
+            if filters is not None:
+                get_session_store().remember_filters(session_id, FilterState(intent_detected,
+                                                                           list(filters.get("filter_created") or []),
+                                                                           turn_fetches()))
         
-        return response_information, history, topic_created
+            return response_information, history, topic_created
 
     except Exception as e:
         LOGGER.error(f"Error processing chat: {str(e)}")
+        return (CHAT_ERROR_RESPONSE,
+                chat_history,
+                topic or "Weather Topic")
 
 # *************** Function to chain extract data 
 def handle_extract_data(chat_history: List[dict]) -> List[dict]: 
@@ -676,15 +987,17 @@ def handle_extract_data(chat_history: List[dict]) -> List[dict]:
     chain = ( 
              runnale_filter | 
              prompt | 
-             LLM() 
+             LLM("extract", schema=DataExtracted)
              )
     
-    filter_response = chain.invoke(
+    filter_response = invoke_with_deadline(
+                                    chain,
                                     {
                                         "chat_history": chat_history
-                                    }
+                                    },
+                                    local_fallback=lambda inputs: {"extracted_data": []},
+                                    stage="extract"
                                 )
-    filter_response = json_clean_output(filter_response)
     return filter_response
 
 # *************** Function to chain extract data 
@@ -714,23 +1027,144 @@ def handle_response_inserted(response: str) -> str:
     chain = ( 
              runnale_filter | 
              prompt | 
-             LLM() |
+             LLM("reply") |
              StrOutputParser()
              )
     
-    response_output = chain.invoke(
+    response_output = invoke_with_deadline(
+                                    chain,
                                     {
                                         "information_msg": response
-                                    }
+                                    },
+                                    local_fallback=lambda inputs: f"Your weather data is being saved. {inputs['information_msg']}",
+                                    stage="insert_reply"
                                 )
     return response_output
 
+# *************** Function to run one chat record, used by the batch entry points
+def _ask_to_chat_record(record: Dict) -> Dict:
+    started = time.perf_counter()
+    response, history, topic = ask_to_chat(record.get("text_input", ""),
+                                           record.get("chat_history") or [],
+                                           record.get("topic") or "",
+                                           record.get("session_id") or "")
+    result = {
+        "text_input": record.get("text_input", ""),
+        "response": response,
+        "chat_history": history,
+        "topic": topic,
+        "elapsed_s": round(time.perf_counter() - started, 3),
+    }
+    if response is CHAT_ERROR_RESPONSE:
+        result["failed"] = True
+    return result
+
+CHAT_RUNNABLE = RunnableLambda(_ask_to_chat_record)
+
+# *************** Function to ask many queries at once
+def ask_to_chat_batch(records: List[Dict], max_concurrency: int = SetupConfig.CHAT_BATCH_CONCURRENCY) -> List[Dict]:
+    """
+    Run many chat records through the engine with bounded concurrency.
+
+    This is a thread fan-out of whole ask_to_chat turns: each record runs its own LLM and
+    OpenWeather calls, no requests are batched together upstream.
+
+    Args:
+        records (List[Dict]): Records with 'text_input', 'chat_history', 'topic' and an optional
+            'session_id'.
+        max_concurrency (int): Maximum number of records processed at the same time.
+
+    Returns:
+        List[Dict]: One result per record, in input order, with 'response', 'chat_history',
+            'topic' and 'elapsed_s', and 'failed' for turns that raised.
+    """
+    if not records:
+        return []
+    return CHAT_RUNNABLE.batch(records, config={"max_concurrency": max_concurrency})
+
+# *************** Async variant of ask_to_chat_batch
+async def aask_to_chat_batch(records: List[Dict], max_concurrency: int = SetupConfig.CHAT_BATCH_CONCURRENCY) -> List[Dict]:
+    """
+    Async version of ask_to_chat_batch. The turns still run in executor threads (the same
+    fan-out as ask_to_chat_batch), awaiting only frees the event loop meanwhile.
+
+    Args:
+        records (List[Dict]): Records with 'text_input', 'chat_history' and 'topic'.
+        max_concurrency (int): Maximum number of records processed at the same time.
+
+    Returns:
+        List[Dict]: One result per record, in input order.
+    """
+    if not records:
+        return []
+    return await CHAT_RUNNABLE.abatch(records, config={"max_concurrency": max_concurrency})
+
+# *************** Function to read a JSONL file in chunks of records
+def read_jsonl_chunks(file, chunk_size: int):
+    """
+    Yield lists of (line_number, record) from a JSONL file, skipping empty lines.
+    Lines that are not valid JSON objects are yielded with the error message as record.
+    """
+    chunk = []
+    for line_number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("record must be a JSON object")
+        except ValueError as e:
+            record = f"Invalid record: {str(e)}"
+        chunk.append((line_number, record))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+# *************** CLI entry point
+def main(argv: List[str] | None = None) -> int:
+    """
+    Run a JSONL file of chat records through the engine and write the results as JSONL.
+
+    Each input line is {"text_input": ..., "chat_history": [...], "topic": ...} with an optional
+    "session_id" carrying records and filters between lines of one conversation; each output
+    line adds 'response', the updated 'chat_history', 'topic', 'elapsed_s' and the input 'line'.
+    The exit code is 1 when a line was invalid or a turn failed.
+    """
+    parser = argparse.ArgumentParser(description="Run chat records from a JSONL file through the weather chat engine.")
+    parser.add_argument("input", help="JSONL file with text_input, chat_history and topic per line ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="JSONL file for the results ('-' for stdout)")
+    parser.add_argument("-c", "--concurrency", type=int, default=SetupConfig.CHAT_BATCH_CONCURRENCY,
+                        help="Records processed at the same time")
+    parser.add_argument("--chunk-size", type=int, default=SetupConfig.CHAT_BATCH_CHUNK_SIZE,
+                        help="Records read into memory per batch")
+    args = parser.parse_args(argv)
+
+    setup_logging()
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    target = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    started, processed, invalid, failed = time.perf_counter(), 0, 0, 0
+    try:
+        for chunk in read_jsonl_chunks(source, max(1, args.chunk_size)):
+            valid = [(line, record) for line, record in chunk if isinstance(record, dict)]
+            results = dict(zip((line for line, _ in valid),
+                               ask_to_chat_batch([record for _, record in valid], args.concurrency)))
+            for line, record in chunk:
+                result = results.get(line, {"error": record})
+                invalid += "error" in result
+                failed += bool(result.get("failed"))
+                target.write(json.dumps({"line": line, **result}, ensure_ascii=False) + "\n")
+            target.flush()
+            processed += len(chunk)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+
+    LOGGER.info(f"Processed {processed} records ({invalid} invalid, {failed} failed) in {time.perf_counter() - started:.1f}s.")
+    return 0 if not (invalid or failed) else 1
+
 if __name__ == "__main__":
-    payload = { 
-               "text_input": "i want to save the data",
-               "chat_history": [{'type': 'human', 'content': 'i need weather condition in kuala lumpur'}, {'type': 'ai', 'content': '**Weather Analysis for Kuala Lumpur, Malaysia**\n\n- **Location:** Kuala Lumpur, Malaysia\n- **Coordinates:** Latitude 3.1431, Longitude 101.6865\n- **Current Weather:** Few clouds\n- **Temperature:** \n  - Current: 298.84 K (approx. 25.7°C)\n  - Feels Like: 299.61 K (approx. 26.5°C)\n  - Min: 298.02 K (approx. 25.9°C)\n  - Max: 299.4 K (approx. 26.3°C)\n- **Humidity:** 82%\n- **Pressure:** 1013 hPa\n- **Wind:** \n  - Speed: 0.51 m/s\n  - Direction: 0° (calm)\n- **Cloud Coverage:** 20% \n- **Visibility:** 10,000 meters\n- **Sunrise:** 06:00 AM (local time)\n- **Sunset:** 06:32 PM (local time)\n- **Timezone:** UTC+8\n\n**Summary of Weather Conditions:**\nKuala Lumpur is currently experiencing mild temperatures with a few clouds in the sky. The humidity is relatively high at 82%, which may contribute to a warmer feel. Wind conditions are calm with minimal movement. Overall, it is a pleasant evening, suitable for outdoor activities, with good visibility.'}],
-               "topic": ""
-               }
-    response, history, topic = ask_to_chat(payload['text_input'], payload['chat_history'], payload['topic'])
-    print(f"\n\nresponse: {response}")
-    print(f"\n\history: {history}")
+    sys.exit(main())
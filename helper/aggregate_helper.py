@@ -0,0 +1,239 @@
+# ********** IMPORT LIBRARIES **********
+from typing     import Dict, List, Tuple
+import re
+import numpy    as np
+import pandas   as pd
+
+from helper.location_helper import get_location_resolver, ResolvedLocation
+
+# Per-location / per-day aggregates of the stored weather records, maintained on every insert
+# by the aggregate store of data_client_helper, and a rule-based matcher answering the common "read" questions
+# (average, minimum, maximum, count, latest) from them without generating analysis code.
+
+AGGREGATE_COLUMNS = ["Temperature_Current", "Temperature_Feels_Like", "Temperature_Minimum", "Temperature_Maximum",
+                     "Pressure_hPa", "Humidity_Percent", "Visibility_km", "Wind_Speed_m_s", "Wind_Gusts_m_s",
+                     "Cloud_Cover_Percent"]
+# Columns of the latest record kept per location
+LATEST_COLUMNS = ["Location", "Observed_At", "Weather_Conditions", *AGGREGATE_COLUMNS]
+STATS = ("count", "sum", "min", "max")
+RECORDS = "Records"  # ("Records", "count") counts the rows, whichever columns they fill
+UNKNOWN_DAY = "unknown"
+
+class WeatherAggregates:
+    """
+    Immutable aggregate state: 'daily' holds the number of records and count/sum/min/max of every
+    AGGREGATE_COLUMNS column per (Location, day), 'latest' the most recent record of every location. 'update' returns a
+    new instance, so readers can use the one they hold without locking.
+    """
+
+    def __init__(self, daily: pd.DataFrame | None = None, latest: pd.DataFrame | None = None):
+        columns = pd.MultiIndex.from_tuples([(RECORDS, "count")]).append(pd.MultiIndex.from_product([AGGREGATE_COLUMNS, STATS]))
+        index = pd.MultiIndex.from_tuples([], names=["Location", "day"])
+        self.daily = daily if daily is not None else pd.DataFrame(columns=columns, index=index, dtype="float64")
+        self.latest = latest if latest is not None else pd.DataFrame()
+
+    @property
+    def locations(self) -> List[str]:
+        return sorted(self.daily.index.get_level_values("Location").unique())
+
+    def update(self, frame: pd.DataFrame) -> "WeatherAggregates":
+        """
+        Fold new records into the aggregates.
+
+        Args:
+            frame (pd.DataFrame): New rows (LIST_DATA_COLUMNS), each counted once.
+
+        Returns:
+            WeatherAggregates: The updated aggregates.
+        """
+        if not len(frame) or "Location" not in frame.columns:
+            return self
+
+        observed = frame["Observed_At"] if "Observed_At" in frame.columns else pd.Series(None, index=frame.index, dtype=object)
+        timestamps = pd.to_datetime(observed, errors="coerce", utc=True)
+        keys = pd.DataFrame({"Location": frame["Location"].astype(str),
+                             "day": timestamps.dt.strftime("%Y-%m-%d").fillna(UNKNOWN_DAY)},
+                            index=frame.index)
+        values = pd.DataFrame({column: pd.to_numeric(frame[column], errors="coerce") if column in frame.columns
+                               else np.nan for column in AGGREGATE_COLUMNS}, index=frame.index)
+
+        grouped = pd.concat([keys, values], axis=1).groupby(["Location", "day"])
+        new = grouped[AGGREGATE_COLUMNS].agg(["count", "sum", "min", "max"])
+        new.columns = pd.MultiIndex.from_tuples(new.columns)
+        new.insert(0, (RECORDS, "count"), grouped.size())
+
+        # *************** Counts and sums add up, minimum and maximum ignore missing sides
+        index = self.daily.index.union(new.index)
+        old, new = self.daily.reindex(index), new.reindex(index)
+        daily = pd.DataFrame(index=index, columns=old.columns, dtype="float64")
+        daily[(RECORDS, "count")] = old[(RECORDS, "count")].fillna(0) + new[(RECORDS, "count")].fillna(0)
+        for column in AGGREGATE_COLUMNS:
+            for stat in ("count", "sum"):
+                daily[(column, stat)] = old[(column, stat)].fillna(0) + new[(column, stat)].fillna(0)
+            daily[(column, "min")] = np.fmin(old[(column, "min")], new[(column, "min")])
+            daily[(column, "max")] = np.fmax(old[(column, "max")], new[(column, "max")])
+
+        # *************** Latest record per location: newest observation, the last inserted when untimed
+        candidates = frame[[column for column in LATEST_COLUMNS if column in frame.columns]].assign(_observed=timestamps)
+        if len(self.latest):
+            candidates = pd.concat([self.latest, candidates])
+        candidates = candidates.sort_values("_observed", kind="stable", na_position="first")
+        latest = candidates.groupby(candidates["Location"].astype(str), sort=False).tail(1)
+        return WeatherAggregates(daily, latest.set_index(latest["Location"].astype(str), drop=False).rename_axis(None))
+
+    def summary(self, column: str, stat: str, locations: List[str] | None = None,
+                day: str | None = None, per_day: bool = False) -> pd.Series:
+        """
+        Combine the daily aggregates into one value per location (or per location and day).
+
+        Args:
+            column (str): One of AGGREGATE_COLUMNS, or RECORDS with "count".
+            stat (str): "mean", "min", "max" or "count".
+            locations (List[str] | None): Only these locations.
+            day (str | None): Only this day ('YYYY-MM-DD').
+            per_day (bool): Keep one value per day.
+
+        Returns:
+            pd.Series: The values, indexed by location (and day).
+        """
+        daily = self.daily
+        if locations is not None:
+            daily = daily[daily.index.get_level_values("Location").isin(locations)]
+        if day is not None:
+            daily = daily[daily.index.get_level_values("day") == day]
+        grouped = daily[column] if per_day else daily[column].groupby(level="Location")
+        if stat == "mean":
+            counts, sums = (grouped["count"], grouped["sum"]) if per_day else (grouped["count"].sum(), grouped["sum"].sum())
+            return (sums / counts.replace(0, np.nan)).round(2)
+        if per_day:
+            return grouped[stat]
+        return getattr(grouped[stat], {"count": "sum", "min": "min", "max": "max"}[stat])()
+
+# ********** Rule-based matcher for common questions
+STAT_WORDS = [("mean", ("average", "mean", "avg")),
+              ("max", ("maximum", "highest", "max", "hottest", "warmest", "strongest")),
+              ("min", ("minimum", "lowest", "min", "coldest", "coolest", "weakest")),
+              ("count", ("how many", "count", "number of")),
+              ("last", ("latest", "most recent", "last", "newest"))]
+# "maximum temperature" is the maximum of the current temperature, the daily low/high columns need their names
+COLUMN_WORDS = [("Temperature_Feels_Like", ("feels like", "feel like", "feels-like")),
+                ("Temperature_Minimum", ("temperature_minimum", "daily low")),
+                ("Temperature_Maximum", ("temperature_maximum", "daily high")),
+                ("Wind_Gusts_m_s", ("gust",)),
+                ("Wind_Speed_m_s", ("wind",)),
+                ("Humidity_Percent", ("humid",)),
+                ("Pressure_hPa", ("pressure",)),
+                ("Cloud_Cover_Percent", ("cloud",)),
+                ("Visibility_km", ("visibility",)),
+                ("Temperature_Current", ("temperature", "temp", "hottest", "warmest", "coldest", "coolest"))]
+# Questions with conditions or other computations go to the generated analysis code
+UNSUPPORTED = re.compile(r"\b(when|where|if|above|below|greater|less|more than|fewer|between|except|without|"
+                         r"over|under|exceed|percent(age)? of|ratio|trend|correlat\w*|median|std|variance|sort|top \d+)\b")
+# Periods other than one 'YYYY-MM-DD' day: the aggregates only cover all history or a single day
+RELATIVE_TIME = re.compile(r"\b(weeks?|weekly|weekend|months?|monthly|years?|yearly|yesterday|today|tonight|ago|since|"
+                           r"recently|past|hours?|morning|afternoon|evening|night|"
+                           r"jan(uary)?|feb(ruary)?|mar(ch)?|apr(il)?|may|june?|july?|aug(ust)?|sep(tember)?|oct(ober)?|"
+                           r"nov(ember)?|dec(ember)?|monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b")
+DATE = re.compile(r"\b(\d{4}-\d{2}-\d{2})\b")
+# "in Tokyo", "for New York": a place the question restricts the answer to
+PLACE_AFTER = re.compile(r"\b(?:in|for|at)\s+([A-Za-z][\w'.-]*(?:\s+[A-Z][\w'.-]*){0,2})")
+NOT_PLACES = {"celsius", "fahrenheit", "kelvin", "total", "general", "memory", "the", "all", "each", "every"}
+
+def _match_words(text: str, table: list) -> str | None:
+    return next((name for name, words in table if any(word in text for word in words)), None)
+
+def _match_locations(text: str, known: List[str]) -> List[str]:
+    # *************** 'Paris, FR' matches "paris" as a whole word
+    return [location for location in known
+            if re.search(rf"\b{re.escape(location.split(',')[0].strip().lower())}\b", text)]
+
+def _named_places(question: str) -> List[Tuple[str, ResolvedLocation | None]]:
+    # *************** Known cities and aliases anywhere ("KL"), and capitalized names after in/for/at
+    resolver = get_location_resolver()
+    places = [(location.name, location) for location in resolver.find_in_text(question)]
+    for phrase in PLACE_AFTER.findall(question):
+        if not phrase[0].isupper() or phrase.lower() in NOT_PLACES:
+            continue
+        location = resolver.resolve(phrase)
+        if not any(location is not None and location == found or name.lower() in phrase.lower() for name, found in places):
+            places.append((phrase, location))
+    return places
+
+def _stored_locations(question: str, known: List[str]) -> tuple:
+    """Stored locations the question names and the named places without stored records"""
+    resolver = get_location_resolver()
+    canonical = {location: resolver.resolve(location) for location in known}
+    selected, missing = [], []
+    for name, resolved in _named_places(question):
+        matches = [location for location, stored in canonical.items()
+                   if (resolved is not None and stored == resolved) or location.split(",")[0].strip().lower() == name.lower()]
+        if matches:
+            selected.extend(location for location in matches if location not in selected)
+        else:
+            missing.append(name)
+    selected.extend(location for location in _match_locations(question.lower(), known) if location not in selected)
+    return selected, missing
+
+def match_aggregate_question(question: str) -> Dict | None:
+    """
+    Recognize a question the aggregates can answer, without looking at the data.
+
+    Args:
+        question (str): The user's question.
+
+    Returns:
+        Dict | None: {"stat", "column", "day", "per_day"}, or None for other questions.
+    """
+    text = question.lower()
+    if UNSUPPORTED.search(text) or RELATIVE_TIME.search(text) or re.search(r"\d", DATE.sub("", text)):
+        return None
+    stat = _match_words(text, STAT_WORDS)
+    column = _match_words(text, COLUMN_WORDS)
+    if stat is None or (column is None and stat not in ("count", "last")):
+        return None
+    date = DATE.search(text)
+    return {"stat": stat,
+            "column": column,
+            "day": date.group(1) if date else None,
+            "per_day": any(word in text for word in ("per day", "each day", "daily", "by day"))}
+
+def answer_from_aggregates(question: str, aggregates: WeatherAggregates) -> str | None:
+    """
+    Answer average/min/max/count/latest questions from the aggregates.
+
+    Args:
+        question (str): The user's question.
+        aggregates (WeatherAggregates): Current aggregates.
+
+    Returns:
+        str | None: The result as text for the analysis response, None when the question needs
+            the generated analysis code.
+    """
+    matched = match_aggregate_question(question)
+    if matched is None or not len(aggregates.daily):
+        return None
+    # *************** A place without stored records must not widen the answer to every location
+    locations, missing = _stored_locations(question, aggregates.locations)
+    if missing:
+        return f"No stored weather records for {', '.join(missing)}."
+    locations = locations or None
+
+    if matched["stat"] == "last":
+        latest = aggregates.latest.drop(columns=["_observed"], errors="ignore")
+        if locations is not None:
+            latest = latest.loc[latest.index.isin(locations)]
+        if matched["column"] is not None:
+            latest = latest[[column for column in ("Location", "Observed_At", matched["column"]) if column in latest.columns]]
+        return f"Latest record per location:\n{latest.to_string(index=False)}"
+
+    column = matched["column"] or (RECORDS if matched["stat"] == "count" else "Temperature_Current")
+    values = aggregates.summary(column, matched["stat"], locations, matched["day"], matched["per_day"])
+    if not values.notna().any():
+        return None
+    if matched["stat"] == "count":
+        values = values.astype(int)
+    label = {"mean": "Average", "max": "Maximum", "min": "Minimum",
+             "count": "Number of records" if column == RECORDS else "Number of records with"}[matched["stat"]]
+    name = "" if column == RECORDS else f" {column}"
+    scope = f" on {matched['day']}" if matched["day"] else (" per day" if matched["per_day"] else "")
+    return f"{label}{name} per location{scope}:\n{values.rename(column).to_string()}"
@@ -0,0 +1,270 @@
+# ********** IMPORT LIBRARIES **********
+from dataclasses    import dataclass
+from typing         import Any, Iterable, List
+import ast
+
+# Static checks on the analysis code generated for the 'read' intent.
+
+FRAME_NAME = "df"
+
+# Methods that return the frame (or a grouping of it) with all its columns, so the columns
+# actually used are decided by what happens to their result. query/eval/filter are left out:
+# they name columns inside expression strings, so their frame needs every column
+ROW_METHODS = {"groupby", "sort_values", "nlargest", "nsmallest", "head", "tail", "reset_index", "copy", "sample"}
+# Methods whose rows depend on every column unless a constant 'subset' of columns is given
+SUBSET_METHODS = {"dropna", "drop_duplicates"}
+SIZE_FUNCTIONS = {"len"}
+
+def _is_column_selector(node: ast.AST, columns: set) -> bool:
+    # *************** 'A' or ['A', 'B'] (also as a tuple inside .loc[rows, cols])
+    if isinstance(node, ast.Constant):
+        return node.value in columns
+    if isinstance(node, (ast.List, ast.Tuple)) and node.elts:
+        return all(isinstance(element, ast.Constant) and element.value in columns for element in node.elts)
+    return False
+
+def _has_subset(call: ast.Call, columns: set) -> bool:
+    # *************** dropna(subset=['A']) / drop_duplicates(subset='A'), with no positional arguments or other axis
+    keywords = {keyword.arg: keyword.value for keyword in call.keywords}
+    return not call.args and "subset" in keywords and _is_column_selector(keywords["subset"], columns) \
+        and set(keywords) <= {"subset", "keep", "how"}
+
+def _narrowed(node: ast.AST, parents: dict, columns: set) -> bool:
+    """True when the frame at 'node' ends up reduced to named columns (or only its size is used)"""
+    while True:
+        parent = parents.get(node)
+        if isinstance(parent, ast.Subscript) and parent.value is node:
+            if _is_column_selector(parent.slice, columns):
+                return True
+            node = parent  # row filter: the frame keeps all its columns
+        elif isinstance(parent, ast.Attribute) and parent.value is node:
+            if parent.attr in columns:
+                return True
+            grand_parent = parents.get(parent)
+            if parent.attr in ("loc", "iloc") and isinstance(grand_parent, ast.Subscript):
+                selector = grand_parent.slice
+                if isinstance(selector, ast.Tuple) and len(selector.elts) == 2 and _is_column_selector(selector.elts[1], columns):
+                    return True
+                node = grand_parent
+            elif parent.attr in ROW_METHODS and isinstance(grand_parent, ast.Call) and grand_parent.func is parent:
+                node = grand_parent
+            elif parent.attr in SUBSET_METHODS and isinstance(grand_parent, ast.Call) and grand_parent.func is parent \
+                    and _has_subset(grand_parent, columns):
+                node = grand_parent
+            else:
+                return False
+        elif isinstance(parent, ast.Call) and node in parent.args and isinstance(parent.func, ast.Name) \
+                and parent.func.id in SIZE_FUNCTIONS:
+            return True
+        else:
+            return False
+
+# *************** Function to find the columns the analysis code reads
+def referenced_columns(code: str, columns: Iterable[str]) -> List[str] | None:
+    """
+    Find the columns of `df` used by generated analysis code, by walking its AST.
+
+    Column names count when they appear as string constants (df['A'], df[['A', 'B']],
+    groupby('A'), df.loc[mask, 'A']) or as attributes (df.A). The projection is only safe
+    when every use of `df` is narrowed to named columns, until `df` is re-assigned from such
+    a narrowed expression; a use of the whole frame before that (print(df), df.describe(),
+    df.columns, df = df[mask]) needs every column.
+
+    Args:
+        code (str): The analysis code.
+        columns (Iterable[str]): Columns of the frame.
+
+    Returns:
+        List[str] | None: The columns to load, in frame order, or None when every column is needed
+            (or the code does not parse).
+    """
+    columns = list(columns)
+    known = set(columns)
+    try:
+        tree = ast.parse(code or "")
+    except SyntaxError:
+        return None
+
+    parents = {child: node for node in ast.walk(tree) for child in ast.iter_child_nodes(node)}
+    used = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Constant) and isinstance(node.value, str) and node.value in known:
+            used.add(node.value)
+        elif isinstance(node, ast.Attribute) and node.attr in known:
+            used.add(node.attr)
+
+    # *************** Statements run in order: once df holds only named columns, any later use is fine
+    for statement in tree.body:
+        for node in ast.walk(statement):
+            if isinstance(node, ast.Name) and node.id == FRAME_NAME and isinstance(node.ctx, ast.Load) \
+                    and not _narrowed(node, parents, known):
+                return None
+        if isinstance(statement, ast.Assign) and any(isinstance(target, ast.Name) and target.id == FRAME_NAME
+                                                     for target in statement.targets):
+            break
+
+    if not used:
+        return None
+    return [column for column in columns if column in used]
+
+# ********** Predicate pushdown
+@dataclass(frozen=True)
+class Predicate:
+    """
+    One row filter of the analysis code that can be applied before the code runs.
+    'op' is "eq", "in", "contains", "gt", "gte", "lt" or "lte".
+    """
+    column: str
+    op: str
+    value: Any
+    case: bool = True
+    regex: bool = True
+
+COMPARE_OPS = {ast.Eq: "eq", ast.Gt: "gt", ast.GtE: "gte", ast.Lt: "lt", ast.LtE: "lte"}
+FLIPPED_OPS = {"eq": "eq", "gt": "lt", "gte": "lte", "lt": "gt", "lte": "gte"}
+
+# Operations that work row by row: a conjunct built only from these gives the same rows
+# whether or not other conjuncts were applied first
+ROW_LOCAL_ATTRS = {"astype", "str", "contains", "startswith", "endswith", "lower", "upper", "strip", "match",
+                   "fullmatch", "len", "between", "isin", "notna", "isna", "notnull", "isnull", "fillna", "eq",
+                   "ne", "lt", "le", "gt", "ge", "abs", "round", "dt", "date", "year", "month", "day", "hour",
+                   "to_datetime", "to_numeric", "Timestamp", "Timedelta", "now", "today", "normalize",
+                   "tz_localize", "tz_convert"}
+
+ROW_LOCAL_FUNCTIONS = {"float", "int", "str", "abs", "round"}
+
+def _column_of(node: ast.AST, columns: set) -> str | None:
+    # *************** df['A'], df.A, optionally followed by .astype(...)
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == "astype":
+        node = node.func.value
+    if isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name) and node.value.id == FRAME_NAME \
+            and isinstance(node.slice, ast.Constant) and node.slice.value in columns:
+        return node.slice.value
+    if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == FRAME_NAME \
+            and node.attr in columns:
+        return node.attr
+    return None
+
+def _constant(node: ast.AST) -> Any:
+    if isinstance(node, ast.Constant) and isinstance(node.value, (str, int, float)) and not isinstance(node.value, bool):
+        return node.value
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub) and isinstance(node.operand, ast.Constant) \
+            and isinstance(node.operand.value, (int, float)):
+        return -node.operand.value
+    return None
+
+def _keywords(call: ast.Call, defaults: dict) -> dict | None:
+    # *************** Values of the known keywords; None when any other keyword (flags=, na=) or a non-constant is passed
+    values = dict(defaults)
+    for keyword in call.keywords:
+        if keyword.arg not in defaults or not isinstance(keyword.value, ast.Constant):
+            return None
+        values[keyword.arg] = keyword.value.value
+    return values
+
+def _simple_predicates(node: ast.AST, columns: set) -> List[Predicate] | None:
+    if isinstance(node, ast.Compare) and len(node.ops) == 1 and type(node.ops[0]) in COMPARE_OPS:
+        op = COMPARE_OPS[type(node.ops[0])]
+        column, value = _column_of(node.left, columns), _constant(node.comparators[0])
+        if column is None:
+            column, value, op = _column_of(node.comparators[0], columns), _constant(node.left), FLIPPED_OPS[op]
+        if column is not None and value is not None:
+            return [Predicate(column, op, value)]
+        return None
+
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+        method, target = node.func.attr, node.func.value
+        if method == "contains" and isinstance(target, ast.Attribute) and target.attr == "str":
+            column = _column_of(target.value, columns)
+            pattern = _constant(node.args[0]) if len(node.args) == 1 else None
+            options = _keywords(node, {"case": True, "regex": True})
+            if column is not None and isinstance(pattern, str) and options is not None:
+                return [Predicate(column, "contains", pattern, case=bool(options["case"]), regex=bool(options["regex"]))]
+            return None
+        column = _column_of(target, columns)
+        if column is None:
+            return None
+        if method == "isin" and len(node.args) == 1 and not node.keywords \
+                and isinstance(node.args[0], (ast.List, ast.Tuple, ast.Set)):
+            values = [_constant(element) for element in node.args[0].elts]
+            if values and all(value is not None for value in values):
+                return [Predicate(column, "in", tuple(values))]
+        if method == "between" and len(node.args) == 2 and _keywords(node, {"inclusive": "both"}) == {"inclusive": "both"}:
+            low, high = _constant(node.args[0]), _constant(node.args[1])
+            if low is not None and high is not None:
+                return [Predicate(column, "gte", low), Predicate(column, "lte", high)]
+    return None
+
+def _row_local(node: ast.AST, columns: set) -> bool:
+    for child in ast.walk(node):
+        if isinstance(child, ast.Attribute) and child.attr not in ROW_LOCAL_ATTRS and child.attr not in columns:
+            return False
+        if isinstance(child, ast.Call) and isinstance(child.func, ast.Name) and child.func.id not in ROW_LOCAL_FUNCTIONS:
+            return False
+        if isinstance(child, ast.Name) and child.id == FRAME_NAME:
+            parent = next((node for node in ast.walk(node) if child in ast.iter_child_nodes(node)), None)
+            if not (isinstance(parent, ast.Subscript) and isinstance(parent.slice, ast.Constant)
+                    or isinstance(parent, ast.Attribute) and parent.attr in columns):
+                return False
+    return True
+
+def _first_filter_mask(tree: ast.Module) -> ast.AST | None:
+    # *************** The first statement touching df must be `df = df[mask]` (optionally narrowed to columns)
+    for statement in tree.body:
+        if not any(isinstance(node, ast.Name) and node.id == FRAME_NAME for node in ast.walk(statement)):
+            continue
+        if not (isinstance(statement, ast.Assign) and len(statement.targets) == 1
+                and isinstance(statement.targets[0], ast.Name) and statement.targets[0].id == FRAME_NAME):
+            return None
+        value = statement.value
+        if isinstance(value, ast.Subscript) and isinstance(value.value, ast.Subscript):
+            value = value.value
+        if not isinstance(value, ast.Subscript):
+            return None
+        if isinstance(value.value, ast.Name) and value.value.id == FRAME_NAME:
+            return value.slice
+        if isinstance(value.value, ast.Attribute) and value.value.attr == "loc" \
+                and isinstance(value.value.value, ast.Name) and value.value.value.id == FRAME_NAME:
+            return value.slice.elts[0] if isinstance(value.slice, ast.Tuple) and value.slice.elts else value.slice
+        return None
+    return None
+
+def _conjuncts(node: ast.AST) -> List[ast.AST]:
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitAnd):
+        return _conjuncts(node.left) + _conjuncts(node.right)
+    return [node]
+
+# *************** Function to find the row filters that can run before the analysis code
+def extract_predicates(code: str, columns: Iterable[str]) -> List[Predicate]:
+    """
+    Find the simple row filters of the first `df = df[mask]` statement of generated code:
+    equality, isin, str.contains and numeric or ISO-time ranges on one column, combined with &.
+
+    Filtering the rows with these predicates first does not change the result, because the
+    code still runs its own filter afterwards. Nothing is returned when df is used before that
+    statement or when another part of the mask depends on other rows (e.g. df['A'].max()).
+
+    Args:
+        code (str): The analysis code.
+        columns (Iterable[str]): Columns of the frame.
+
+    Returns:
+        List[Predicate]: The predicates, empty when nothing can be pushed down.
+    """
+    known = set(columns)
+    try:
+        tree = ast.parse(code or "")
+    except SyntaxError:
+        return []
+    mask = _first_filter_mask(tree)
+    if mask is None:
+        return []
+
+    predicates = []
+    for conjunct in _conjuncts(mask):
+        simple = _simple_predicates(conjunct, known)
+        if simple is not None:
+            predicates.extend(simple)
+        elif not _row_local(conjunct, known):
+            return []
+    return predicates
@@ -0,0 +1,101 @@
+# ********** IMPORT FRAMEWORK **********
+from setup      import LOGGER
+
+# ********** IMPORT LIBRARIES **********
+from typing     import List
+import atexit
+import glob
+import os
+import shutil
+import threading
+import pandas   as pd
+
+try:
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:  # without pyarrow older rows are read back from the collection instead
+    PARQUET_AVAILABLE = False
+
+class ColdWeatherStore:
+    """
+    Weather rows evicted from the in-memory window of WeatherDataManager, kept as Parquet part
+    files (one per eviction) in a directory owned by this process. The directory is a cache of
+    the collection: it is emptied on start and removed at exit.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.rows = 0
+        self._parts = 0
+        self._lock = threading.Lock()
+        self.clear()
+        atexit.register(shutil.rmtree, self.directory, True)
+
+    @property
+    def available(self) -> bool:
+        return PARQUET_AVAILABLE
+
+    def clear(self) -> None:
+        """Delete every part file"""
+        with self._lock:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            os.makedirs(self.directory, exist_ok=True)
+            self.rows, self._parts = 0, 0
+
+    def append(self, frame: pd.DataFrame) -> None:
+        """
+        Write evicted rows as a new part file.
+
+        Args:
+            frame (pd.DataFrame): Rows indexed by their content key.
+        """
+        if not self.available or not len(frame):
+            return
+        # *************** Mixed str/number columns (LLM-extracted records) are stored as text
+        frame = frame.copy()
+        for column in frame.columns[frame.dtypes == object]:
+            frame[column] = frame[column].map(lambda value: value if value is None or isinstance(value, str) else str(value))
+        with self._lock:
+            path = os.path.join(self.directory, f"part-{self._parts:06d}.parquet")
+            frame.to_parquet(path)
+            self._parts += 1
+            self.rows += len(frame)
+
+    def load(self, since: pd.Timestamp | None = None, columns: List[str] | None = None) -> pd.DataFrame:
+        """
+        Read the evicted rows back.
+
+        Args:
+            since (pd.Timestamp | None): Only rows observed at or after this UTC time; rows
+                without an observation time are left out. None reads everything.
+            columns (List[str] | None): Only read these columns, None reads all of them.
+
+        Returns:
+            pd.DataFrame: The rows, indexed by their content key.
+        """
+        with self._lock:
+            paths = sorted(glob.glob(os.path.join(self.directory, "part-*.parquet")))
+        read_columns = None
+        if columns is not None:
+            read_columns = list(columns) + (["Observed_At"] if since is not None and "Observed_At" not in columns else [])
+        frames = []
+        for path in paths:
+            if read_columns is not None:
+                # *************** Columns missing from a part (e.g. all-empty when it was written) are skipped
+                available = set(pq.read_schema(path).names)
+                frame = pd.read_parquet(path, columns=[column for column in read_columns if column in available])
+            else:
+                frame = pd.read_parquet(path)
+            if since is not None:
+                if "Observed_At" not in frame.columns:
+                    continue
+                frame = frame[pd.to_datetime(frame["Observed_At"], errors="coerce", utc=True) >= since]
+                if columns is not None and "Observed_At" not in columns:
+                    frame = frame.drop(columns=["Observed_At"])
+            if len(frame):
+                frames.append(frame)
+        if not frames:
+            return pd.DataFrame()
+        df = pd.concat(frames)
+        LOGGER.info(f"Loaded {len(df)} older weather records from the cold store.")
+        return df[~df.index.duplicated(keep="last")]
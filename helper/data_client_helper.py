@@ -1,86 +1,825 @@
 # ********** IMPORT FRAMEWORK **********
 from setup      import (SetupApi, 
+                        SetupConfig,
                         LOGGER, 
                       )
 
-from astrapy    import DataAPIClient
-from typing     import List
+from collections import OrderedDict
+from typing     import Any, Dict, List
+from types      import SimpleNamespace
+import hashlib
+import json
+import operator
+import os
+import re
+import threading
+import time
+import uuid
 import pandas   as pd 
+import numpy    as np
+
+from helper.write_queue_helper import WeatherWriteQueue, register_shutdown
+from helper.cold_store_helper import ColdWeatherStore
+from helper.analysis_code_helper import Predicate
+from helper.aggregate_helper import WeatherAggregates, LATEST_COLUMNS
+
+# *************** Function to derive the deterministic '_id' of a weather record
+def record_key(record: Dict) -> str:
+    """
+    Content key of a weather record: location, observation time and a hash of the values.
+    The same observation saved twice gets the same key, whichever path produced it.
+
+    Args:
+        record (Dict): A LIST_DATA_COLUMNS document, with or without '_id'.
+
+    Returns:
+        str: Key such as 'paris-fr|2025-01-05T10:00:00Z|3f1c9a0b5d2e4f68'.
+    """
+    values = {}
+    for field, value in record.items():
+        if field == "_id" or value is None:
+            continue
+        if isinstance(value, float):
+            value = round(value, 6)
+        elif isinstance(value, str):
+            value = value.strip()
+        values[field] = value
+    digest = hashlib.sha1(json.dumps(values, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+    location = re.sub(r"[^a-z0-9]+", "-", str(record.get("Location") or "").lower()).strip("-") or "unknown"
+    return f"{location}|{record.get('Observed_At') or 'na'}|{digest}"
+
+# ********** Local stand-in for an AstraDB collection (tests / offline runs)
+class InMemoryCollection:
+    """
+    Minimal in-memory replacement for an AstraDB collection. It implements the subset of the
+    collection API used by this project (insert_many, find, find_one, delete_many, distinct) so
+    data paths can run without network access.
+    """
+
+    def __init__(self, name: str = "in_memory"):
+        self.name = name
+        self._documents = {}
+        self._lock = threading.Lock()
+
+    def insert_many(self, documents: List[dict], **kwargs) -> SimpleNamespace:
+        """Insert documents, generating an '_id' when missing and skipping '_id's already stored"""
+        inserted_ids = []
+        with self._lock:
+            for document in documents:
+                document = dict(document)
+                document.setdefault("_id", str(uuid.uuid4()))
+                if document["_id"] in self._documents:
+                    continue
+                self._documents[document["_id"]] = document
+                inserted_ids.append(document["_id"])
+        return SimpleNamespace(inserted_ids=inserted_ids)
+
+    def find(self, filter: dict = None, projection: dict = None, **kwargs) -> List[dict]:
+        """Return copies of the documents matching the filter"""
+        with self._lock:
+            documents = list(self._documents.values())
+        return [self._project(document, projection) for document in documents if self._match(document, filter or {})]
+
+    def find_one(self, filter: dict = None, projection: dict = None, **kwargs) -> dict | None:
+        """Return the first document matching the filter, or None"""
+        documents = self.find(filter, projection)
+        return documents[0] if documents else None
+
+    def distinct(self, key: str, filter: dict = None, **kwargs) -> List:
+        """Return the distinct non-null values of one field"""
+        values = {document.get(key) for document in self.find(filter)}
+        values.discard(None)
+        return list(values)
+
+    def delete_many(self, filter: dict, **kwargs) -> SimpleNamespace:
+        """Delete the documents matching the filter"""
+        with self._lock:
+            matched = [key for key, document in self._documents.items() if self._match(document, filter or {})]
+            for key in matched:
+                del self._documents[key]
+        return SimpleNamespace(deleted_count=len(matched))
+
+    # *************** Range operators follow the Data API: values of another type never match
+    _RANGE_OPERATORS = {"$eq": lambda a, b: a == b, "$gt": lambda a, b: a > b, "$gte": lambda a, b: a >= b,
+                        "$lt": lambda a, b: a < b, "$lte": lambda a, b: a <= b}
+
+    @classmethod
+    def _match(cls, document: dict, filter: dict) -> bool:
+        for field, condition in filter.items():
+            if field == "$and":
+                if not all(cls._match(document, part) for part in condition):
+                    return False
+            elif isinstance(condition, dict):
+                value = document.get(field)
+                for operator, target in condition.items():
+                    if operator == "$in":
+                        if value not in target:
+                            return False
+                    elif operator in cls._RANGE_OPERATORS:
+                        comparable = isinstance(value, str) == isinstance(target, str) and value is not None
+                        if not comparable or not cls._RANGE_OPERATORS[operator](value, target):
+                            return False
+            elif document.get(field) != condition:
+                return False
+        return True
+
+    @staticmethod
+    def _project(document: dict, projection: dict | None) -> dict:
+        if not projection:
+            return dict(document)
+        return {key: value for key, value in document.items() if projection.get(key) or key == "_id"}
+
+# ********** Process-wide AstraDB client / collection provider
+class AstraCollectionProvider:
+    """
+    Thread-safe, process-wide owner of the AstraDB client, database and collection handles.
+
+    The client is built once and reused by every data path, so the underlying HTTP connection
+    pool (and its keep-alive connections) is shared instead of being rebuilt per call.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super(AstraCollectionProvider, cls).__new__(cls)
+                    instance._lock = threading.Lock()
+                    instance._collection = None
+                    instance._last_health_check = 0.0
+                    cls._instance = instance
+        return cls._instance
+
+    def get_collection(self):
+        """Return the shared collection handle, building it on first use"""
+        collection = self._collection
+        if collection is not None:
+            return collection
+
+        with self._lock:
+            if self._collection is None:
+                self._collection = self._build_collection()
+            return self._collection
+
+    def use_collection(self, collection) -> None:
+        """Replace the shared handle (e.g. with an InMemoryCollection in tests)"""
+        with self._lock:
+            self._collection = collection
+            self._last_health_check = 0.0
+
+    def reset(self) -> None:
+        """Drop the shared handle so the next call builds a fresh client"""
+        self.use_collection(None)
+
+    def health_check(self, force: bool = False) -> bool:
+        """
+        Check that the collection answers a cheap query. Results are cached for
+        ASTRADB_HEALTH_CHECK_INTERVAL_S seconds; a failed check resets the client.
+
+        Args:
+            force (bool): Ignore the cached result and query the collection.
+
+        Returns:
+            bool: True if the collection is reachable.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_health_check < SetupConfig.ASTRADB_HEALTH_CHECK_INTERVAL_S:
+            return True
+
+        try:
+            self.get_collection().find_one({}, projection={"_id": True}, max_time_ms=SetupConfig.ASTRADB_TIMEOUT_MS)
+            self._last_health_check = now
+            return True
+        except Exception as e:
+            LOGGER.error(f"AstraDB health check failed: {str(e)}")
+            self.reset()
+            return False
+
+    def _build_collection(self):
+        if SetupConfig.ASTRADB_BACKEND == "memory":
+            LOGGER.info("Using in-memory collection stand-in.")
+            return InMemoryCollection(SetupApi.ASTRADB_COLLECTION_NAME)
+
+        # *************** astrapy is only needed for the 'astra' backend
+        from astrapy import DataAPIClient
+        client = DataAPIClient(SetupApi.ASTRADB_TOKEN_KEY)
+        database = client.get_database(SetupApi.ASTRADB_API_ENDPOINT)
+        collection = database.get_collection(SetupApi.ASTRADB_COLLECTION_NAME,
+                                             collection_max_time_ms=SetupConfig.ASTRADB_TIMEOUT_MS)
+        LOGGER.info("AstraDB client initialized.")
+        return collection
 
 def connection_col():
-    client = DataAPIClient(SetupApi.ASTRADB_TOKEN_KEY)
-    database = client.get_database(SetupApi.ASTRADB_API_ENDPOINT)
-    collection = database.get_collection(SetupApi.ASTRADB_COLLECTION_NAME)
-    return collection 
-
-def create_data(data):
-    client = DataAPIClient(SetupApi.ASTRADB_TOKEN_KEY)
-    database = client.get_database(SetupApi.ASTRADB_API_ENDPOINT)
-    collection = database.get_collection(SetupApi.ASTRADB_COLLECTION_NAME)
-    
-    data = data.get("extracted_data")
-    result = collection.insert_many(data)
-    inserted_count = len(result.inserted_ids)  
-    inserted_count = (f"Inserted {inserted_count} documents successfully.")
+    return AstraCollectionProvider().get_collection()
+
+_WRITE_QUEUE = None
+_WRITE_QUEUE_LOCK = threading.Lock()
+
+def _on_records_written(records: List[dict]) -> None:
+    """Keep an existing WeatherDataManager and the pushdown caches in sync with durable writes"""
+    _invalidate_pushdown(records)
+    if _AGGREGATE_STORE is not None:
+        _AGGREGATE_STORE.add(records)
+    # *************** Also during its initial load: rows the load returns as well are skipped by key
+    manager = WeatherDataManager._instance
+    if manager is not None:
+        manager.update_with_new_data(records)
+
+def get_write_queue() -> WeatherWriteQueue:
+    """Return the process-wide write-behind queue, starting it on first use"""
+    global _WRITE_QUEUE
+    if _WRITE_QUEUE is None:
+        with _WRITE_QUEUE_LOCK:
+            if _WRITE_QUEUE is None:
+                _WRITE_QUEUE = WeatherWriteQueue(get_collection=connection_col,
+                                                 on_written=_on_records_written,
+                                                 batch_size=SetupConfig.WRITE_BATCH_SIZE,
+                                                 flush_interval_s=SetupConfig.WRITE_FLUSH_INTERVAL_S,
+                                                 max_pending=SetupConfig.WRITE_MAX_PENDING,
+                                                 chunk_size=SetupConfig.WRITE_CHUNK_SIZE,
+                                                 concurrency=SetupConfig.WRITE_CONCURRENCY,
+                                                 max_retries=SetupConfig.WRITE_MAX_RETRIES,
+                                                 retry_backoff_s=SetupConfig.WRITE_RETRY_BACKOFF_S,
+                                                 timeout_ms=SetupConfig.ASTRADB_TIMEOUT_MS)
+                register_shutdown(_WRITE_QUEUE)
+    return _WRITE_QUEUE
+
+def create_data(data, wait: bool = False):
+    """
+    Queue the extracted records for insertion through the write-behind queue.
+
+    Args:
+        data (dict): Extraction result holding the records under 'extracted_data'.
+        wait (bool): Block until the records are durable instead of returning once queued.
+
+    Returns:
+        str: Message describing how many records were accepted.
+    """
+    # *************** Key every record by its content, repeated records within the request are dropped
+    records = {}
+    for record in data.get("extracted_data") or []:
+        record = {**record, "_id": record_key(record)}
+        records[record["_id"]] = record
+    data = list(records.values())
+    ticket = get_write_queue().submit(data, timeout=SetupConfig.ASTRADB_TIMEOUT_MS / 1000)
+    if wait:
+        inserted_count = ticket.wait()
+        return (f"Inserted {inserted_count} documents successfully.")
+
+    inserted_count = (f"Accepted {ticket.size} documents for saving.")
     return inserted_count
-    
+
+# *************** Function to remove the duplicates stored before records were keyed by content
+def compact_duplicates(dry_run: bool = False, delete_chunk_size: int = 50) -> Dict[str, int]:
+    """
+    Re-key the stored records by content and delete the duplicates, keeping one per key.
+    Safe to run again: keyed copies are inserted before the old documents are deleted.
+
+    Args:
+        dry_run (bool): Only count what would change.
+        delete_chunk_size (int): '_id's per delete_many call.
+
+    Returns:
+        Dict[str, int]: {"scanned", "distinct", "rekeyed", "deleted"} counts.
+    """
+    collection = connection_col()
+    groups = {}
+    for document in collection.find({}):
+        groups.setdefault(record_key(document), []).append(document)
+
+    rekeyed, stale_ids = [], []
+    for key, documents in groups.items():
+        if not any(document["_id"] == key for document in documents):
+            rekeyed.append({**documents[-1], "_id": key})
+        stale_ids.extend(document["_id"] for document in documents if document["_id"] != key)
+
+    stats = {"scanned": sum(len(documents) for documents in groups.values()),
+             "distinct": len(groups),
+             "rekeyed": len(rekeyed),
+             "deleted": len(stale_ids)}
+    if dry_run:
+        return stats
+
+    for start in range(0, len(rekeyed), SetupConfig.WRITE_CHUNK_SIZE):
+        collection.insert_many(rekeyed[start:start + SetupConfig.WRITE_CHUNK_SIZE])
+    for start in range(0, len(stale_ids), delete_chunk_size):
+        collection.delete_many({"_id": {"$in": stale_ids[start:start + delete_chunk_size]}})
+    LOGGER.info(f"Compacted weather data: {stats}")
+    return stats
+
+# ********** Immutable view of the weather data
+class WeatherSnapshot:
+    """
+    One published version of the weather data: the last materialized frame ('head') and the
+    segments written after it ('tail', one DataFrame per write). The combined frame is built
+    on first read and cached, from the head and the new tail only, so a write never copies
+    the existing rows. Snapshots are never modified once published.
+
+    'keys' is the manager's append-only key set, shared by the snapshots between two
+    evictions; it may already hold keys published after this snapshot, 'rows' is its own size.
+    """
+
+    def __init__(self, version: int, head: pd.DataFrame | None, tail: tuple, keys: set, rows: int):
+        self.version = version
+        self.head = head
+        self.tail = tail
+        self.keys = keys
+        self.rows = rows
+        self._frame = head if not tail else None
+
+    def __len__(self) -> int:
+        return self.rows
+
+    @property
+    def materialized(self) -> pd.DataFrame | None:
+        """The combined frame when a reader already built it"""
+        return self._frame
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """All rows as one frame, indexed by the content key"""
+        if self._frame is None:
+            parts = ([self.head] if self.head is not None else []) + list(self.tail)
+            self._frame = parts[0] if len(parts) == 1 else pd.concat(parts)
+        return self._frame if self._frame is not None else pd.DataFrame()
+
+# *************** Function to find the oldest observation time an analysis refers to
+_DATE_LITERAL = re.compile(r"['\"](\d{4}-\d{2}(?:-\d{2})?)")
+_RELATIVE_PERIOD = re.compile(r"(?:Timedelta|DateOffset)\(\s*(days|weeks|months|years)\s*=\s*(\d+)")
+_PERIOD_DAYS = {"days": 1, "weeks": 7, "months": 31, "years": 366}
+# Counts, totals and extremes are wrong over part of the data, so without a period they read all of it
+_AGGREGATE_CALL = re.compile(r"\.(count|size|sum|mean|median|max|min|nunique|value_counts|describe|idxmax|idxmin"
+                             r"|agg|aggregate|std|var|quantile|groupby|shape|nlargest|nsmallest)\b|\blen\(")
+ALL_HISTORY = pd.Timestamp("1970-01-01", tz="UTC")
+
+def history_since(code: str) -> pd.Timestamp | None:
+    """
+    Oldest time generated analysis code needs, from date literals such as '2024-12-01' and
+    relative periods such as pd.Timedelta(days=90). Aggregating code that names no period
+    needs ALL_HISTORY.
+
+    Args:
+        code (str): The analysis code.
+
+    Returns:
+        pd.Timestamp | None: UTC timestamp, or None when the code names no period and only
+            lists rows, which the hot window answers.
+    """
+    candidates = [pd.Timestamp(match, tz="UTC") for match in _DATE_LITERAL.findall(code or "")]
+    now = pd.Timestamp.now(tz="UTC")
+    candidates.extend(now - pd.Timedelta(days=int(amount) * _PERIOD_DAYS[unit])
+                      for unit, amount in _RELATIVE_PERIOD.findall(code or ""))
+    if candidates:
+        return min(candidates)
+    return ALL_HISTORY if _AGGREGATE_CALL.search(code or "") else None
+
+def hot_window_start() -> pd.Timestamp | None:
+    """
+    Oldest observation time the in-memory rows are complete from: the start of the hot
+    window, or the newest row the row cap moved out of memory when that is later. None when
+    every age is kept.
+    """
+    start = WeatherDataManager._hot_start()
+    manager = WeatherDataManager._instance
+    cold_until = manager._cold_until if manager is not None else None
+    if cold_until is not None and (start is None or cold_until > start):
+        return cold_until
+    return start
+
 class WeatherDataManager:
+    """
+    Process-wide, thread-safe owner of the weather data used by the 'read' intent.
+
+    Initialization loads the collection exactly once, even when several sessions ask for the
+    manager at the same time. Readers take the current WeatherSnapshot without locking;
+    writers append a segment and publish a new snapshot under the write lock, checking its
+    rows against a shared key set in O(segment). A new snapshot starts from the last frame
+    a reader materialized; the tail is merged once it holds more than
+    SetupConfig.DATA_MAX_SEGMENTS segments.
+
+    Only a hot window stays in memory: rows observed in the last SetupConfig.DATA_HOT_DAYS
+    days, at most SetupConfig.DATA_HOT_MAX_ROWS of them. Going over the cap trims the window
+    down to SetupConfig.DATA_HOT_LOW_WATER of it, so evictions stay rare between intervals. Older rows move to a local Parquet
+    cold store (or stay in the collection only, without pyarrow) and are read back when an
+    analysis asks for an older period.
+    """
     _instance = None
+    _instance_lock = threading.Lock()
     
     def __new__(cls):
         if cls._instance is None:
-            cls._instance = super(WeatherDataManager, cls).__new__(cls)
-            cls._instance._initialized = False
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super(WeatherDataManager, cls).__new__(cls)
+                    instance._initialized = False
+                    instance._init_lock = threading.Lock()
+                    instance._write_lock = threading.Lock()
+                    instance._keys = set()
+                    instance._snapshot = WeatherSnapshot(0, None, (), instance._keys, 0)
+                    instance._cold_store = ColdWeatherStore(os.path.join(SetupConfig.DATA_COLD_DIR, str(os.getpid())))
+                    instance._evicted = 0
+                    instance._cold_until = None
+                    instance._last_eviction = 0.0
+                    cls._instance = instance
         return cls._instance
     
     def __init__(self):
         if self._initialized:
             return
-            
-        self._initialized = True
-        self.df = self._initial_load()
+        with self._init_lock:
+            if self._initialized:
+                return
+            self._initial_load()
+            self._initialized = True
     
-    def _initial_load(self) -> pd.DataFrame:
-        """Initial load of weather data from AstraDB"""
+    def _initial_load(self) -> None:
+        """Initial load of weather data from AstraDB, in batches so only the hot window is ever resident"""
         try:
             coll = self._get_collection()
-            cursor = coll.find({})
-            data = list(cursor)
+            batch, loaded = [], 0
+            for document in coll.find({}):
+                batch.append(document)
+                if len(batch) >= SetupConfig.DATA_LOAD_BATCH_SIZE:
+                    loaded += self._load_batch(batch)
+                    batch = []
+            loaded += self._load_batch(batch)
+            with self._write_lock:
+                if not self._snapshot.version:
+                    self._publish(pd.DataFrame())
+                self._evict(force=True)
             
-            if not data:
+            if not loaded:
                 LOGGER.info("No weather data found.")
-                return pd.DataFrame()
-            
-            df = pd.DataFrame(data)
-            df = df.drop(columns=['_id'], errors='ignore')
-            
-            LOGGER.info(f"Initially loaded {len(df)} weather records into DataFrame.")
-            return df
+                return
+            LOGGER.info(f"Initially loaded {loaded} weather records, {len(self._snapshot)} kept in memory.")
             
         except Exception as e:
             LOGGER.error(f"Error in initial data load: {str(e)}")
-            return pd.DataFrame()
+            with self._write_lock:
+                if not self._snapshot.version:
+                    self._publish(pd.DataFrame())
+    
+    def _load_batch(self, documents: list[dict]) -> int:
+        if not documents:
+            return 0
+        segment = self._keyed_frame(documents)
+        with self._write_lock:
+            self._publish(segment)
+            self._evict()
+        return len(segment)
+    
+    @staticmethod
+    def _keyed_frame(records: list[dict], stored_ids: bool = False) -> pd.DataFrame:
+        """Frame indexed by the content key, one row per distinct record"""
+        df = pd.DataFrame(records)
+        # *************** Projected documents lack the values the key is computed from, their '_id' is the key
+        keys = [record["_id"] for record in records] if stored_ids else [record_key(record) for record in records]
+        df.index = pd.Index(keys, name="_id")
+        df = df.drop(columns=['_id'], errors='ignore')
+        return df[~df.index.duplicated(keep="last")]
     
     def _get_collection(self):
         """Get AstraDB collection"""
-        client = DataAPIClient(SetupApi.ASTRADB_TOKEN_KEY)
-        database = client.get_database(SetupApi.ASTRADB_API_ENDPOINT)
-        return database.get_collection(SetupApi.ASTRADB_COLLECTION_NAME)
+        return connection_col()
+    
+    def _publish(self, segment: pd.DataFrame) -> None:
+        # *************** Caller holds the write lock; rows already in the snapshot are skipped
+        current = self._snapshot
+        if len(segment) and self._keys:
+            segment = segment[np.fromiter((key not in self._keys for key in segment.index), bool, len(segment))]
+        if not len(segment) and current.version:
+            return
+        
+        # *************** Start from the frame a reader already built, or keep extending the tail
+        head, tail = (current.materialized, ()) if current.materialized is not None else (current.head, current.tail)
+        tail = tail + ((segment,) if len(segment) else ())
+        if len(tail) > SetupConfig.DATA_MAX_SEGMENTS:
+            head, tail = current.frame, tail[-1:]
+        self._keys.update(segment.index)
+        self._snapshot = WeatherSnapshot(current.version + 1, head, tail, self._keys, current.rows + len(segment))
+    
+    @staticmethod
+    def _hot_start() -> pd.Timestamp | None:
+        if SetupConfig.DATA_HOT_DAYS <= 0:
+            return None
+        return pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=SetupConfig.DATA_HOT_DAYS)
+    
+    def _evict(self, force: bool = False) -> None:
+        # *************** Caller holds the write lock; moves rows outside the hot window to the cold store
+        current = self._snapshot
+        now = time.monotonic()
+        over_rows = SetupConfig.DATA_HOT_MAX_ROWS > 0 and len(current) > SetupConfig.DATA_HOT_MAX_ROWS
+        if not (force or over_rows or now - self._last_eviction >= SetupConfig.DATA_EVICT_INTERVAL_S):
+            return
+        self._last_eviction = now
+        
+        frame = current.frame
+        if frame.empty:
+            return
+        if "Observed_At" in frame.columns:
+            observed = pd.to_datetime(frame["Observed_At"], errors="coerce", utc=True)
+        else:
+            observed = pd.Series(pd.NaT, index=frame.index, dtype="datetime64[ns, UTC]")
+        
+        # *************** Rows without an observation time never age out, but count as the oldest
+        hot_start = self._hot_start()
+        hot = ~(observed < hot_start).to_numpy() if hot_start is not None else pd.Series(True, index=frame.index).to_numpy()
+        if SetupConfig.DATA_HOT_MAX_ROWS > 0 and hot.sum() > SetupConfig.DATA_HOT_MAX_ROWS:
+            low_water = max(1, int(SetupConfig.DATA_HOT_MAX_ROWS * min(1.0, SetupConfig.DATA_HOT_LOW_WATER)))
+            ranks = observed[hot].rank(method="first", ascending=False, na_option="bottom")
+            hot = frame.index.isin(ranks.index[ranks <= low_water])
+        if hot.all():
+            return
+        
+        cold = frame[~hot]
+        self._cold_store.append(cold)
+        self._evicted += len(cold)
+        # *************** Newest row moved out, by age or by the row cap; reads reaching it need the cold store
+        newest = observed[~hot].max()
+        if not pd.isna(newest) and (self._cold_until is None or newest > self._cold_until):
+            self._cold_until = newest
+        # *************** Older snapshots keep the previous key set, the hot rows start a new one
+        self._keys = set(frame.index[hot])
+        self._snapshot = WeatherSnapshot(current.version + 1, frame[hot], (), self._keys, len(self._keys))
+        LOGGER.info(f"Moved {len(cold)} weather records out of memory, {int(hot.sum())} kept.")
+    
+    def _load_history(self, since: pd.Timestamp, columns: list[str] | None = None) -> pd.DataFrame:
+        """Rows observed since 'since' (every row for ALL_HISTORY) that are no longer in memory, only 'columns' when given"""
+        if self._cold_store.available:
+            return self._cold_store.load(since if since > ALL_HISTORY else None, columns)
+        
+        projection = None
+        if columns is not None:
+            projection = {column: True for column in [*columns, "Observed_At"]}
+        documents = list(self._get_collection().find({}, projection=projection))
+        if not documents:
+            return pd.DataFrame()
+        df = self._keyed_frame(documents, stored_ids=projection is not None)
+        if since > ALL_HISTORY:
+            if "Observed_At" not in df.columns:
+                return pd.DataFrame()
+            df = df[pd.to_datetime(df["Observed_At"], errors="coerce", utc=True) >= since]
+        return df[[column for column in columns if column in df.columns]] if columns is not None else df
+    
+    def snapshot(self) -> WeatherSnapshot:
+        """Return the current immutable snapshot"""
+        return self._snapshot
     
-    def get_dataframe(self) -> pd.DataFrame:
-        """Get the current DataFrame"""
-        return self.df, self.df.head()
+    @property
+    def df(self) -> pd.DataFrame:
+        return self._snapshot.frame
+    
+    def get_dataframe(self, since: pd.Timestamp | None = None, columns: list[str] | None = None) -> pd.DataFrame:
+        """
+        Get the current DataFrame.
+        
+        Args:
+            since (pd.Timestamp | None): Oldest observation time the caller needs. Rows moved
+                out of memory are read back from the cold store when it is at or before the
+                newest of them (see hot_window_start).
+            columns (list[str] | None): Only these columns (the projection of the analysis code),
+                None returns every column.
+        
+        Returns:
+            tuple: The frame and its head.
+        """
+        snapshot = self._snapshot
+        df = snapshot.frame
+        if columns is not None:
+            df = df.reindex(columns=columns)
+        cold_until = self._cold_until
+        if since is not None and self._evicted and (since <= ALL_HISTORY or (cold_until is not None and since <= cold_until)):
+            history = self._load_history(since, columns)
+            if len(history):
+                history = history[np.fromiter((key not in snapshot.keys for key in history.index), bool, len(history))]
+                df = pd.concat([history, df]) if len(df) else history
+        return df, df.head()
     
     def update_with_new_data(self, new_data: list[dict]) -> None:
-        """Update DataFrame with new records"""
+        """Append new records as a segment and publish a new snapshot"""
         try:
-            new_df = pd.DataFrame(new_data)
-            if self.df.empty:
-                self.df = new_df
-            else:
-                self.df = pd.concat([self.df, new_df], ignore_index=True)
+            new_df = self._keyed_frame(new_data)
+            with self._write_lock:
+                self._publish(new_df)
+                self._evict()
+                snapshot = self._snapshot
             
-            LOGGER.info(f"Added {len(new_df)} new records. Total records: {len(self.df)}")
+            LOGGER.info(f"Added {len(new_df)} new records. Total records: {len(snapshot)} (version {snapshot.version})")
             
         except Exception as e:
-            LOGGER.error(f"Error updating DataFrame: {str(e)}")
\ No newline at end of file
+            LOGGER.error(f"Error updating DataFrame: {str(e)}")
+
+# ********** Aggregates of the whole collection
+class WeatherAggregateStore:
+    """
+    Per-location / per-day aggregates (see WeatherAggregates) over every stored record, built
+    from one projected scan of the collection in batches and kept current by the write-behind
+    queue. It never loads WeatherDataManager, so answering from the aggregates leaves the
+    predicate pushdown of the 'read' intent in use.
+
+    Records are counted once by their '_id', also when a write lands while the scan runs.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = threading.Event()
+        self._keys = set()
+        self._aggregates = WeatherAggregates()
+
+    def load(self) -> None:
+        """Fold in every stored record"""
+        projection = {column: True for column in LATEST_COLUMNS}
+        batch, loaded = [], 0
+        try:
+            for document in connection_col().find({}, projection=projection):
+                batch.append(document)
+                if len(batch) >= SetupConfig.DATA_LOAD_BATCH_SIZE:
+                    loaded += self.add(batch)
+                    batch = []
+            loaded += self.add(batch)
+            LOGGER.info(f"Aggregated {loaded} weather records.")
+        except Exception as e:
+            LOGGER.error(f"Error aggregating weather data: {str(e)}")
+        finally:
+            self._loaded.set()
+
+    def add(self, records: List[dict]) -> int:
+        """Fold in records carrying their stored '_id', skipping the ones already counted"""
+        with self._lock:
+            new = [record for record in records if record.get("_id") not in self._keys]
+            if not new:
+                return 0
+            frame = WeatherDataManager._keyed_frame(new, stored_ids=True)
+            self._keys.update(frame.index)
+            self._aggregates = self._aggregates.update(frame)
+        return len(frame)
+
+    def aggregates(self) -> WeatherAggregates:
+        """The aggregates, once the initial scan finished"""
+        self._loaded.wait()
+        return self._aggregates
+
+_AGGREGATE_STORE = None
+_AGGREGATE_STORE_LOCK = threading.Lock()
+
+def get_weather_aggregates() -> WeatherAggregates:
+    """Current aggregates of every stored record, scanning the collection on first use"""
+    global _AGGREGATE_STORE
+    if _AGGREGATE_STORE is None:
+        with _AGGREGATE_STORE_LOCK:
+            if _AGGREGATE_STORE is None:
+                store = WeatherAggregateStore()
+                # *************** Published before the scan, so writes landing meanwhile are counted too
+                _AGGREGATE_STORE = store
+                store.load()
+    return _AGGREGATE_STORE.aggregates()
+
+# ********** Predicate pushdown for the 'read' intent
+_PUSHDOWN_LOCK = threading.Lock()
+_PUSHDOWN_CACHE: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+_KNOWN_VALUES: Dict[str, set] = {}
+_COMPARE = {"eq": operator.eq, "gt": operator.gt, "gte": operator.ge, "lt": operator.lt, "lte": operator.le}
+# The Data API rejects longer $in lists
+ASTRA_IN_MAX_VALUES = 100
+
+def _invalidate_pushdown(records: List[dict]) -> None:
+    # *************** New rows may match any cached query; distinct values only grow
+    with _PUSHDOWN_LOCK:
+        _PUSHDOWN_CACHE.clear()
+        for column, values in _KNOWN_VALUES.items():
+            values.update(record[column] for record in records if record.get(column) is not None)
+
+def known_values(column: str) -> set:
+    """Distinct values of a column in the collection, read once and kept in sync with writes"""
+    with _PUSHDOWN_LOCK:
+        values = _KNOWN_VALUES.get(column)
+    if values is None:
+        values = set(connection_col().distinct(column))
+        with _PUSHDOWN_LOCK:
+            values = _KNOWN_VALUES.setdefault(column, values)
+    return values
+
+def _contains(value: Any, predicate: Predicate) -> bool:
+    if not isinstance(value, str):
+        return False
+    if predicate.regex:
+        return re.search(predicate.value, value, 0 if predicate.case else re.IGNORECASE) is not None
+    return predicate.value in value if predicate.case else predicate.value.lower() in value.lower()
+
+def to_astra_filter(predicates: List[Predicate]) -> Dict | None:
+    """
+    Translate predicates to a Data API filter.
+
+    Text equality and isin are pushed as they are; str.contains becomes an $in over the
+    matching known values of the column. An $in longer than ASTRA_IN_MAX_VALUES is not
+    pushed, the rows are filtered locally instead. Numeric comparisons and time ranges are only pushed with
+    SetupConfig.DATA_PUSHDOWN_RANGES, since older records may hold numbers as text and the
+    Data API never compares values of different types.
+
+    Args:
+        predicates (List[Predicate]): Predicates from extract_predicates.
+
+    Returns:
+        Dict | None: The filter ({} when nothing can be pushed), None when no row can match.
+    """
+    conditions, ranges = [], {}
+    for predicate in predicates:
+        textual = all(isinstance(value, str) for value in (predicate.value if predicate.op == "in" else [predicate.value]))
+        if predicate.op == "eq" and textual:
+            conditions.append({predicate.column: predicate.value})
+        elif predicate.op == "in" and textual:
+            if len(predicate.value) > ASTRA_IN_MAX_VALUES:
+                continue
+            conditions.append({predicate.column: {"$in": list(predicate.value)}})
+        elif predicate.op == "contains":
+            try:
+                matches = sorted(value for value in known_values(predicate.column) if _contains(value, predicate))
+            except re.error:
+                continue
+            if not matches:
+                return None
+            if len(matches) > ASTRA_IN_MAX_VALUES:
+                continue
+            conditions.append({predicate.column: {"$in": matches}})
+        elif SetupConfig.DATA_PUSHDOWN_RANGES and predicate.op != "in":
+            ranges.setdefault(predicate.column, {})[f"${predicate.op}"] = predicate.value
+    conditions.extend({column: condition} for column, condition in ranges.items())
+    if not conditions:
+        return {}
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+def apply_predicates(df: pd.DataFrame, predicates: List[Predicate]) -> pd.DataFrame:
+    """Keep the rows of a frame matching every predicate (numbers stored as text are compared as numbers)"""
+    mask = pd.Series(True, index=df.index)
+    for predicate in predicates:
+        if predicate.column not in df.columns:
+            continue
+        column = df[predicate.column]
+        if predicate.op == "contains":
+            try:
+                mask &= column.map(lambda value: _contains(value, predicate)).astype(bool)
+            except re.error:
+                continue
+        elif predicate.op == "in":
+            mask &= column.isin(predicate.value)
+        elif isinstance(predicate.value, str):
+            # *************** Text equality, or ISO time strings that compare in time order
+            compare = _COMPARE[predicate.op]
+            mask &= column.map(lambda value: isinstance(value, str) and compare(value, predicate.value)).astype(bool)
+        else:
+            mask &= _COMPARE[predicate.op](pd.to_numeric(column, errors="coerce"), predicate.value).fillna(False)
+    return df[mask]
+
+# *************** Function to read the rows an analysis needs
+def query_weather_data(predicates: List[Predicate], columns: List[str] | None = None,
+                       since: pd.Timestamp | None = None) -> pd.DataFrame:
+    """
+    Frame for one analysis, filtered by the predicates pushed down from its code.
+
+    When the data manager is not loaded and the predicates translate to a Data API filter, only
+    the matching documents are read, with the column projection, and the result is cached per
+    filter until the next write. Otherwise the in-memory hot window (plus older rows, see
+    get_dataframe) is filtered locally. Both paths cover the same period: rows observed since
+    'since', or the hot window when it is None.
+
+    Args:
+        predicates (List[Predicate]): Predicates from extract_predicates.
+        columns (List[str] | None): Columns the code reads, None for all of them.
+        since (pd.Timestamp | None): Oldest observation time the code needs (see history_since).
+
+    Returns:
+        pd.DataFrame: The rows and columns the analysis needs.
+    """
+    manager = WeatherDataManager._instance
+    astra_filter = to_astra_filter(predicates) if predicates else {}
+    if astra_filter is None:
+        return pd.DataFrame(columns=columns)
+
+    if not astra_filter or (manager is not None and manager._initialized):
+        df, _ = WeatherDataManager().get_dataframe(since=since, columns=columns)
+        return apply_predicates(df, predicates) if predicates else df
+
+    projection = {column: True for column in [*columns, "Observed_At"]} if columns is not None else None
+    cache_key = json.dumps([astra_filter, projection], sort_keys=True, default=str)
+    with _PUSHDOWN_LOCK:
+        df = _PUSHDOWN_CACHE.get(cache_key)
+        if df is not None:
+            _PUSHDOWN_CACHE.move_to_end(cache_key)
+    if df is None:
+        documents = list(connection_col().find(astra_filter, projection=projection))
+        df = WeatherDataManager._keyed_frame(documents, stored_ids=projection is not None) if documents else pd.DataFrame()
+        LOGGER.info(f"Pushed filter {astra_filter} read {len(df)} records.")
+        with _PUSHDOWN_LOCK:
+            _PUSHDOWN_CACHE[cache_key] = df
+            while len(_PUSHDOWN_CACHE) > SetupConfig.DATA_PUSHDOWN_CACHE_SIZE:
+                _PUSHDOWN_CACHE.popitem(last=False)
+
+    # *************** Same period as the in-memory path; rows without an observation time stay, as in the hot window
+    since = hot_window_start() if since is None else since
+    if since is not None and since > ALL_HISTORY and len(df):
+        observed = pd.to_datetime(df["Observed_At"], errors="coerce", utc=True) if "Observed_At" in df.columns \
+            else pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns, UTC]")
+        df = df[(observed >= since) | observed.isna()]
+    df = apply_predicates(df, predicates)
+    return df.reindex(columns=columns) if columns is not None else df
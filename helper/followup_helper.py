@@ -0,0 +1,111 @@
+# ********** IMPORT LIBRARIES **********
+from typing     import Dict, List
+import math
+import re
+
+from helper.location_helper         import get_location_resolver
+from helper.local_fallback_helper   import FORECAST_WORDS, CREATE_WORDS, READ_WORDS, UNITS_WORDS
+from helper.session_store_helper    import FilterState
+
+# Follow-up questions ("and tomorrow?", "what about in Fahrenheit?", "same for Tokyo") are
+# applied as a patch to the filters of the previous weather turn of the topic, instead of
+# detecting the intent and extracting the filters again from the whole chat history.
+
+LOCATION_FIELDS = {"q", "zip", "lat", "lon"}
+FOLLOWUP_MAX_WORDS = 8
+FOLLOWUP_START = re.compile(r"^(and|but|also|what about|how about|what if|same|now|in|for|at|tomorrow|today|next)\b")
+ADD_WORDS = re.compile(r"\b(too|also|as well|add|plus)\b")
+NOW_WORDS = re.compile(r"\b(now|right now|currently|current|today|at the moment)\b")
+LANG_WORDS = {"english": "en", "spanish": "es", "french": "fr", "german": "de", "italian": "it", "portuguese": "pt",
+              "dutch": "nl", "indonesian": "id", "malay": "ms", "japanese": "ja", "korean": "kr", "chinese": "zh_cn",
+              "arabic": "ar", "russian": "ru", "turkish": "tr", "vietnamese": "vi", "thai": "th", "hindi": "hi"}
+HOURS = re.compile(r"\bnext (\d+) hours?\b")
+DAYS = re.compile(r"\bnext (\d+) days?\b")
+FORECAST_MAX_CNT = 40
+
+def reuse_key(intent: str, params: Dict) -> tuple:
+    """Key of an upstream request; units are left out because records convert between them"""
+    return (intent, tuple(sorted((key, str(value)) for key, value in params.items() if key != "units")))
+
+def is_followup(text_input: str) -> bool:
+    """
+    A short message that continues the previous weather question rather than asking a new one.
+
+    Args:
+        text_input (str): The user's input text.
+
+    Returns:
+        bool: True for "and tomorrow?", "same for Tokyo", "in Fahrenheit please", "Tokyo?".
+    """
+    text = text_input.lower().strip()
+    words = re.findall(r"[\w']+", text)
+    if not words or len(words) > FOLLOWUP_MAX_WORDS:
+        return False
+    if any(word in text for word in CREATE_WORDS + READ_WORDS):
+        return False
+    return bool(FOLLOWUP_START.match(" ".join(words))) or \
+        (len(words) <= 3 and bool(get_location_resolver().find_in_text(text_input)))
+
+def apply_filter_delta(state: FilterState, intent: str, changed: List[Dict], replace_locations: bool) -> dict:
+    """
+    Patch the previous filters.
+
+    Args:
+        state (FilterState): Filters of the previous weather turn.
+        intent (str): "current_weather" or "forecast".
+        changed (List[Dict]): New filter items; options replace the previous value, locations
+            are added to or replace the previous ones.
+        replace_locations (bool): New locations replace the previous ones instead of adding to them.
+
+    Returns:
+        dict: {"intent": ..., "filter_created": [...]}, the filters in the convert_text_to_filter shape.
+    """
+    locations = [item for item in changed if item["field_name"] in LOCATION_FIELDS]
+    options = [item for item in changed if item["field_name"] not in LOCATION_FIELDS]
+    # *************** 'cnt' only applies to forecasts
+    if intent != "forecast":
+        options = [item for item in options if item["field_name"] != "cnt"]
+    replaced = {item["field_name"] for item in options} | ({"cnt"} if intent != "forecast" else set())
+    if locations and replace_locations:
+        replaced |= LOCATION_FIELDS
+
+    kept = [item for item in state.filters if item["field_name"] not in replaced]
+    return {"intent": intent, "filter_created": kept + locations + options}
+
+# *************** Local rules for the common follow-ups
+def resolve_followup_locally(text_input: str, state: FilterState) -> dict | None:
+    """
+    Resolve a follow-up from city names, unit, language and time words, without an LLM call.
+
+    Args:
+        text_input (str): The follow-up message.
+        state (FilterState): Filters of the previous weather turn.
+
+    Returns:
+        dict | None: The patched filters (see apply_filter_delta), None when the message changes
+            nothing the rules recognize.
+    """
+    text = text_input.lower()
+    intent = state.intent
+    if any(word in text for word in FORECAST_WORDS) or HOURS.search(text) or DAYS.search(text):
+        intent = "forecast"
+    elif NOW_WORDS.search(text):
+        intent = "current_weather"
+
+    changed = []
+    units = [value for word, value in UNITS_WORDS.items() if word in text]
+    if units:
+        changed.append({"field_name": "units", "value_target": units[0]})
+    languages = [code for word, code in LANG_WORDS.items() if re.search(rf"\b{word}\b", text)]
+    if languages:
+        changed.append({"field_name": "lang", "value_target": languages[0]})
+    hours, days = HOURS.search(text), DAYS.search(text)
+    if hours or days:
+        steps = math.ceil(int(hours.group(1)) / 3) if hours else int(days.group(1)) * 8
+        changed.append({"field_name": "cnt", "value_target": max(1, min(FORECAST_MAX_CNT, steps))})
+    changed.extend({"field_name": "q", "value_target": f"{location.name},{location.country}"}
+                   for location in get_location_resolver().find_in_text(text_input))
+
+    if not changed and intent == state.intent:
+        return None
+    return apply_filter_delta(state, intent, changed, replace_locations=not ADD_WORDS.search(text))
@@ -0,0 +1,341 @@
+# ********** IMPORT LIBRARIES **********
+from typing     import Dict, List
+import re
+import time
+import numpy as np
+
+from model.weather_records  import (ForecastSeries,
+                                    local_datetime,
+                                    temperature_symbol,
+                                    convert_temperature,
+                                    convert_speed,
+                                    )
+
+# Exact answers computed over ForecastSeries.points (one row per 3-hour step), so the LLM
+# no longer has to count through 40 raw entries per location.
+
+SECONDS_PER_DAY = 86400
+STEP_S = 3 * 3600
+RAIN_POP_THRESHOLD = 0.3    # probability of precipitation that counts as "likely"
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+# Whole words only ("rainy", "showers"), so "train" or "brainstorm" are not rain questions
+RAIN_WORDS = re.compile(r"\b(rain|umbrella|wet|shower|precipitation|storm|snow|drizzl)\w*")
+WARM_WORDS = ("warmest", "hottest", "warmer day", "hottest day")
+COLD_WORDS = ("coldest", "coolest", "chilliest")
+# A threshold needs its unit ("below 5°C", "over 40 mph"), so "over 3 days" is not one
+THRESHOLD_PATTERN = re.compile(r"\b(below|under|less than|drops? below|above|over|more than|exceeds?)\s+(-?\d+(?:\.\d+)?)\s*"
+                               r"(°\s*[cfk]\b|°|degrees?(?:\s+(?:celsius|fahrenheit|kelvin|[cfk]\b))?|celsius|fahrenheit|kelvin"
+                               r"|[cfk]\b|m/s|mps\b|mph\b|km/h|kph\b|kmh\b)")
+# Unit word -> (forecast field, OpenWeather units); None units means the series' own units
+THRESHOLD_UNITS = [("fahrenheit", ("temp", "imperial")), ("celsius", ("temp", "metric")), ("kelvin", ("temp", "standard")),
+                   ("km/h", ("wind_speed", "kmh")), ("kph", ("wind_speed", "kmh")), ("kmh", ("wind_speed", "kmh")),
+                   ("m/s", ("wind_speed", "metric")), ("mps", ("wind_speed", "metric")), ("mph", ("wind_speed", "imperial")),
+                   ("f", ("temp", "imperial")), ("c", ("temp", "metric")), ("k", ("temp", "standard")),
+                   ("°", ("temp", None)), ("degree", ("temp", None))]
+
+# *************** Function helpers for local calendar days
+def _local_days(series: ForecastSeries) -> np.ndarray:
+    """Local calendar day number (days since epoch) of every step"""
+    return (series.points["dt"] + series.timezone_offset) // SECONDS_PER_DAY
+
+def _weekday(day: int) -> int:
+    # *************** 1970-01-01 was a Thursday (weekday 3)
+    return int((day + 3) % 7)
+
+def _day_label(day: int) -> str:
+    return local_datetime(int(day) * SECONDS_PER_DAY, 0).strftime("%a %d %b")
+
+def _local_today(series: ForecastSeries) -> int:
+    """Current calendar day number in the city's timezone"""
+    return int((time.time() + series.timezone_offset) // SECONDS_PER_DAY)
+
+def _step_label(series: ForecastSeries, timestamp: int) -> str:
+    return local_datetime(int(timestamp), series.timezone_offset).strftime("%a %d %b %H:%M")
+
+def _nan_round(value: float, digits: int = 1) -> float | None:
+    return None if np.isnan(value) else round(float(value), digits)
+
+# *************** Daily rollups
+def daily_rollups(series: ForecastSeries) -> List[Dict]:
+    """
+    Aggregate the 3-hour steps of a series into local calendar days.
+
+    Args:
+        series (ForecastSeries): The forecast of one location.
+
+    Returns:
+        List[Dict]: One entry per day with temperature range and mean, maximum wind,
+            maximum chance of precipitation, rain and snow totals and the dominant condition.
+    """
+    points = series.points
+    if not len(points):
+        return []
+
+    days = _local_days(series)
+    starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+    counts = np.diff(np.r_[starts, len(points)])
+
+    temp_min = np.fmin.reduceat(points["temp_min"], starts)
+    temp_max = np.fmax.reduceat(points["temp_max"], starts)
+    temp_mean = np.add.reduceat(points["temp"], starts) / counts
+    wind_max = np.fmax.reduceat(points["wind_speed"], starts)
+    pop_max = np.maximum.reduceat(points["pop"], starts)
+    rain = np.add.reduceat(points["rain_3h"], starts)
+    snow = np.add.reduceat(points["snow_3h"], starts)
+
+    rollups = []
+    for index, start in enumerate(starts):
+        conditions = np.bincount(points["condition"][start:start + counts[index]])
+        rollups.append({"day": int(days[start]),
+                        "date": _day_label(days[start]),
+                        "weekday": WEEKDAYS[_weekday(days[start])],
+                        "steps": int(counts[index]),
+                        "temp_min": _nan_round(temp_min[index]),
+                        "temp_max": _nan_round(temp_max[index]),
+                        "temp_mean": _nan_round(temp_mean[index]),
+                        "wind_max": _nan_round(wind_max[index]),
+                        "pop_max": round(float(pop_max[index]), 2),
+                        "rain_mm": round(float(rain[index]), 1),
+                        "snow_mm": round(float(snow[index]), 1),
+                        "condition": series.conditions[int(np.argmax(conditions))] if series.conditions else ""})
+    return rollups
+
+# *************** Threshold crossings
+def threshold_crossings(series: ForecastSeries, field: str, threshold: float, direction: str = "below") -> List[Dict]:
+    """
+    Find the steps where a field crosses a threshold.
+
+    Args:
+        series (ForecastSeries): The forecast of one location.
+        field (str): Column of FORECAST_DTYPE, e.g. "wind_speed" or "temp".
+        threshold (float): Threshold in the series units.
+        direction (str): "below" or "above".
+
+    Returns:
+        List[Dict]: {"time", "dt", "value"} of every step where the condition starts to hold,
+            including the first step if it already holds.
+    """
+    values = series.points[field]
+    holds = values < threshold if direction == "below" else values > threshold
+    starts = np.flatnonzero(holds & ~np.r_[False, holds[:-1]])
+    return [{"time": _step_label(series, series.points["dt"][index]),
+             "dt": int(series.points["dt"][index]),
+             "value": _nan_round(values[index])}
+            for index in starts]
+
+# *************** Precipitation windows
+def precipitation_windows(series: ForecastSeries, pop_threshold: float = RAIN_POP_THRESHOLD) -> List[Dict]:
+    """
+    Group consecutive steps with likely precipitation into windows.
+
+    Args:
+        series (ForecastSeries): The forecast of one location.
+        pop_threshold (float): Minimum probability of precipitation of a wet step.
+
+    Returns:
+        List[Dict]: {"start", "end", "start_dt", "end_dt", "pop_max", "rain_mm", "snow_mm"} per window,
+            where "end" is the end of the last wet 3-hour step.
+    """
+    points = series.points
+    wet = (points["pop"] >= pop_threshold) | (points["rain_3h"] > 0) | (points["snow_3h"] > 0)
+    edges = np.diff(np.r_[0, wet.astype(np.int8), 0])
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+    windows = []
+    for start, end in zip(starts, ends):
+        window = points[start:end]
+        windows.append({"start": _step_label(series, window["dt"][0]),
+                        "end": _step_label(series, window["dt"][-1] + STEP_S),
+                        "start_dt": int(window["dt"][0]),
+                        "end_dt": int(window["dt"][-1]) + STEP_S,
+                        "pop_max": round(float(window["pop"].max()), 2),
+                        "rain_mm": round(float(window["rain_3h"].sum()), 1),
+                        "snow_mm": round(float(window["snow_3h"].sum()), 1)})
+    return windows
+
+# *************** Extremes and trends
+def forecast_extremes(series: ForecastSeries) -> Dict:
+    """Warmest, coldest and windiest step of a series"""
+    points = series.points
+    if not len(points) or np.isnan(points["temp"]).all():
+        return {}
+
+    def step(index: int, field: str) -> Dict:
+        return {"time": _step_label(series, points["dt"][index]), "value": _nan_round(points[field][index])}
+
+    extremes = {"warmest": step(int(np.nanargmax(points["temp"])), "temp"),
+                "coldest": step(int(np.nanargmin(points["temp"])), "temp")}
+    if not np.isnan(points["wind_speed"]).all():
+        extremes["windiest"] = step(int(np.nanargmax(points["wind_speed"])), "wind_speed")
+    return extremes
+
+def forecast_trend(series: ForecastSeries, field: str = "temp") -> float | None:
+    """
+    Least-squares slope of a field over the whole series.
+
+    Returns:
+        float | None: Change per day in the series units, None with fewer than two valid steps.
+    """
+    points = series.points
+    valid = ~np.isnan(points[field])
+    if valid.sum() < 2:
+        return None
+    days = (points["dt"][valid] - points["dt"][valid][0]) / SECONDS_PER_DAY
+    slope = np.polyfit(days, points[field][valid].astype(np.float64), 1)[0]
+    return round(float(slope), 2)
+
+# *************** Function to summarize the forecasts for the prompt
+def analyze_forecast(series: ForecastSeries) -> Dict:
+    """
+    Compact, exact summary of one forecast for the formatter prompt.
+
+    Args:
+        series (ForecastSeries): The forecast of one location.
+
+    Returns:
+        Dict: Location, units, daily rollups, precipitation windows, extremes and temperature trend.
+    """
+    return {"location": series.location,
+            "units": {"temperature": temperature_symbol(series.units).strip(),
+                      "wind": "mph" if series.units == "imperial" else "m/s"},
+            "daily": [{key: value for key, value in day.items() if key not in ("day", "steps")}
+                      for day in daily_rollups(series)],
+            "precipitation_windows": [{key: value for key, value in window.items() if not key.endswith("_dt")}
+                                      for window in precipitation_windows(series)],
+            "extremes": forecast_extremes(series),
+            "temperature_trend_per_day": forecast_trend(series, "temp")}
+
+def compare_locations(forecasts: List[ForecastSeries]) -> Dict:
+    """
+    Rank several locations on the same forecast period.
+
+    Args:
+        forecasts (List[ForecastSeries]): One series per location, in the same units.
+
+    Returns:
+        Dict: Locations ordered by mean temperature, total precipitation and maximum wind.
+    """
+    stats = []
+    for series in forecasts:
+        points = series.points
+        if not len(points):
+            continue
+        stats.append((series.location,
+                      float(np.nanmean(points["temp"])),
+                      float(points["rain_3h"].sum() + points["snow_3h"].sum()),
+                      float(np.nanmax(points["wind_speed"]))))
+    if len(stats) < 2:
+        return {}
+
+    def ranking(column: int) -> List[Dict]:
+        return [{"location": entry[0], "value": round(entry[column], 1)}
+                for entry in sorted(stats, key=lambda entry: -entry[column])]
+
+    return {"warmest_first": ranking(1), "wettest_first": ranking(2), "windiest_first": ranking(3)}
+
+# *************** Function to answer common forecast questions without an LLM
+def _selected_days(question: str, rollups: List[Dict], today: int) -> tuple[str, List[Dict]]:
+    # *************** Narrow the rollups to the period named in the question; the first step may already be tomorrow
+    if "weekend" in question:
+        return "this weekend", [day for day in rollups if day["weekday"] in ("saturday", "sunday")][:2]
+    if "tomorrow" in question:
+        return "tomorrow", [day for day in rollups if day["day"] == today + 1]
+    if "today" in question or "tonight" in question:
+        return "today", [day for day in rollups if day["day"] == today]
+    named = [day for day in rollups if day["weekday"] in question]
+    if named:
+        return f"on {named[0]['weekday'].capitalize()}", named[:1]
+    return "in the next days", rollups
+
+def _answer_precipitation(series: ForecastSeries, question: str) -> str:
+    period, days = _selected_days(question, daily_rollups(series), _local_today(series))
+    if not days:
+        return f"- **{series.location}:** the forecast does not cover {period} yet."
+    selected = {day["day"] for day in days}
+    windows = [window for window in precipitation_windows(series)
+               if {(window["start_dt"] + series.timezone_offset) // SECONDS_PER_DAY,
+                   (window["end_dt"] - 1 + series.timezone_offset) // SECONDS_PER_DAY} & selected]
+    if not windows:
+        chance = max(day["pop_max"] for day in days)
+        return f"- **{series.location}:** no rain expected {period} (chance at most {round(chance * 100)}%)."
+    spans = "; ".join(f"{window['start']} to {window['end']} (up to {round(window['pop_max'] * 100)}%"
+                      + (f", {window['rain_mm'] + window['snow_mm']:g} mm" if window["rain_mm"] or window["snow_mm"] else "")
+                      + ")" for window in windows)
+    return f"- **{series.location}:** rain is likely {period}: {spans}."
+
+def _answer_extreme_day(series: ForecastSeries, question: str, warmest: bool) -> str:
+    symbol = temperature_symbol(series.units)
+    _, days = _selected_days(question, daily_rollups(series), _local_today(series))
+    days = [day for day in days if day["temp_max"] is not None]
+    if not days:
+        return f"- **{series.location}:** no temperature data in the forecast."
+    day = max(days, key=lambda day: day["temp_max"]) if warmest else min(days, key=lambda day: day["temp_min"])
+    return (f"- **{series.location}:** the {'warmest' if warmest else 'coldest'} day is **{day['date']}**, "
+            f"{day['temp_min']}{symbol} to {day['temp_max']}{symbol}, mostly {day['condition']}.")
+
+def _threshold_unit(unit_text: str) -> tuple:
+    # *************** "degrees f" -> "f", "° c" -> "c"; bare "degrees"/"°" keep the series units
+    words = unit_text.replace("°", " ° ").split()
+    for word in reversed(words):
+        for name, unit in THRESHOLD_UNITS:
+            if word == name or (name == "degree" and word.startswith("degree")):
+                return unit
+    return ("temp", None)
+
+def _series_threshold(series: ForecastSeries, field: str, units: str | None, value: float) -> float:
+    """Threshold converted into the units the series was requested in"""
+    if units is None:
+        return value
+    if field == "temp":
+        return convert_temperature(value, units, series.units)
+    if units == "kmh":
+        value, units = value / 3.6, "metric"
+    return convert_speed(value, units, series.units)
+
+def _answer_threshold(series: ForecastSeries, field: str, direction: str, threshold: float) -> str:
+    threshold = round(threshold, 1)
+    unit = temperature_symbol(series.units) if field == "temp" else (" mph" if series.units == "imperial" else " m/s")
+    label = "temperature" if field == "temp" else "wind"
+    crossings = threshold_crossings(series, field, threshold, direction)
+    if not crossings:
+        return f"- **{series.location}:** the {label} does not go {direction} {threshold:g}{unit} in the forecast period."
+    first = crossings[0]
+    if first["dt"] == int(series.points["dt"][0]):
+        text = f"the {label} is already {direction} {threshold:g}{unit} ({first['value']:g}{unit} at {first['time']})"
+    else:
+        text = f"the {label} goes {direction} {threshold:g}{unit} at **{first['time']}** ({first['value']:g}{unit})"
+    return f"- **{series.location}:** {text}."
+
+def answer_forecast_question(question: str, forecasts: List[ForecastSeries]) -> str | None:
+    """
+    Answer rain, warmest/coldest day and threshold questions from the forecast arrays.
+
+    Args:
+        question (str): The user's input text.
+        forecasts (List[ForecastSeries]): Forecasts returned by call_weather_api.
+
+    Returns:
+        str | None: Markdown answer, or None when the question is not one of the supported kinds
+            and the formatter LLM should answer it from analyze_forecast summaries.
+    """
+    text = question.lower()
+    forecasts = [series for series in forecasts if isinstance(series, ForecastSeries) and len(series.points)]
+    if not forecasts:
+        return None
+
+    threshold = THRESHOLD_PATTERN.search(text)
+    if threshold:
+        field, units = _threshold_unit(threshold.group(3))
+        direction = "below" if threshold.group(1).split()[0] in ("below", "under", "less", "drop", "drops") else "above"
+        lines = [_answer_threshold(series, field, direction,
+                                   _series_threshold(series, field, units, float(threshold.group(2))))
+                 for series in forecasts]
+    elif any(word in text for word in WARM_WORDS + COLD_WORDS):
+        warmest = any(word in text for word in WARM_WORDS)
+        lines = [_answer_extreme_day(series, text, warmest) for series in forecasts]
+    elif RAIN_WORDS.search(text):
+        lines = [_answer_precipitation(series, text) for series in forecasts]
+    else:
+        return None
+    return "**Forecast**\n" + "\n".join(lines)
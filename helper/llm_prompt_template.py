@@ -1,7 +1,9 @@
 # ********** IMPORT FRAMEWORK **********
 from langchain_core.prompts             import ChatPromptTemplate, PromptTemplate
-from langchain_core.output_parsers      import JsonOutputParser, StrOutputParser
-from pydantic                           import Field, BaseModel
+from pydantic                           import Field, BaseModel, create_model
+
+# ********** IMPORT LIBRARIES **********
+from typing     import List, Literal
 
 
 LIST_DATA_COLUMNS = {
@@ -22,52 +24,58 @@ LIST_DATA_COLUMNS = {
             "Cloud_Cover_Percent": "The percentage of cloud cover at the location. E.g., '100'.",
             "Sunrise": "The time of sunrise at the location, not yet converted. E.g., '07:20 AM'.",
             "Sunset": "The time of sunset at the location, not yet converted. E.g., '05:30 PM'.",
-            "Timezone": "The timezone of the location. E.g., 'UTC-5'."
+            "Timezone": "The timezone of the location. E.g., 'UTC-5'.",
+            "Observed_At": "The UTC time the weather was observed, ISO 8601. E.g., '2025-01-05T10:00:00Z'."
     }
 
 # *************** Expected format for function convert text to filter
+class FilterItem(BaseModel):
+    """One OpenWeather API filter"""
+    field_name: str = Field(description="One of the 'filter_used' names, e.g. 'q' or 'units'.")
+    value_target: str | int | float = Field(description="The value of the filter, e.g. 'Yogyakarta,ID' or 'metric'.")
+
 class FilterExpect(BaseModel): 
     """
     FilterExpect defines the expected structure for filter_created.
     """
-    filter_created: list = Field(description=[{ 
-                                               "field_name": "one of the 'filter_used'",
-                                               "value_target": "the value of field expect"
-                                               }])
+    filter_created: List[FilterItem] = Field(description="Filters for the OpenWeather API call.")
+
+# *************** Expected format for function resolve follow-up filters
+class FilterDelta(BaseModel):
+    """
+    FilterDelta defines the change a follow-up question makes to the previous filters.
+    """
+    is_followup: bool = Field(description="False when the message does not change or repeat the previous weather question.")
+    intent: Literal["current_weather", "forecast"] = Field(description="Current weather or forecast, after the follow-up.")
+    changed_filters: List[FilterItem] = Field(description="Only the filters the follow-up sets or changes.")
+    replace_locations: bool = Field(description="True when the new location replaces the previous ones, false when it is added.")
     
 # *************** Expected format for function generate decision intent
+class IntentItem(BaseModel):
+    """The detected intent and why"""
+    intent: Literal["current_weather", "forecast", "historical_weather", "create", "read", "unknown", "incomplete"] = Field(
+        description="The detected intent of the user input.")
+    reason: str = Field(description="The reason for the detected intent, one short sentence.")
+
 class IntentDetected(BaseModel):
     """
     IntentDetected defines the expected structure for intent_detected.
     """
-    intent_detected: list = Field(description=[{"intent": "The detected intent of the user input.",
-                                               "reason": "The reason for the detected intent."
-                                              }])
+    intent_detected: List[IntentItem] = Field(min_length=1, description="The detected intent, exactly one item.")
+
+# *************** One stored weather record, one optional field per column of LIST_DATA_COLUMNS
+WeatherRecord = create_model(
+    "WeatherRecord",
+    __doc__="Weather data of one location",
+    **{column: (str | float | int | None, Field(None, description=description))
+       for column, description in LIST_DATA_COLUMNS.items()},
+)
 
 class DataExtracted(BaseModel):
     """
     DataExtracted defines the expected extracted data from llm response.
     """
-    extracted_data: list = Field(description=[{
-           "Location": "The city or place where the weather information is relevant. E.g., 'New York, NY'.",
-            "Coordinates_Latitude": "The latitude of the location. E.g., '40.7143'.",
-            "Coordinates_Longitude": "The longitude of the location. E.g., '-74.006'.",
-            "Weather_Conditions": "A description of the current weather conditions. E.g., 'Overcast clouds'.",
-            "Temperature_Current": "The current temperature at the location in Celsius. E.g., '-2.84'.",
-            "Temperature_Feels_Like": "The perceived temperature (considering wind and humidity). E.g., '-2.40'.",
-            "Temperature_Minimum": "The minimum temperature observed at the location in Celsius. E.g., '1.90'.",
-            "Temperature_Maximum": "The maximum temperature observed at the location in Celsius. E.g., '3.89'.",
-            "Pressure_hPa": "The atmospheric pressure at the location, measured in hectopascals (hPa). E.g., '1002'.",
-            "Humidity_Percent": "The humidity at the location, expressed as a percentage. E.g., '48'.",
-            "Visibility_km": "The visibility at the location, measured in kilometers. E.g., '10'.",
-            "Wind_Speed_m_s": "The speed of the wind at the location, measured in meters per second. E.g., '8.75'.",
-            "Wind_Direction_Degrees": "The wind direction at the location, measured in degrees. E.g., '250'.",
-            "Wind_Gusts_m_s": "The gust speed of the wind at the location, measured in meters per second. E.g., '12.86'.",
-            "Cloud_Cover_Percent": "The percentage of cloud cover at the location. E.g., '100'.",
-            "Sunrise": "The time of sunrise at the location, not yet converted. E.g., '07:20 AM'.",
-            "Sunset": "The time of sunset at the location, not yet converted. E.g., '05:30 PM'.",
-            "Timezone": "The timezone of the location. E.g., 'UTC-5'."
-    }])
+    extracted_data: List[WeatherRecord] = Field(description="One record per location found in the weather information.")
     
 # *************** Template prompt for function convert text to filter
 def prompt_convert_text_to_filter() -> PromptTemplate:
@@ -97,19 +105,45 @@ def prompt_convert_text_to_filter() -> PromptTemplate:
     - first "text_input" : "how's the weather condition in yogyakarta?" 
     - second "text_input" : "i'm also need the forecast" 
     - Means for the second "text_input" you need to create yogyakarta as the filters 
-    
-    Output:
-    Return filters as a JSON list with "field_name", and "value_target".
-    {format_instructions}
     """
     
     return PromptTemplate(
         template=template,
         input_variables=["text_input", "field_names", "chat_history"],
-        partial_variables={"format_instructions": JsonOutputParser(pydantic_object=FilterExpect).get_format_instructions()}
     )
     
     
+# *************** Template prompt for the follow-up filter patch
+def prompt_filter_delta() -> PromptTemplate:
+    """
+    Prompt to turn a follow-up question into a change of the previous filters
+
+    Returns:
+        PromptTemplate: The prompt template for the filter delta.
+    """
+    
+    template = """
+    You are Filter Update. The user asks a follow-up to a previous weather question.
+    
+    Input: 
+    "text_input": {text_input}
+    "previous": {previous}
+    "filter_used": {field_names}
+    
+    Instructions:
+    1. "previous" holds the intent and filters of the previous question.
+    2. Set "is_followup" to false when "text_input" is not about that weather question (thanks, small talk, saving or reading stored data); the other fields are then ignored.
+    3. Return only the filters "text_input" sets or changes, validated against "filter_used". Never repeat unchanged filters.
+    4. A city is returned as "q" with the country code, e.g. 'Tokyo,JP'.
+    5. Set "replace_locations" to false only when the user adds a location ("and Tokyo too").
+    6. Keep the previous intent unless the user asks about another time (e.g. "tomorrow" is a forecast).
+    """
+    
+    return PromptTemplate(
+        template=template,
+        input_variables=["text_input", "previous", "field_names"],
+    )
+    
 # *************** Template prompt for response format weather
 def prompt_response_format_weather() -> PromptTemplate:
     """
@@ -131,6 +165,7 @@ def prompt_response_format_weather() -> PromptTemplate:
     2. Summarize these elements in a **brief** but **complete** manner.
     3. Avoid lengthy explanations; focus on **key facts** and **important figures**.
     4. If multiple data points exist (e.g., a 5-day forecast), provide a short overview or bullet-point highlights rather than an exhaustive list.
+       Forecasts come precomputed ("daily", "precipitation_windows", "extremes", "temperature_trend_per_day", "comparison"): use these figures as they are, do not recount or recompute them.
     5. Explain brief summary the condition weather based on all the information "weather_information"
     6. If got "weather_information" contain ERROR state that the data is not available and assist the user to change the filter, format response using readable format (e.g "The data is not available try to change the location or zip").
     
@@ -261,16 +296,11 @@ def prompt_generate_decision() -> PromptTemplate:
       "input_text": {input_text}
       "list_filters": {list_filters}
       "chat_history": {chat_history}
-    
-    Output: 
-    Response the output must followed this instructions. 
-    {format_instructions}
     """
     
     return PromptTemplate(
         template=template,
         input_variables=["input_text", "list_filters", "chat_history"],
-        partial_variables= {"format_instructions": JsonOutputParser(pydantic_object=IntentDetected).get_format_instructions()}
     )
     
 # *************** Template prompt for response format weather
@@ -289,23 +319,15 @@ def prompt_extract_data() -> PromptTemplate:
     Input: 
     - "weather_information": {chat_history}
     
-    Note: 
-    - Analyze from "type" is ai from "weather_information" and then detect all the data based on "format_instructions"
-    
     Instructions:
-    1. Analyze the "weather_information" for all important weather data field based on "format_instructions".
-    2. Ensure the format is correct based format_instructions
-    3. Only put the correct data any data that is not related then don't take it.
-    
-    Output:
-    Response the output must followed this format_instructions!. Do not over created the output structure.
-    {format_instructions}
+    1. Only analyze the messages of type "ai" in "weather_information".
+    2. Extract one record per location with every weather field you find.
+    3. Leave out any data that is not weather data.
     """
     
     return PromptTemplate(
         template=template,
         input_variables=["chat_history"],
-        partial_variables= {"format_instructions": JsonOutputParser(pydantic_object=DataExtracted).get_format_instructions()}
     )
     
 # *************** Template prompt for response insert data
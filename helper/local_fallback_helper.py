@@ -0,0 +1,143 @@
+# ********** IMPORT LIBRARIES **********
+from typing     import Dict, List
+import re
+
+from helper.location_helper import get_location_resolver
+from model.weather_records  import WeatherObservation, ForecastSeries, local_datetime, temperature_symbol
+
+# Deterministic stand-ins for the LLM stages, used when a model call fails or the
+# request has run out of time budget.
+
+FORECAST_WORDS = ("forecast", "tomorrow", "next week", "next days", "weekend", "later", "will it", "upcoming")
+CREATE_WORDS = ("save", "store", "record", "add the data", "insert", "keep the data")
+READ_WORDS = ("show me", "stored", "saved data", "retrieve", "find", "view", "database")
+WEATHER_WORDS = ("weather", "temperature", "rain", "humid", "wind", "sunny", "cloud", "hot", "cold", "forecast")
+UNITS_WORDS = {"fahrenheit": "imperial", "celsius": "metric", "centigrade": "metric", "kelvin": "standard"}
+
+# *************** Local intent detection
+def detect_intent_locally(text_input: str, chat_history: List[dict]) -> dict:
+    """
+    Keyword-based intent detection with the same output shape as generate_decision.
+
+    Args:
+        text_input (str): The user's input text.
+        chat_history (List[dict]): Previous messages.
+
+    Returns:
+        dict: {"intent_detected": [{"intent": ..., "reason": ...}]}
+    """
+    text = text_input.lower()
+    has_location = bool(extract_filters_locally(text_input, chat_history)["filter_created"])
+
+    if any(word in text for word in CREATE_WORDS):
+        intent = "create"
+    elif any(word in text for word in READ_WORDS):
+        intent = "read"
+    elif any(word in text for word in FORECAST_WORDS):
+        intent = "forecast" if has_location else "incomplete"
+    elif any(word in text for word in WEATHER_WORDS) or has_location:
+        intent = "current_weather" if has_location else "incomplete"
+    else:
+        intent = "unknown"
+    return {"intent_detected": [{"intent": intent, "reason": "Detected by local keyword rules."}]}
+
+# *************** Local filter extraction
+def extract_filters_locally(text_input: str, chat_history: List[dict]) -> dict:
+    """
+    Build OpenWeather filters from known city names and unit words in the input, looking back
+    through the human messages of the chat history when the input names no city.
+
+    Args:
+        text_input (str): The user's input text.
+        chat_history (List[dict]): Previous messages.
+
+    Returns:
+        dict: {"filter_created": [{"field_name": ..., "value_target": ...}]}
+    """
+    resolver = get_location_resolver()
+    human_messages = [chat["content"] for chat in reversed(chat_history or []) if chat.get("type") == "human"]
+
+    filters = []
+    for text in [text_input, *human_messages]:
+        locations = resolver.find_in_text(text)
+        if locations:
+            filters.extend({"field_name": "q", "value_target": f"{location.name},{location.country}"}
+                           for location in locations)
+            break
+
+    units = "metric"
+    for text in [text_input, *human_messages]:
+        matched = [value for word, value in UNITS_WORDS.items() if word in text.lower()]
+        if matched:
+            units = matched[0]
+            break
+    if filters:
+        filters.append({"field_name": "units", "value_target": units})
+    return {"filter_created": filters}
+
+# *************** Local topic creation
+def topic_from_history(chat_history: List[dict], max_words: int = 4) -> str:
+    """Use the first words of the first human message as topic"""
+    for chat in chat_history:
+        if chat.get("type") == "human":
+            words = re.findall(r"[\w']+", chat["content"])
+            if words:
+                return " ".join(words[:max_words]).capitalize()
+    return "Weather Topic"
+
+# *************** Templated weather renderer
+def _render_current(record: WeatherObservation) -> str:
+    symbol = temperature_symbol(record.units)
+    speed_unit = "mph" if record.units == "imperial" else "m/s"
+    lines = [
+        f"**Weather for {record.location}**",
+        f"- **Conditions:** {(record.description or '-').capitalize()}",
+        f"- **Temperature:** {record.temp}{symbol} (feels like {record.feels_like}{symbol}, "
+        f"min {record.temp_min}{symbol}, max {record.temp_max}{symbol})",
+        f"- **Humidity:** {record.humidity:g}%",
+        f"- **Pressure:** {record.pressure:g} hPa",
+        f"- **Wind:** {record.wind_speed} {speed_unit} from {f'{record.wind_deg:g}' if record.wind_deg is not None else '-'}°",
+        f"- **Cloud Coverage:** {record.clouds:g}%",
+        f"- **Visibility:** {f'{record.visibility:g}' if record.visibility is not None else '-'} m",
+        f"- **Sunrise / Sunset:** {record.local_time(record.sunrise) or '-'} / {record.local_time(record.sunset) or '-'} (local time)",
+    ]
+    return "\n".join(lines)
+
+def _render_forecast(series: ForecastSeries) -> str:
+    symbol = temperature_symbol(series.units)
+    names = series.condition_names()
+    days = {}
+    for point, condition in zip(series.points, names):
+        day = local_datetime(int(point["dt"]), series.timezone_offset).strftime("%a %d %b")
+        days.setdefault(day, []).append((point, condition))
+
+    lines = [f"**Forecast for {series.location}**"]
+    for day, entries in days.items():
+        temps = [float(point["temp"]) for point, _ in entries]
+        conditions = [condition for _, condition in entries]
+        most_common = max(set(conditions), key=conditions.count) if conditions else "-"
+        rain = max(float(point["pop"]) for point, _ in entries)
+        lines.append(f"- **{day}:** {min(temps):.1f}{symbol} to {max(temps):.1f}{symbol}, mostly {most_common}, "
+                     f"chance of rain up to {round(rain * 100)}%")
+    return "\n".join(lines)
+
+def render_weather_template(responses: List[WeatherObservation | ForecastSeries | Dict]) -> str:
+    """
+    Render weather records as Markdown without an LLM call.
+
+    Args:
+        responses (List[WeatherObservation | ForecastSeries | Dict]): Records from call_weather_api,
+            or {"error": ...} entries.
+
+    Returns:
+        str: The formatted answer.
+    """
+    sections = []
+    for record in responses:
+        if isinstance(record, ForecastSeries):
+            sections.append(_render_forecast(record))
+        elif isinstance(record, WeatherObservation):
+            sections.append(_render_current(record))
+        else:
+            sections.append("The weather data is not available right now. Try again later or change the location.")
+    return "\n\n".join(sections) or "The weather data is not available right now."
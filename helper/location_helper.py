@@ -0,0 +1,321 @@
+# ********** IMPORT FRAMEWORK **********
+from setup      import (SetupConfig,
+                        LOGGER,
+                      )
+
+# ********** IMPORT LIBRARIES **********
+from dataclasses    import dataclass
+from difflib        import get_close_matches
+import atexit
+import csv
+import gzip
+import json
+import os
+import re
+import threading
+import unicodedata
+
+@dataclass(frozen=True, slots=True)
+class ResolvedLocation:
+    """
+    Canonical location resolved from the gazetteer or the geocode cache.
+    """
+    id: int
+    name: str
+    country: str
+    lat: float
+    lon: float
+
+    def to_params(self) -> dict:
+        """OpenWeather query parameters for this location"""
+        return {"id": self.id}
+
+# *************** Function helper to build the lookup key of a location name
+def normalize_location(text: str) -> str:
+    """
+    Normalize a free-form location name into a lookup key.
+
+    Args:
+        text (str): Location name, e.g. "Kuala Lumpur, MY".
+
+    Returns:
+        str: Lower-cased, accent-free key with punctuation removed, e.g. "kuala lumpur my".
+    """
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii")
+    text = re.sub(r"[^a-z0-9]+", " ", text.lower())
+    return " ".join(text.split())
+
+class LocationResolver:
+    """
+    Maps free-form location names ("KL", "kuala lumpur", "Kuala Lumpur, MY") to one canonical
+    OpenWeather city before any upstream call.
+
+    Two sources are combined:
+    - an offline gazetteer file (CSV seed file, or OpenWeather's bulk city.list.json[.gz]);
+    - a persistent geocode cache learned from past OpenWeather responses.
+
+    The learned part is stored as compact, gzip-compressed columnar JSON, written by a timer
+    'save_delay_s' after the first new location instead of on the request that learned it.
+    """
+
+    def __init__(self, gazetteer_path: str, cache_path: str, fuzzy_cutoff: float = 0.85, save_delay_s: float = 5.0):
+        self.gazetteer_path = gazetteer_path
+        self.cache_path = cache_path
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.save_delay_s = save_delay_s
+        self._save_timer = None
+
+        self._lock = threading.Lock()
+        self._locations = {}    # id -> ResolvedLocation
+        self._aliases = {}      # normalized alias -> [id, ...] (preferred first)
+        self._learned = {}      # id -> ResolvedLocation learned from responses
+        self._learned_aliases = {}
+        self._dirty = False
+
+        self._load_gazetteer()
+        self._load_cache()
+        atexit.register(self.save)
+
+    def resolve(self, text: str) -> ResolvedLocation | None:
+        """
+        Resolve a location name to a canonical city.
+
+        Args:
+            text (str): Free-form location name, optionally with a ", CC" country code.
+
+        Returns:
+            ResolvedLocation | None: The canonical city, or None if nothing matches closely enough.
+        """
+        if not text or not str(text).strip():
+            return None
+
+        name, _, country = str(text).partition(",")
+        country = normalize_location(country).upper()
+        country = country if len(country) == 2 else ""
+        key = normalize_location(name)
+
+        for candidate in (normalize_location(text), key):
+            location = self._lookup(candidate, country)
+            if location:
+                return location
+
+        # *************** Fuzzy match on the alias keys
+        matches = get_close_matches(key, self._candidate_keys(key), n=3, cutoff=self.fuzzy_cutoff)
+        for match in matches:
+            location = self._lookup(match, country)
+            if location:
+                LOGGER.info(f"Location '{text}' fuzzy matched to '{location.name}, {location.country}'")
+                return location
+        return None
+
+    def find_in_text(self, text: str, max_words: int = 3) -> list[ResolvedLocation]:
+        """
+        Find known locations mentioned in a sentence (exact alias matches only).
+
+        Args:
+            text (str): Free text, e.g. "how's the weather in Kuala Lumpur and Tokyo?".
+            max_words (int): Longest alias, in words, to look for.
+
+        Returns:
+            list[ResolvedLocation]: Locations in order of appearance, without duplicates.
+        """
+        text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii")
+        tokens = re.findall(r"[A-Za-z0-9]+", text)
+        words = [token.lower() for token in tokens]
+
+        found, index = [], 0
+        while index < len(words):
+            for size in range(min(max_words, len(words) - index), 0, -1):
+                key = " ".join(words[index:index + size])
+                # *************** Short aliases ("KL", "SF") only count when written in capitals
+                if len(key) < 3 and not tokens[index].isupper():
+                    continue
+                location = self._lookup(key)
+                if location:
+                    if location not in found:
+                        found.append(location)
+                    index += size - 1
+                    break
+            index += 1
+        return found
+
+    def learn(self, payload: dict, query: str | None = None) -> None:
+        """
+        Record the location of an OpenWeather response (current weather or forecast).
+
+        Args:
+            payload (dict): The decoded OpenWeather response.
+            query (str | None): The original 'q' value, remembered as an alias.
+        """
+        location = self._location_from_payload(payload)
+        if location is not None:
+            self.learn_location(location, query)
+
+    def learn_location(self, location: ResolvedLocation, query: str | None = None) -> None:
+        """
+        Record a location seen in an OpenWeather response.
+
+        Args:
+            location (ResolvedLocation): The location.
+            query (str | None): The original 'q' value, remembered as an alias.
+        """
+        if not location.id:
+            return
+
+        with self._lock:
+            aliases = {normalize_location(location.name), normalize_location(f"{location.name} {location.country}")}
+            if query:
+                aliases.add(normalize_location(query))
+
+            known = self._learned.get(location.id) == location and all(
+                location.id in self._aliases.get(alias, []) for alias in aliases)
+            if known:
+                return
+
+            self._locations[location.id] = location
+            self._learned[location.id] = location
+            for alias in aliases:
+                self._add_alias(alias, location.id)
+                self._learned_aliases.setdefault(alias, [])
+                if location.id not in self._learned_aliases[alias]:
+                    self._learned_aliases[alias].append(location.id)
+            self._dirty = True
+            # *************** One delayed write covers every location learned meanwhile
+            if self._save_timer is None:
+                self._save_timer = threading.Timer(self.save_delay_s, self.save)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+
+    def save(self) -> None:
+        """Persist the learned geocode cache if it changed"""
+        with self._lock:
+            self._save_timer = None
+            if not self._dirty:
+                return
+            learned = list(self._learned.values())
+            index = {
+                "id": [location.id for location in learned],
+                "name": [location.name for location in learned],
+                "country": [location.country for location in learned],
+                "lat": [location.lat for location in learned],
+                "lon": [location.lon for location in learned],
+                "aliases": {alias: list(ids) for alias, ids in self._learned_aliases.items()},
+            }
+            self._dirty = False
+
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = f"{self.cache_path}.tmp"
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as file:
+                json.dump(index, file, separators=(",", ":"))
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            LOGGER.error(f"Error saving geocode cache: {str(e)}")
+
+    def _lookup(self, key: str, country: str = "") -> ResolvedLocation | None:
+        # *************** learn_location mutates the indexes under the lock from other sessions
+        with self._lock:
+            for location_id in self._aliases.get(key, ()):
+                location = self._locations.get(location_id)
+                if location and (not country or location.country == country):
+                    return location
+        return None
+
+    def _candidate_keys(self, key: str) -> list[str]:
+        # *************** Restrict fuzzy matching to keys sharing the first letter (large gazetteers)
+        with self._lock:
+            if len(self._aliases) < 5000 or not key:
+                return list(self._aliases)
+            return [alias for alias in self._aliases if alias[:1] == key[:1]]
+
+    def _add_alias(self, alias: str, location_id: int) -> None:
+        if not alias:
+            return
+        ids = self._aliases.setdefault(alias, [])
+        if location_id not in ids:
+            ids.append(location_id)
+
+    def _register(self, location: ResolvedLocation, aliases: list[str] = ()) -> None:
+        self._locations.setdefault(location.id, location)
+        self._add_alias(normalize_location(location.name), location.id)
+        self._add_alias(normalize_location(f"{location.name} {location.country}"), location.id)
+        for alias in aliases:
+            self._add_alias(normalize_location(alias), location.id)
+
+    def _load_gazetteer(self) -> None:
+        if not os.path.exists(self.gazetteer_path):
+            LOGGER.warning(f"Gazetteer file not found: {self.gazetteer_path}")
+            return
+
+        try:
+            if self.gazetteer_path.endswith((".json", ".json.gz")):
+                opener = gzip.open if self.gazetteer_path.endswith(".gz") else open
+                with opener(self.gazetteer_path, "rt", encoding="utf-8") as file:
+                    for city in json.load(file):
+                        self._register(ResolvedLocation(id=int(city["id"]),
+                                                        name=city["name"],
+                                                        country=city.get("country", ""),
+                                                        lat=float(city["coord"]["lat"]),
+                                                        lon=float(city["coord"]["lon"])))
+            else:
+                with open(self.gazetteer_path, newline="", encoding="utf-8") as file:
+                    for row in csv.DictReader(file):
+                        location = ResolvedLocation(id=int(row["id"]),
+                                                    name=row["name"],
+                                                    country=row["country"],
+                                                    lat=float(row["lat"]),
+                                                    lon=float(row["lon"]))
+                        aliases = [alias for alias in (row.get("aliases") or "").split("|") if alias]
+                        self._register(location, aliases)
+            LOGGER.info(f"Gazetteer loaded: {len(self._locations)} locations.")
+        except (OSError, KeyError, ValueError) as e:
+            LOGGER.error(f"Error loading gazetteer: {str(e)}")
+
+    def _load_cache(self) -> None:
+        if not os.path.exists(self.cache_path):
+            return
+
+        try:
+            with gzip.open(self.cache_path, "rt", encoding="utf-8") as file:
+                index = json.load(file)
+            for location in zip(index["id"], index["name"], index["country"], index["lat"], index["lon"]):
+                location = ResolvedLocation(*location)
+                self._locations[location.id] = location
+                self._learned[location.id] = location
+            for alias, ids in index.get("aliases", {}).items():
+                self._learned_aliases[alias] = list(ids)
+                for location_id in ids:
+                    self._add_alias(alias, location_id)
+        except (OSError, KeyError, ValueError) as e:
+            LOGGER.error(f"Error loading geocode cache: {str(e)}")
+
+    @staticmethod
+    def _location_from_payload(payload: dict) -> ResolvedLocation | None:
+        # *************** Current weather keeps the city at the top level, forecast under 'city'
+        city = payload.get("city", payload) if isinstance(payload, dict) else None
+        if not city or not city.get("id") or "coord" not in city:
+            return None
+        country = city.get("country") or (payload.get("sys") or {}).get("country", "")
+        try:
+            return ResolvedLocation(id=int(city["id"]),
+                                    name=city.get("name", ""),
+                                    country=country,
+                                    lat=float(city["coord"]["lat"]),
+                                    lon=float(city["coord"]["lon"]))
+        except (KeyError, TypeError, ValueError):
+            return None
+
+_RESOLVER = None
+_RESOLVER_LOCK = threading.Lock()
+
+def get_location_resolver() -> LocationResolver:
+    """Return the process-wide location resolver"""
+    global _RESOLVER
+    if _RESOLVER is None:
+        with _RESOLVER_LOCK:
+            if _RESOLVER is None:
+                _RESOLVER = LocationResolver(gazetteer_path=SetupConfig.GAZETTEER_PATH,
+                                             cache_path=SetupConfig.GEOCODE_CACHE_PATH,
+                                             fuzzy_cutoff=SetupConfig.LOCATION_FUZZY_CUTOFF,
+                                             save_delay_s=SetupConfig.GEOCODE_SAVE_DELAY_S)
+    return _RESOLVER
@@ -0,0 +1,154 @@
+# ********** IMPORT LIBRARIES **********
+from concurrent.futures import Future
+from typing             import Any, Callable, Hashable
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: the bucket falls back to per-process state
+    fcntl = None
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+# ********** Single-flight request coalescing
+class SingleFlight:
+    """
+    Coalesces concurrent calls sharing the same key: the first caller runs the function,
+    the others wait for its result (or exception) instead of issuing their own call.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn once for all concurrent callers with the same key.
+
+        Args:
+            key (Hashable): Identity of the call (e.g. URL and sorted parameters).
+            fn (Callable): The call to execute.
+
+        Returns:
+            Any: The shared result of fn.
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+# ********** Token bucket rate limiter
+class TokenBucket:
+    """
+    Token bucket limiting calls to 'rate_per_minute' with bursts up to 'capacity'.
+
+    Callers wait in a priority queue (lower value first, FIFO within a priority), so
+    interactive turns overtake background work. When 'state_path' is set and file locking is
+    available, the bucket state lives in that file, so every worker process on the host draws
+    from the same quota.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: float, state_path: str | None = None):
+        self.rate_per_s = rate_per_minute / 60.0
+        self.capacity = capacity
+        self.state_path = state_path if state_path and fcntl else None
+
+        self._cond = threading.Condition()
+        self._waiters = []
+        self._counter = itertools.count()
+        self._tokens = capacity
+        self._updated = time.time()
+
+        if self.state_path:
+            os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+
+    def acquire(self, priority: int = PRIORITY_INTERACTIVE, timeout: float | None = None) -> bool:
+        """
+        Wait for a token.
+
+        Args:
+            priority (int): Queue priority, lower values are served first.
+            timeout (float | None): Maximum seconds to wait, None waits forever.
+
+        Returns:
+            bool: True if a token was taken, False on timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        ticket = (priority, next(self._counter))
+
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    wait = None
+                    if self._waiters[0] == ticket:
+                        wait = self._take()
+                        if wait == 0:
+                            return True
+
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            return False
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def _take(self) -> float:
+        # *************** Returns 0 when a token was taken, else the seconds until the next one
+        if not self.state_path:
+            self._tokens, self._updated, wait = self._refill_and_take(self._tokens, self._updated)
+            return wait
+
+        with open(self.state_path, "a+") as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                file.seek(0)
+                try:
+                    state = json.loads(file.read() or "{}")
+                except ValueError:
+                    state = {}
+                tokens, updated, wait = self._refill_and_take(state.get("tokens", self.capacity),
+                                                              state.get("updated", time.time()))
+                file.seek(0)
+                file.truncate()
+                file.write(json.dumps({"tokens": tokens, "updated": updated}))
+                file.flush()
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+        return wait
+
+    def _refill_and_take(self, tokens: float, updated: float) -> tuple[float, float, float]:
+        now = time.time()
+        tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate_per_s)
+        if tokens >= 1:
+            return tokens - 1, now, 0
+        return tokens, now, (1 - tokens) / self.rate_per_s
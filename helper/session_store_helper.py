@@ -0,0 +1,188 @@
+# ********** IMPORT FRAMEWORK **********
+from setup      import (SetupConfig,
+                        LOGGER,
+                      )
+
+# ********** IMPORT LIBRARIES **********
+from collections    import OrderedDict
+from contextlib     import contextmanager
+from contextvars    import ContextVar
+from dataclasses    import dataclass
+from typing         import Dict, Iterator, List, Tuple
+import threading
+import time
+
+from model.weather_records  import WeatherObservation, ForecastSeries
+
+# Weather records fetched during a chat turn, collected so ask_to_chat can keep them per session
+_TURN_RECORDS: ContextVar[List | None] = ContextVar("turn_records", default=None)
+# The same records by upstream request key, reused by follow-up turns
+_TURN_FETCHES: ContextVar[Dict | None] = ContextVar("turn_fetches", default=None)
+
+@contextmanager
+def collect_turn_records() -> Iterator[List]:
+    """Collect the weather records fetched by call_weather_api during one chat turn"""
+    records = []
+    token = _TURN_RECORDS.set(records)
+    fetches_token = _TURN_FETCHES.set({})
+    try:
+        yield records
+    finally:
+        _TURN_FETCHES.reset(fetches_token)
+        _TURN_RECORDS.reset(token)
+
+def record_turn_weather(records: List) -> None:
+    """Add fetched records to the turn being collected, a no-op outside ask_to_chat"""
+    collected = _TURN_RECORDS.get()
+    if collected is not None:
+        collected.extend(record for record in records if isinstance(record, WeatherObservation))
+
+def record_turn_fetch(key: tuple, record: WeatherObservation | ForecastSeries, fetched_at: float | None = None) -> None:
+    """Keep a parsed upstream record under its request key, a no-op outside ask_to_chat"""
+    fetches = _TURN_FETCHES.get()
+    if fetches is not None:
+        fetches[key] = (record, time.monotonic() if fetched_at is None else fetched_at)
+
+def turn_fetches() -> Dict[tuple, Tuple[WeatherObservation | ForecastSeries, float]]:
+    """(record, fetched_at) pairs fetched or reused so far in the current turn, by request key"""
+    return dict(_TURN_FETCHES.get() or {})
+
+@dataclass(frozen=True)
+class FilterState:
+    """
+    Filters resolved for the last weather turn of a session, and the (record, fetched_at) pairs
+    it fetched by request key (see followup_helper.reuse_key).
+    """
+    intent: str
+    filters: List[Dict]
+    fetched: Dict[tuple, Tuple[WeatherObservation | ForecastSeries, float]]
+
+    def reusable(self, max_age_s: float) -> Dict[tuple, Tuple[WeatherObservation | ForecastSeries, float]]:
+        """The fetched records not older than 'max_age_s'; reusing a record keeps its fetch time"""
+        now = time.monotonic()
+        return {key: fetched for key, fetched in self.fetched.items() if now - fetched[1] <= max_age_s}
+
+class SessionRecordStore:
+    """
+    Structured weather observations of the recent weather turns of each chat session, and the
+    filters of its last weather turn. Sessions are keyed by a conversation id (Streamlit
+    session, API session_id), never by the display topic, which different users can share.
+
+    The 'create' intent maps these records to storage documents instead of asking the LLM to
+    re-extract the numbers from its own Markdown answers; follow-up questions patch the last
+    filters. Sessions are kept in process memory, least recently used first out, and expire
+    after 'ttl_s' without a new turn.
+    """
+
+    def __init__(self, max_sessions: int, max_turns: int, ttl_s: float):
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self.ttl_s = ttl_s
+        self._sessions: OrderedDict[str, Dict] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def remember(self, session: str, records: List[WeatherObservation]) -> None:
+        """
+        Keep the observations of one turn.
+
+        Args:
+            session (str): The conversation id.
+            records (List[WeatherObservation]): Observations fetched during the turn.
+        """
+        if not session or not records:
+            return
+        with self._lock:
+            entry = self._touch(session)
+            entry["turns"] = (entry["turns"] + [list(records)])[-self.max_turns:]
+
+    def remember_filters(self, session: str, state: FilterState) -> None:
+        """
+        Keep the filters of the last weather turn, replacing the previous ones.
+
+        Args:
+            session (str): The conversation id.
+            state (FilterState): Intent, filters and fetched records of the turn.
+        """
+        if not session:
+            return
+        with self._lock:
+            self._touch(session)["filters"] = state
+
+    def last_filters(self, session: str) -> FilterState | None:
+        """Filters of the last weather turn of the session, None when there is none or it expired"""
+        with self._lock:
+            entry = self._sessions.get(session)
+            if entry is None or self._expired(entry):
+                return None
+            return entry.get("filters")
+
+    def recent(self, session: str) -> List[WeatherObservation]:
+        """
+        Return the observations of the recent turns, the latest one per location.
+
+        Args:
+            session (str): The conversation id.
+
+        Returns:
+            List[WeatherObservation]: Observations in the order their locations were first asked.
+        """
+        with self._lock:
+            entry = self._sessions.get(session)
+            if entry is None:
+                return []
+            if self._expired(entry):
+                del self._sessions[session]
+                return []
+            turns = list(entry["turns"])
+
+        latest = {}
+        for turn in turns:
+            for record in turn:
+                latest[record.city_id or record.location] = record
+        return list(latest.values())
+
+    def forget(self, session: str) -> None:
+        with self._lock:
+            self._sessions.pop(session, None)
+
+    def _expired(self, entry: Dict) -> bool:
+        return time.monotonic() - entry["updated_at"] > self.ttl_s
+
+    def _touch(self, session: str) -> Dict:
+        # *************** Caller holds the lock; the session becomes the most recently used
+        entry = self._sessions.pop(session, None)
+        if entry is None or self._expired(entry):
+            entry = {"turns": [], "filters": None}
+        entry["updated_at"] = time.monotonic()
+        self._sessions[session] = entry
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return entry
+
+_SESSION_STORE = None
+_SESSION_STORE_LOCK = threading.Lock()
+
+def get_session_store() -> SessionRecordStore:
+    """Return the process-wide session record store"""
+    global _SESSION_STORE
+    if _SESSION_STORE is None:
+        with _SESSION_STORE_LOCK:
+            if _SESSION_STORE is None:
+                _SESSION_STORE = SessionRecordStore(max_sessions=SetupConfig.SESSION_MAX_TOPICS,
+                                                    max_turns=SetupConfig.SESSION_MAX_TURNS,
+                                                    ttl_s=SetupConfig.SESSION_TTL_S)
+                LOGGER.info("Session record store initialized.")
+    return _SESSION_STORE
+
+# *************** Function to map observations to storage documents
+def records_to_documents(records: List[WeatherObservation]) -> Dict[str, List[Dict]]:
+    """
+    Map observations to LIST_DATA_COLUMNS documents, in the shape create_data expects.
+
+    Args:
+        records (List[WeatherObservation]): Observations to save.
+
+    Returns:
+        Dict[str, List[Dict]]: {"extracted_data": [document, ...]}
+    """
+    return {"extracted_data": [record.to_record() for record in records]}
@@ -0,0 +1,138 @@
+# ********** IMPORT FRAMEWORK **********
+from setup      import (SetupConfig,
+                        LOGGER,
+                      )
+
+# ********** IMPORT LIBRARIES **********
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing             import Callable
+import contextvars
+import threading
+
+# Filter extraction (and optionally the weather fetch) started next to intent detection, on
+# the bet that the turn is a weather question. The result is used when the intent is weather
+# and dropped otherwise; the counters below show how often the bet pays off and what it costs.
+
+class SpeculationStats:
+    """
+    Thread-safe speculation counters.
+
+    'hits' are speculations whose filters were used, 'misses' were dropped because the intent
+    was not weather, 'failed' raised or were not started in time. 'wasted_tokens' are the LLM
+    tokens of dropped speculations, 'wasted_prefetches' the upstream records fetched for the
+    wrong intent or a dropped speculation.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {"launched": 0, "hits": 0, "misses": 0, "failed": 0, "tokens": 0, "wasted_tokens": 0,
+                        "prefetches": 0, "prefetch_hits": 0, "wasted_prefetches": 0}
+
+    def launched(self) -> None:
+        with self._lock:
+            self._counts["launched"] += 1
+
+    def record(self, outcome: str, tokens: int = 0, prefetched: int = 0, prefetch_used: bool = False) -> None:
+        """
+        Count the outcome of one speculation.
+
+        Args:
+            outcome (str): "hit", "miss" or "failed".
+            tokens (int): LLM tokens the speculation used.
+            prefetched (int): Upstream records it fetched.
+            prefetch_used (bool): The records were fetched for the detected intent.
+        """
+        with self._lock:
+            self._counts[{"hit": "hits", "miss": "misses"}.get(outcome, "failed")] += 1
+            self._counts["tokens"] += tokens
+            self._counts["prefetches"] += int(prefetched > 0)
+            self._counts["prefetch_hits"] += int(prefetched > 0 and prefetch_used)
+            if outcome != "hit":
+                self._counts["wasted_tokens"] += tokens
+            if not prefetch_used:
+                self._counts["wasted_prefetches"] += prefetched
+
+    def snapshot(self) -> dict:
+        """Return the counters, hit rate and prefetch hit rate"""
+        with self._lock:
+            counts = dict(self._counts)
+        settled = counts["hits"] + counts["misses"] + counts["failed"]
+        return {**counts,
+                "hit_rate": counts["hits"] / max(1, settled),
+                "prefetch_hit_rate": counts["prefetch_hits"] / max(1, counts["prefetches"])}
+
+SPECULATION_STATS = SpeculationStats()
+
+def get_speculation_stats() -> dict:
+    """Return the speculation counters of this worker"""
+    return SPECULATION_STATS.snapshot()
+
+_EXECUTOR = None
+_EXECUTOR_LOCK = threading.Lock()
+
+def get_speculation_executor() -> ThreadPoolExecutor:
+    """Return the thread pool running speculative stages"""
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        with _EXECUTOR_LOCK:
+            if _EXECUTOR is None:
+                _EXECUTOR = ThreadPoolExecutor(max_workers=SetupConfig.SPECULATION_WORKERS, thread_name_prefix="speculation")
+                LOGGER.info("Speculation executor initialized.")
+    return _EXECUTOR
+
+def speculate(function: Callable, *args) -> Future:
+    """
+    Start a speculative stage. It runs in a copy of the caller's context, so it shares the
+    request time budget.
+
+    Args:
+        function (Callable): The stage, returning {"tokens": ..., "fetches": ..., ...}.
+        *args: Its arguments.
+
+    Returns:
+        Future: The running stage.
+    """
+    SPECULATION_STATS.launched()
+    context = contextvars.copy_context()
+    return get_speculation_executor().submit(context.run, function, *args)
+
+def claim(speculation: Future, intent: str, timeout: float | None = None) -> dict | None:
+    """
+    Use a speculation for a weather turn.
+
+    Args:
+        speculation (Future): The running stage.
+        intent (str): The detected intent.
+        timeout (float | None): Longest wait for the result.
+
+    Returns:
+        dict | None: The result, None when it failed or had not started yet (the caller then
+            runs the stage itself instead of queueing behind other speculations).
+    """
+    if speculation.cancel():
+        SPECULATION_STATS.record("failed")
+        return None
+    try:
+        result = speculation.result(timeout=timeout)
+    except Exception as e:
+        LOGGER.warning(f"Speculative stage failed: {str(e)}")
+        SPECULATION_STATS.record("failed")
+        return None
+    SPECULATION_STATS.record("hit", result.get("tokens", 0), len(result.get("fetches") or {}),
+                             prefetch_used=result.get("intent") == intent)
+    return result
+
+def discard(speculation: Future) -> None:
+    """Drop a speculation whose result is not needed, counting its cost once it finishes"""
+    if speculation.cancel():
+        SPECULATION_STATS.record("miss")
+        return
+
+    def count(future: Future) -> None:
+        try:
+            result = future.result()
+        except Exception:
+            SPECULATION_STATS.record("failed")
+            return
+        SPECULATION_STATS.record("miss", result.get("tokens", 0), len(result.get("fetches") or {}))
+    speculation.add_done_callback(count)
@@ -0,0 +1,32 @@
+# ********** IMPORT LIBRARIES **********
+import threading
+
+class OutputParseError(ValueError):
+    """Raised when an LLM output holds no JSON object matching the expected model"""
+
+# ********** Parse statistics
+class ParseStats:
+    """
+    Thread-safe parse counters per pipeline stage.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def record(self, stage: str, ok: bool) -> None:
+        with self._lock:
+            counts = self._counts.setdefault(stage, {"parsed": 0, "failed": 0})
+            counts["parsed" if ok else "failed"] += 1
+
+    def snapshot(self) -> dict:
+        """Return the counters and failure rate of every stage"""
+        with self._lock:
+            return {stage: {**counts, "failure_rate": counts["failed"] / max(1, counts["parsed"] + counts["failed"])}
+                    for stage, counts in self._counts.items()}
+
+PARSE_STATS = ParseStats()
+
+def get_parse_stats() -> dict:
+    """Return the structured-output parse counters per stage"""
+    return PARSE_STATS.snapshot()
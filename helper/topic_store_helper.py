@@ -0,0 +1,133 @@
+# ********** IMPORT FRAMEWORK **********
+from setup      import (SetupConfig,
+                        LOGGER,
+                      )
+
+# ********** IMPORT LIBRARIES **********
+from contextlib import contextmanager
+from datetime   import datetime
+from typing     import Dict, List
+import json
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: locking is per-process only
+    fcntl = None
+
+class TopicStore:
+    """
+    Chat topics stored in the same JSON file as the Streamlit UI (DB_FILE.json):
+    a list of {"topic", "message", "chat_history", "created_at"} entries.
+
+    Every read-modify-write holds an exclusive file lock and replaces the file atomically,
+    so several service worker processes can share one store.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def list_topics(self) -> List[Dict]:
+        """Return the topic names with their creation time and message count"""
+        with self._locked():
+            entries = self._read()
+        return [{"topic": entry.get("topic", ""),
+                 "created_at": entry.get("created_at", ""),
+                 "messages": len(entry.get("message", []))}
+                for entry in entries if entry.get("topic") and not entry["topic"].startswith("New Chat")]
+
+    def load_topic(self, topic: str) -> Dict | None:
+        """
+        Load one topic.
+
+        Args:
+            topic (str): Topic name.
+
+        Returns:
+            Dict | None: The stored entry, or None if the topic does not exist.
+        """
+        with self._locked():
+            entries = self._read()
+        return next((entry for entry in entries if entry.get("topic") == topic), None)
+
+    def append_turn(self, topic: str, previous_topic: str, user_input: str, response: str, chat_history: List[Dict]) -> Dict:
+        """
+        Append one question/answer turn to a topic, creating or renaming the topic as needed.
+        A new chat never joins an existing topic: when its generated name is taken, the name
+        gets a " (2)", " (3)", ... suffix.
+
+        Args:
+            topic (str): Topic name returned by the chat engine.
+            previous_topic (str): Topic name sent with the request ("" for a new chat).
+            user_input (str): The user's message.
+            response (str): The engine's answer.
+            chat_history (List[Dict]): The updated chat history returned by the engine.
+
+        Returns:
+            Dict: The stored entry, its 'topic' is the name the turn was stored under.
+        """
+        with self._locked():
+            entries = self._read()
+            entry = None
+            if previous_topic:
+                entry = next((entry for entry in entries if entry.get("topic") == previous_topic), None)
+            if entry is None:
+                entry = {"topic": topic, "message": []}
+                entries.append(entry)
+
+            taken = {other.get("topic") for other in entries if other is not entry}
+            name, suffix = topic, 2
+            while name in taken:
+                name, suffix = f"{topic} ({suffix})", suffix + 1
+            entry["topic"] = name
+            entry["message"] = entry.get("message", []) + [{"type": "human", "content": user_input},
+                                                            {"type": "ai", "content": response}]
+            entry["chat_history"] = chat_history
+            entry["created_at"] = datetime.now().isoformat()
+            self._write(entries)
+        return entry
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(f"{self.path}.lock", "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read(self) -> List[Dict]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                entries = json.load(file)
+            return entries if isinstance(entries, list) else []
+        except FileNotFoundError:
+            return []
+        except ValueError as e:
+            LOGGER.error(f"Topic store is not valid JSON, starting empty: {str(e)}")
+            return []
+
+    def _write(self, entries: List[Dict]) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(entries, file, indent=2)
+        os.replace(tmp_path, self.path)
+
+_TOPIC_STORE = None
+_TOPIC_STORE_LOCK = threading.Lock()
+
+def get_topic_store() -> TopicStore:
+    """Return the process-wide topic store"""
+    global _TOPIC_STORE
+    if _TOPIC_STORE is None:
+        with _TOPIC_STORE_LOCK:
+            if _TOPIC_STORE is None:
+                _TOPIC_STORE = TopicStore(SetupConfig.TOPIC_STORE_PATH)
+    return _TOPIC_STORE
@@ -0,0 +1,257 @@
+# ********** IMPORT FRAMEWORK **********
+from setup      import LOGGER
+
+# ********** IMPORT LIBRARIES **********
+from collections        import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing             import Callable
+import random
+import threading
+import time
+import requests
+from requests.adapters  import HTTPAdapter
+
+try:
+    import orjson
+
+    def _loads(body: bytes):
+        return orjson.loads(body)
+except ImportError:  # orjson is optional, the standard library parser is the fallback
+    import json
+
+    def _loads(body: bytes):
+        return json.loads(body)
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised without calling upstream while the circuit breaker is open"""
+
+class UpstreamCounters:
+    """
+    Thread-safe counters describing the upstream client's behaviour.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def incr(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._counts[name] = self._counts.get(name, 0) + value
+
+    def snapshot(self) -> dict:
+        """Return a copy of the current counter values"""
+        with self._lock:
+            return dict(self._counts)
+
+class CircuitBreaker:
+    """
+    Opens after 'failure_threshold' consecutive failures and rejects calls for
+    'reset_timeout_s'. Afterwards a single trial call is let through (half-open); its
+    outcome closes the breaker or opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout_s: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout_s:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        """Return True if a call may be sent now"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout_s or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def release(self) -> None:
+        """Give back a half-open trial slot that was not used"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    LOGGER.warning(f"Circuit breaker opened after {self._failures} consecutive failures.")
+                self._opened_at = time.monotonic()
+
+class LatencyTracker:
+    """
+    Rolling window of request latencies used to pick the hedging delay.
+    """
+
+    def __init__(self, window: int = 200):
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=window)
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float, min_samples: int = 20) -> float | None:
+        """Return the latency percentile, or None with fewer than 'min_samples' samples"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+class ResilientHttpClient:
+    """
+    HTTP client for idempotent upstream GETs with bounded tail latency:
+
+    - pooled keep-alive session with connect/read timeouts on every request;
+    - retries of timeouts, connection errors and 429/5xx with jittered exponential backoff
+      (Retry-After is honoured for 429);
+    - a circuit breaker that fails fast while upstream is unhealthy;
+    - optional hedging: when a request is still running after the observed p95 latency, a
+      second identical request is sent and the first successful answer wins.
+
+    'acquire' is called before every request sent upstream (hedge=True for hedges) so a rate
+    limiter can account for retries and hedges too; returning False aborts a primary request
+    and skips a hedge.
+    """
+
+    def __init__(self,
+                 connect_timeout_s: float = 3.05,
+                 read_timeout_s: float = 10.0,
+                 max_retries: int = 2,
+                 backoff_base_s: float = 0.5,
+                 backoff_max_s: float = 8.0,
+                 breaker: CircuitBreaker | None = None,
+                 hedge_enabled: bool = False,
+                 hedge_min_samples: int = 20,
+                 pool_size: int = 20):
+        self.timeout = (connect_timeout_s, read_timeout_s)
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.breaker = breaker or CircuitBreaker()
+        self.hedge_enabled = hedge_enabled
+        self.hedge_min_samples = hedge_min_samples
+        self.counters = UpstreamCounters()
+        self.latency = LatencyTracker()
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._hedge_executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="upstream-hedge")
+
+    def get_json(self, url: str, params: dict, acquire: Callable[[bool], bool] | None = None) -> dict:
+        """
+        GET a JSON document with timeouts, retries, circuit breaking and optional hedging.
+
+        Args:
+            url (str): Endpoint URL.
+            params (dict): Query parameters.
+            acquire (Callable[[bool], bool] | None): Permit hook called before each request.
+
+        Returns:
+            dict: The decoded JSON response.
+
+        Raises:
+            requests.exceptions.RequestException: On a non-retryable error, when retries are
+                exhausted, when the breaker is open or when no permit was granted.
+        """
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self.counters.incr("breaker_rejected")
+                raise CircuitOpenError(f"Upstream circuit open, request to {url} not sent.")
+            if acquire and not acquire(False):
+                self.breaker.release()
+                self.counters.incr("rate_limited")
+                raise requests.exceptions.RequestException("Upstream rate limit reached, request not sent.")
+
+            try:
+                response = self._send(url, params, acquire)
+                self.breaker.record_success()
+                try:
+                    # *************** Decoded once, straight from the body bytes
+                    return _loads(response.content)
+                except ValueError as e:
+                    raise requests.exceptions.InvalidJSONError(f"Invalid JSON from {url}: {e}", response=response)
+            except requests.exceptions.RequestException as e:
+                status = getattr(getattr(e, "response", None), "status_code", None)
+                retryable = status in RETRYABLE_STATUS or isinstance(e, (requests.exceptions.Timeout,
+                                                                          requests.exceptions.ConnectionError))
+                if not retryable:
+                    # *************** 4xx answers mean upstream is healthy, the request is wrong
+                    self.breaker.record_success()
+                    self.counters.incr("client_errors")
+                    raise
+
+                self.breaker.record_failure()
+                self.counters.incr("timeouts" if isinstance(e, requests.exceptions.Timeout) else "upstream_errors")
+                if attempt >= self.max_retries:
+                    LOGGER.error(f"Upstream request failed after {attempt + 1} attempts: {e}")
+                    raise
+
+                attempt += 1
+                self.counters.incr("retries")
+                time.sleep(self._backoff(attempt, getattr(e, "response", None)))
+
+    def _send(self, url: str, params: dict, acquire: Callable[[bool], bool] | None) -> requests.Response:
+        hedge_after = self.latency.percentile(95, self.hedge_min_samples) if self.hedge_enabled else None
+        if hedge_after is None:
+            return self._timed_get(url, params)
+
+        primary = self._hedge_executor.submit(self._timed_get, url, params)
+        done, _ = wait([primary], timeout=hedge_after)
+        if done or (acquire and not acquire(True)):
+            return primary.result()
+
+        self.counters.incr("hedges")
+        hedge = self._hedge_executor.submit(self._timed_get, url, params)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                    if future is hedge:
+                        self.counters.incr("hedge_wins")
+                    return response
+                except requests.exceptions.RequestException as e:
+                    error = e
+        raise error
+
+    def _timed_get(self, url: str, params: dict) -> requests.Response:
+        started = time.monotonic()
+        self.counters.incr("requests")
+        response = self._session.get(url, params=params, timeout=self.timeout)
+        self.latency.add(time.monotonic() - started)
+        response.raise_for_status()
+        return response
+
+    def _backoff(self, attempt: int, response: requests.Response | None) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.backoff_max_s)
+        return random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * (2 ** attempt)))
@@ -0,0 +1,198 @@
+# ********** IMPORT FRAMEWORK **********
+from setup      import (SetupApi,
+                        SetupConfig,
+                        LOGGER,
+                      )
+
+# ********** IMPORT LIBRARIES **********
+from concurrent.futures import Future
+from typing             import Dict, List
+import threading
+import requests
+
+from helper.rate_limit_helper     import SingleFlight, TokenBucket, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+from helper.upstream_client_helper import ResilientHttpClient, CircuitBreaker
+
+WEATHER_URL = "https://api.openweathermap.org/data/2.5/weather"
+FORECAST_URL = "https://api.openweathermap.org/data/2.5/forecast"
+GROUP_URL = "https://api.openweathermap.org/data/2.5/group"
+
+# OpenWeather accepts at most 20 city ids per group request
+GROUP_MAX_IDS = 20
+
+_SINGLE_FLIGHT = SingleFlight()
+_RATE_LIMITER = None
+_RATE_LIMITER_LOCK = threading.Lock()
+_UPSTREAM_CLIENT = None
+_UPSTREAM_CLIENT_LOCK = threading.Lock()
+
+def get_rate_limiter() -> TokenBucket:
+    """Return the token bucket shared by every OpenWeather call of this host"""
+    global _RATE_LIMITER
+    if _RATE_LIMITER is None:
+        with _RATE_LIMITER_LOCK:
+            if _RATE_LIMITER is None:
+                _RATE_LIMITER = TokenBucket(rate_per_minute=SetupConfig.OPENWEATHER_CALLS_PER_MINUTE,
+                                            capacity=SetupConfig.OPENWEATHER_BURST,
+                                            state_path=SetupConfig.OPENWEATHER_LIMIT_STATE_PATH or None)
+    return _RATE_LIMITER
+
+def get_upstream_client() -> ResilientHttpClient:
+    """Return the OpenWeather HTTP client (timeouts, retries, circuit breaker, hedging)"""
+    global _UPSTREAM_CLIENT
+    if _UPSTREAM_CLIENT is None:
+        with _UPSTREAM_CLIENT_LOCK:
+            if _UPSTREAM_CLIENT is None:
+                _UPSTREAM_CLIENT = ResilientHttpClient(connect_timeout_s=SetupConfig.OPENWEATHER_CONNECT_TIMEOUT_S,
+                                                       read_timeout_s=SetupConfig.OPENWEATHER_READ_TIMEOUT_S,
+                                                       max_retries=SetupConfig.OPENWEATHER_MAX_RETRIES,
+                                                       backoff_base_s=SetupConfig.OPENWEATHER_BACKOFF_BASE_S,
+                                                       backoff_max_s=SetupConfig.OPENWEATHER_BACKOFF_MAX_S,
+                                                       breaker=CircuitBreaker(SetupConfig.OPENWEATHER_BREAKER_FAILURES,
+                                                                              SetupConfig.OPENWEATHER_BREAKER_RESET_S),
+                                                       hedge_enabled=SetupConfig.OPENWEATHER_HEDGE_ENABLED)
+    return _UPSTREAM_CLIENT
+
+def get_upstream_metrics() -> dict:
+    """Counters of the OpenWeather client plus coalescing and breaker state"""
+    client = get_upstream_client()
+    return {**client.counters.snapshot(),
+            "coalesced": _SINGLE_FLIGHT.coalesced,
+            "breaker_state": client.breaker.state,
+            "latency_p95_s": client.latency.percentile(95, min_samples=1)}
+
+# *************** Function to call one OpenWeather endpoint
+def fetch_weather(url: str, params: dict, priority: int = PRIORITY_INTERACTIVE) -> dict:
+    """
+    Call an OpenWeather endpoint and decode the JSON response.
+
+    Identical concurrent calls are coalesced into one upstream request, and every request
+    waits for a token from the shared rate limiter.
+
+    Args:
+        url (str): Endpoint URL.
+        params (dict): Query parameters without the API key.
+        priority (int): Rate limiter queue priority, lower values are served first.
+
+    Returns:
+        dict: The decoded response.
+
+    Raises:
+        requests.exceptions.RequestException: If the call fails, returns an error status or
+            no rate limit token was available in time.
+    """
+    key = (url, tuple(sorted((k, str(v)) for k, v in params.items())))
+    return _SINGLE_FLIGHT.do(key, lambda: _rate_limited_get(url, params, priority))
+
+def _rate_limited_get(url: str, params: dict, priority: int) -> dict:
+    def acquire(hedge: bool) -> bool:
+        # *************** Hedges only use spare quota, they never queue
+        if hedge:
+            return get_rate_limiter().acquire(PRIORITY_BACKGROUND, timeout=0)
+        granted = get_rate_limiter().acquire(priority, SetupConfig.OPENWEATHER_LIMIT_QUEUE_TIMEOUT_S)
+        if not granted:
+            LOGGER.warning("OpenWeather rate limiter queue timeout reached.")
+        return granted
+
+    full_params = {"appid": SetupApi.weather_key, **params}
+    return get_upstream_client().get_json(url, full_params, acquire)
+
+class CurrentWeatherBatcher:
+    """
+    Collects current-weather lookups by city id and sends them as grouped
+    '/data/2.5/group?id=1,2,3' requests.
+
+    Lookups sharing the same options (units, lang) are grouped when they arrive within
+    'window_s' of each other, whether they come from one multi-city turn or from concurrent
+    sessions. A batch is sent as soon as it reaches GROUP_MAX_IDS ids. The grouped result is
+    split back into one payload per city id.
+    """
+
+    def __init__(self, window_s: float = 0.05, group_enabled: bool = True):
+        self.window_s = window_s
+        self.group_enabled = group_enabled
+        self._lock = threading.Lock()
+        self._pending = {}  # options key -> [(city_id, Future), ...]
+
+    def fetch_many(self, params_list: List[Dict]) -> List[Dict | Exception]:
+        """
+        Fetch the current weather for several city ids.
+
+        Args:
+            params_list (List[Dict]): Query parameters, each holding an 'id' plus optional options.
+
+        Returns:
+            List[Dict | Exception]: The payload for each input, or the exception raised for it.
+        """
+        futures = [self.submit(params) for params in params_list]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def submit(self, params: dict) -> Future:
+        """Queue one city id lookup and return a future for its payload"""
+        options = {key: value for key, value in params.items() if key != "id"}
+        key = tuple(sorted((k, str(v)) for k, v in options.items()))
+        future = Future()
+
+        with self._lock:
+            batch = self._pending.setdefault(key, [])
+            batch.append((str(params["id"]), future))
+            if len(batch) == 1:
+                timer = threading.Timer(self.window_s, self._flush, args=(key, options))
+                timer.daemon = True
+                timer.start()
+            full = len(batch) >= GROUP_MAX_IDS
+
+        if full:
+            self._flush(key, options)
+        return future
+
+    def _flush(self, key: tuple, options: dict) -> None:
+        with self._lock:
+            batch = self._pending.pop(key, [])
+        if not batch:
+            return
+
+        try:
+            payloads = self._request(sorted({city_id for city_id, _ in batch}), options)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for city_id, future in batch:
+            payload = payloads.get(city_id)
+            if payload is None:
+                future.set_exception(requests.exceptions.RequestException(f"City id {city_id} missing from grouped response."))
+            else:
+                future.set_result(payload)
+
+    def _request(self, city_ids: List[str], options: dict) -> Dict[str, dict]:
+        if len(city_ids) == 1 or not self.group_enabled:
+            payloads = {}
+            for city_id in city_ids:
+                payloads[city_id] = fetch_weather(WEATHER_URL, {"id": city_id, **options})
+            return payloads
+
+        group_options = {key: value for key, value in options.items() if key != "cnt"}
+        response = fetch_weather(GROUP_URL, {"id": ",".join(city_ids), **group_options})
+        LOGGER.info(f"Grouped current weather request for {len(city_ids)} cities.")
+        return {str(entry.get("id")): entry for entry in response.get("list", [])}
+
+_BATCHER = None
+_BATCHER_LOCK = threading.Lock()
+
+def get_current_weather_batcher() -> CurrentWeatherBatcher:
+    """Return the process-wide current weather batcher"""
+    global _BATCHER
+    if _BATCHER is None:
+        with _BATCHER_LOCK:
+            if _BATCHER is None:
+                _BATCHER = CurrentWeatherBatcher(window_s=SetupConfig.WEATHER_BATCH_WINDOW_MS / 1000,
+                                                 group_enabled=SetupConfig.WEATHER_GROUP_ENABLED)
+    return _BATCHER
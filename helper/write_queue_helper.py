@@ -0,0 +1,235 @@
+# ********** IMPORT FRAMEWORK **********
+from setup      import LOGGER
+
+# ********** IMPORT LIBRARIES **********
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing             import Callable, List
+import atexit
+import queue
+import random
+import threading
+import time
+
+# Error code of the Data API when an '_id' is already stored
+DUPLICATE_ERROR_CODE = "DOCUMENT_ALREADY_EXISTS"
+
+def _duplicates_only(error: Exception) -> bool:
+    """True when an insert_many error only reports documents whose '_id' already exists"""
+    descriptors = getattr(error, "error_descriptors", None) or []
+    return bool(descriptors) and all(getattr(descriptor, "error_code", None) == DUPLICATE_ERROR_CODE
+                                     for descriptor in descriptors)
+
+# ********** Acknowledgement handed back to the caller of submit()
+class WriteTicket:
+    """
+    Durability acknowledgement for one submission to the write queue.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._future = Future()
+
+    def done(self) -> bool:
+        """Return True once the records are written (or failed for good)"""
+        return self._future.done()
+
+    def wait(self, timeout: float | None = None) -> int:
+        """
+        Block until the records are durable.
+
+        Args:
+            timeout (float | None): Seconds to wait, None waits forever.
+
+        Returns:
+            int: Number of records written.
+
+        Raises:
+            Exception: The last insert error if every retry failed.
+        """
+        return self._future.result(timeout)
+
+class _FlushRequest:
+    def __init__(self):
+        self.future = Future()
+
+# ********** Asynchronous, batched writer
+class WeatherWriteQueue:
+    """
+    Write-behind queue in front of collection.insert_many.
+
+    Submissions are accumulated by a background thread and flushed when the batch reaches
+    'batch_size' records or 'flush_interval_s' seconds have passed since the first pending
+    record. Each batch is split into chunks that are inserted concurrently, with retries and
+    exponential backoff. The queue is bounded, so submit() blocks when writers fall behind.
+    Records carry a content-derived '_id', so documents that already exist are skipped and
+    retries of a partly applied chunk are safe.
+    """
+
+    def __init__(self,
+                 get_collection: Callable,
+                 on_written: Callable[[List[dict]], None] | None = None,
+                 batch_size: int = 100,
+                 flush_interval_s: float = 1.0,
+                 max_pending: int = 1000,
+                 chunk_size: int = 20,
+                 concurrency: int = 4,
+                 max_retries: int = 3,
+                 retry_backoff_s: float = 0.5,
+                 timeout_ms: int | None = None):
+        self._get_collection = get_collection
+        self._on_written = on_written
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+        self.retry_backoff_s = retry_backoff_s
+        self.timeout_ms = timeout_ms
+
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="weather-writer")
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="weather-write-queue", daemon=True)
+        self._worker.start()
+
+    def submit(self, records: List[dict], timeout: float | None = None) -> WriteTicket:
+        """
+        Queue records for insertion.
+
+        Args:
+            records (List[dict]): Documents to insert.
+            timeout (float | None): Seconds to block when the queue is full (backpressure).
+
+        Returns:
+            WriteTicket: Acknowledgement resolved once the records are durable.
+        """
+        if self._closed:
+            raise RuntimeError("Write queue is closed.")
+
+        ticket = WriteTicket(len(records))
+        if not records:
+            ticket._future.set_result(0)
+            return ticket
+
+        self._queue.put((list(records), ticket), timeout=timeout)
+        return ticket
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Write everything submitted so far and wait for it.
+
+        Args:
+            timeout (float | None): Seconds to wait.
+
+        Returns:
+            bool: True if all pending records were flushed within the timeout.
+        """
+        request = _FlushRequest()
+        self._queue.put(request)
+        try:
+            request.future.result(timeout)
+            return True
+        except Exception:
+            return False
+
+    def close(self, timeout: float | None = 10.0) -> None:
+        """Flush pending records and stop the background worker"""
+        if self._closed:
+            return
+        self.flush(timeout)
+        self._closed = True
+        self._queue.put(None)
+        self._worker.join(timeout)
+        self._executor.shutdown(wait=False)
+
+    def _run(self) -> None:
+        pending = []
+        pending_count = 0
+        deadline = None
+
+        while True:
+            wait_for = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=wait_for)
+            except queue.Empty:
+                item = False
+
+            if item is None:
+                self._write_batch(pending)
+                return
+
+            if isinstance(item, _FlushRequest):
+                self._write_batch(pending)
+                pending, pending_count, deadline = [], 0, None
+                item.future.set_result(True)
+                continue
+
+            if item:
+                pending.append(item)
+                pending_count += len(item[0])
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval_s
+
+            if pending and (pending_count >= self.batch_size or time.monotonic() >= deadline):
+                self._write_batch(pending)
+                pending, pending_count, deadline = [], 0, None
+
+    def _write_batch(self, pending: list) -> None:
+        if not pending:
+            return
+
+        # *************** Flatten submissions and remember which chunk each one landed in
+        records, owners = [], []
+        for index, (submission, _) in enumerate(pending):
+            records.extend(submission)
+            owners.extend([index] * len(submission))
+
+        chunks = [range(start, min(start + self.chunk_size, len(records)))
+                  for start in range(0, len(records), self.chunk_size)]
+        futures = [self._executor.submit(self._insert_with_retry, [records[i] for i in chunk]) for chunk in chunks]
+
+        failed = {}
+        for chunk, future in zip(chunks, futures):
+            try:
+                future.result()
+            except Exception as e:
+                for i in chunk:
+                    failed[owners[i]] = e
+
+        written = []
+        for index, (submission, ticket) in enumerate(pending):
+            if index in failed:
+                ticket._future.set_exception(failed[index])
+            else:
+                written.extend(submission)
+                ticket._future.set_result(len(submission))
+
+        LOGGER.info(f"Write queue flushed {len(written)} records in {len(chunks)} chunks ({len(records) - len(written)} failed).")
+        if written and self._on_written:
+            try:
+                self._on_written(written)
+            except Exception as e:
+                LOGGER.error(f"Error in write queue callback: {str(e)}")
+
+    def _insert_with_retry(self, chunk: List[dict]) -> int:
+        attempt = 0
+        while True:
+            try:
+                kwargs = {"max_time_ms": self.timeout_ms} if self.timeout_ms else {}
+                result = self._get_collection().insert_many(chunk, **kwargs)
+                return len(result.inserted_ids)
+            except Exception as e:
+                if _duplicates_only(e):
+                    inserted = len(getattr(getattr(e, "partial_result", None), "inserted_ids", []) or [])
+                    LOGGER.info(f"Skipped {len(chunk) - inserted} already stored records.")
+                    return inserted
+                attempt += 1
+                if attempt > self.max_retries:
+                    LOGGER.error(f"Insert failed after {self.max_retries} retries: {str(e)}")
+                    raise
+                backoff = self.retry_backoff_s * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+                LOGGER.warning(f"Insert failed (attempt {attempt}), retrying in {backoff:.2f}s: {str(e)}")
+                time.sleep(backoff)
+
+def register_shutdown(write_queue: WeatherWriteQueue) -> None:
+    """Flush the queue when the interpreter exits"""
+    atexit.register(write_queue.close)
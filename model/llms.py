@@ -1,14 +1,271 @@
-from langchain_openai import ChatOpenAI
-import sys 
+from dataclasses import dataclass, replace
+from contextlib import closing, contextmanager
+from contextvars import ContextVar
+from functools import partial
+from typing import Any, Callable, Iterator, List, TYPE_CHECKING
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.runnables import Runnable, RunnableLambda
+from pydantic import BaseModel, ValidationError
+import json
+import sys
 import os
+import threading
+import time
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from setup import SetupApi
+from setup import SetupApi, SetupConfig, LOGGER
+from helper.structured_output_helper import PARSE_STATS, OutputParseError
 
-def LLM(temperature: float = 0.6) -> ChatOpenAI:
-    model = ChatOpenAI(
+# *************** langchain_openai (and openai, httpx, tiktoken) load on the first model build
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
+# ********** Per-stage model configuration
+@dataclass(frozen=True)
+class ModelProfile:
+    """
+    Model configuration used by one stage of the chat pipeline.
+    """
+    model_name: str
+    temperature: float
+    max_tokens: int
+    timeout: float
+    fallback_model: str | None = None
+
+MODEL_PROFILES = {
+    # *************** Long-form answers keep the larger budget
+    "default": ModelProfile(SetupConfig.LLM_MODEL, 0.6, 4096, 60, SetupConfig.LLM_FALLBACK_MODEL),
+    "format_weather": ModelProfile(SetupConfig.LLM_MODEL, 0.6, 1200, 45, SetupConfig.LLM_FALLBACK_MODEL),
+    "analysis_response": ModelProfile(SetupConfig.LLM_MODEL, 0.4, 1500, 45, SetupConfig.LLM_FALLBACK_MODEL),
+    "query_code": ModelProfile(SetupConfig.LLM_MODEL, 0.0, 800, 30, SetupConfig.LLM_FALLBACK_MODEL),
+    "extract": ModelProfile(SetupConfig.LLM_MODEL, 0.0, 1500, 30, SetupConfig.LLM_FALLBACK_MODEL),
+    # *************** Short structured stages run on the fast model with tight caps
+    "intent": ModelProfile(SetupConfig.LLM_FAST_MODEL, 0.0, 150, 15, SetupConfig.LLM_FALLBACK_MODEL),
+    "filter": ModelProfile(SetupConfig.LLM_FAST_MODEL, 0.0, 300, 15, SetupConfig.LLM_FALLBACK_MODEL),
+    "filter_delta": ModelProfile(SetupConfig.LLM_FAST_MODEL, 0.0, 120, 10),
+    "topic": ModelProfile(SetupConfig.LLM_FAST_MODEL, 0.3, 16, 10),
+    "reply": ModelProfile(SetupConfig.LLM_FAST_MODEL, 0.6, 300, 20, SetupConfig.LLM_FALLBACK_MODEL),
+}
+
+def get_profile(profile: str) -> ModelProfile:
+    """Return a stage profile, falling back to 'default' for unknown names"""
+    return MODEL_PROFILES.get(profile, MODEL_PROFILES["default"])
+
+def register_profile(name: str, profile: ModelProfile) -> None:
+    """Add or replace a stage profile"""
+    MODEL_PROFILES[name] = profile
+
+# ********** Whole-request time budget
+_REQUEST_DEADLINE: ContextVar[float | None] = ContextVar("request_deadline", default=None)
+
+class DeadlineExceeded(Exception):
+    """Raised when a stage has no time budget left and no local fallback"""
+
+@contextmanager
+def request_deadline(seconds: float):
+    """
+    Give every LLM stage run inside the block a shared time budget.
+
+    Args:
+        seconds (float): Total budget for the request.
+    """
+    token = _REQUEST_DEADLINE.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _REQUEST_DEADLINE.reset(token)
+
+# ********** Token usage of the structured stages run inside a block
+_TOKEN_METER: ContextVar[List[int] | None] = ContextVar("token_meter", default=None)
+
+@contextmanager
+def meter_tokens() -> Iterator[List[int]]:
+    """Count the tokens of the structured LLM calls made inside the block, in [0] of the yielded list"""
+    used = [0]
+    token = _TOKEN_METER.set(used)
+    try:
+        yield used
+    finally:
+        _TOKEN_METER.reset(token)
+
+def _record_usage(message: Any) -> None:
+    meter = _TOKEN_METER.get()
+    usage = getattr(message, "usage_metadata", None)
+    if meter is not None and usage:
+        meter[0] += int(usage.get("total_tokens", 0))
+
+def remaining_budget() -> float | None:
+    """Seconds left in the current request budget, None when no budget is set"""
+    deadline = _REQUEST_DEADLINE.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+def invoke_with_deadline(chain, inputs: dict, local_fallback: Callable[[dict], Any] | None = None, stage: str = "llm") -> Any:
+    """
+    Invoke a chain within the request budget, degrading to a local fallback when the budget is
+    spent or when the primary and fallback models both fail.
+
+    Args:
+        chain: The runnable chain to invoke.
+        inputs (dict): Chain inputs, also passed to the local fallback.
+        local_fallback (Callable | None): Deterministic replacement for the chain output.
+        stage (str): Stage name used in log messages.
+
+    Returns:
+        Any: The chain output, or the local fallback output.
+
+    Raises:
+        DeadlineExceeded: If the budget is spent and there is no local fallback.
+    """
+    remaining = remaining_budget()
+    if remaining is not None and remaining < SetupConfig.LLM_MIN_STAGE_BUDGET_S:
+        LOGGER.warning(f"Stage '{stage}' skipped, {remaining:.1f}s left in request budget.")
+        if local_fallback is None:
+            raise DeadlineExceeded(f"No time budget left for stage '{stage}'.")
+        return local_fallback(inputs)
+
+    try:
+        return chain.invoke(inputs)
+    except Exception as e:
+        if local_fallback is None:
+            raise
+        LOGGER.error(f"Stage '{stage}' failed, using local fallback: {str(e)}")
+        return local_fallback(inputs)
+
+def _chat_model(profile: ModelProfile, model_name: str, has_fallback: bool) -> "ChatOpenAI":
+    from langchain_openai import ChatOpenAI
+
+    # *************** The per-call deadline never outlives the request budget
+    timeout = profile.timeout
+    remaining = remaining_budget()
+    if remaining is not None:
+        timeout = max(1.0, min(timeout, remaining))
+
+    return ChatOpenAI(
         api_key=SetupApi.open_ai_key,
-        model_name="gpt-4o-mini",
-        temperature=temperature,
-        max_tokens=4096
+        model_name=model_name,
+        temperature=profile.temperature,
+        max_tokens=profile.max_tokens,
+        timeout=timeout,
+        max_retries=0 if has_fallback else 1
     )
-    return model
\ No newline at end of file
+
+def _structured_result(output: dict, stage: str) -> dict:
+    # *************** include_raw keeps parse errors visible here, so they count and can fail over
+    _record_usage(output.get("raw"))
+    parsed = output.get("parsed")
+    if output.get("parsing_error") is not None or parsed is None:
+        PARSE_STATS.record(stage, ok=False)
+        raise OutputParseError(f"Stage '{stage}' tool call did not match the schema: {output.get('parsing_error')}")
+    PARSE_STATS.record(stage, ok=True)
+    return parsed.model_dump(exclude_none=True)
+
+def _structured_model(model: "ChatOpenAI", schema: type[BaseModel], stage: str) -> Runnable:
+    structured = model.with_structured_output(schema, method="function_calling", include_raw=True)
+    return structured | RunnableLambda(partial(_structured_result, stage=stage))
+
+def _early_result(prompt: Any, model: Runnable, schema: type[BaseModel], stage: str, ready: Callable[[dict], bool]) -> dict:
+    # *************** Streamed directly: a parser step would drain the rest of the stream after the stop
+    message: AIMessageChunk | None = None
+    arguments = {}
+    with closing(model.stream(prompt)) as chunks:
+        for chunk in chunks:
+            message = chunk if message is None else message + chunk
+            # *************** Chunk tool_calls hold the arguments parsed so far as partial JSON
+            arguments = message.tool_calls[0]["args"] if message.tool_calls else {}
+            if arguments and ready(arguments):
+                break
+    _record_usage(message)
+    try:
+        parsed = schema.model_validate(arguments)
+    except ValidationError as e:
+        PARSE_STATS.record(stage, ok=False)
+        raise OutputParseError(f"Stage '{stage}' tool call did not match the schema: {str(e)}") from e
+    PARSE_STATS.record(stage, ok=True)
+    return parsed.model_dump(exclude_none=True)
+
+# ********** Offline mock backend (SetupConfig.LLM_BACKEND = "mock")
+_MOCK_RESPONSES = {}
+_MOCK_CALLS = {}
+_MOCK_LOCK = threading.Lock()
+_MOCK_FILE_LOADED = False
+
+def register_mock_response(stage: str, response: Any) -> None:
+    """
+    Set the mock output of a stage. A list is returned item by item, cycling.
+
+    Args:
+        stage (str): Profile name passed to LLM(), e.g. "intent" or "format_weather".
+        response (Any): Text for plain stages, a dict matching the schema for structured stages.
+    """
+    with _MOCK_LOCK:
+        _MOCK_RESPONSES[stage] = response
+        _MOCK_CALLS[stage] = 0
+
+def _load_mock_responses() -> None:
+    # *************** Responses registered in code take precedence over the file
+    global _MOCK_FILE_LOADED
+    _MOCK_FILE_LOADED = True
+    path = SetupConfig.LLM_MOCK_RESPONSES_PATH
+    if not path or not os.path.exists(path):
+        return
+    with open(path, encoding="utf-8") as file:
+        for stage, response in json.load(file).items():
+            _MOCK_RESPONSES.setdefault(stage, response)
+
+def _mock_invoke(prompt: Any, stage: str, schema: type[BaseModel] | None) -> Any:
+    with _MOCK_LOCK:
+        if not _MOCK_FILE_LOADED:
+            _load_mock_responses()
+        response = _MOCK_RESPONSES.get(stage)
+        if isinstance(response, list) and response:
+            call = _MOCK_CALLS.get(stage, 0)
+            _MOCK_CALLS[stage] = call + 1
+            response = response[call % len(response)]
+
+    if schema is None:
+        return AIMessage(content=str(response) if response is not None else f"Mock answer for stage '{stage}'.")
+    if response is None:
+        # *************** Without a canned answer the stage's deterministic local fallback is used
+        raise OutputParseError(f"No mock response registered for stage '{stage}'.")
+    return _structured_result({"parsed": schema.model_validate(response)}, stage)
+
+def LLM(profile: str = "default", temperature: float | None = None, schema: type[BaseModel] | None = None,
+        ready: Callable[[dict], bool] | None = None) -> Runnable:
+    """
+    Build the chat model for a pipeline stage.
+
+    Args:
+        profile (str): Name of the stage profile in MODEL_PROFILES.
+        temperature (float | None): Override the profile temperature.
+        schema (type[BaseModel] | None): Return a validated dict of this model through tool
+            calling instead of a message.
+        ready (Callable | None): With a schema, stream the tool arguments and return as soon
+            as the partial arguments pass this check, before generation finishes.
+
+    Returns:
+        Runnable: The model, wrapped with its fallback model when the profile has one.
+    """
+    if SetupConfig.LLM_BACKEND == "mock":
+        return RunnableLambda(partial(_mock_invoke, stage=profile, schema=schema), name=f"mock_{profile}")
+
+    model_profile = get_profile(profile)
+    if temperature is not None:
+        model_profile = replace(model_profile, temperature=temperature)
+
+    has_fallback = bool(model_profile.fallback_model) and model_profile.fallback_model != model_profile.model_name
+    models = [_chat_model(model_profile, model_profile.model_name, has_fallback)]
+    if has_fallback:
+        models.append(_chat_model(model_profile, model_profile.fallback_model, False))
+    if schema is not None and ready is not None:
+        models = [model.bind_tools([schema], tool_choice=schema.__name__) for model in models]
+    elif schema is not None:
+        models = [_structured_model(model, schema, profile) for model in models]
+
+    model = models[0]
+    if len(models) > 1:
+        model = model.with_fallbacks(models[1:])
+    if schema is not None and ready is not None:
+        return RunnableLambda(partial(_early_result, model=model, schema=schema, stage=profile, ready=ready),
+                              name=f"early_{profile}")
+    return model
@@ -0,0 +1,341 @@
+# ********** IMPORT LIBRARIES **********
+from dataclasses    import dataclass, replace
+from datetime       import datetime, timedelta, timezone
+from typing         import Any
+import numpy as np
+
+try:
+    import orjson
+
+    def _loads(body: bytes | str) -> Any:
+        return orjson.loads(body)
+except ImportError:  # orjson is optional, the standard library parser is the fallback
+    import json
+
+    def _loads(body: bytes | str) -> Any:
+        return json.loads(body)
+
+# *************** One row per 3-hour forecast step; 'condition' indexes ForecastSeries.conditions
+FORECAST_DTYPE = np.dtype([
+    ("dt", "i8"),
+    ("temp", "f4"),
+    ("feels_like", "f4"),
+    ("temp_min", "f4"),
+    ("temp_max", "f4"),
+    ("pressure", "f4"),
+    ("humidity", "f4"),
+    ("clouds", "f4"),
+    ("visibility", "f4"),
+    ("wind_speed", "f4"),
+    ("wind_deg", "f4"),
+    ("wind_gust", "f4"),
+    ("pop", "f4"),
+    ("rain_3h", "f4"),
+    ("snow_3h", "f4"),
+    ("condition", "u1"),
+])
+
+# *************** Function helpers for units and local times
+def to_celsius(value: float | None, units: str) -> float | None:
+    """Convert a temperature in the requested OpenWeather units to Celsius"""
+    if value is None:
+        return None
+    if units == "imperial":
+        return round((value - 32) * 5 / 9, 2)
+    if units == "metric":
+        return value
+    return round(value - 273.15, 2)
+
+def convert_temperature(value: float | None, from_units: str, to_units: str) -> float | None:
+    """Convert a temperature between OpenWeather units (standard = Kelvin)"""
+    if value is None or from_units == to_units:
+        return value
+    celsius = to_celsius(value, from_units)
+    if to_units == "imperial":
+        return round(celsius * 9 / 5 + 32, 2)
+    if to_units == "metric":
+        return celsius
+    return round(celsius + 273.15, 2)
+
+def convert_speed(value: float | None, from_units: str, to_units: str) -> float | None:
+    """Convert a wind speed between OpenWeather units (mph for imperial, m/s otherwise)"""
+    if value is None or (from_units == "imperial") == (to_units == "imperial"):
+        return value
+    return round(value / 0.44704 if to_units == "imperial" else value * 0.44704, 2)
+
+def temperature_symbol(units: str) -> str:
+    return {"metric": "°C", "imperial": "°F"}.get(units, " K")
+
+def local_datetime(timestamp: int, offset: int) -> datetime:
+    """UTC epoch seconds shifted to the location's local wall time"""
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc) + timedelta(seconds=offset)
+
+def format_offset(offset: int) -> str:
+    """Timezone offset in seconds as 'UTC+8' / 'UTC-5:30'"""
+    sign = "+" if offset >= 0 else "-"
+    hours, minutes = divmod(abs(offset) // 60, 60)
+    return f"UTC{sign}{hours}" + (f":{minutes:02d}" if minutes else "")
+
+def _float(value: Any) -> float | None:
+    return float(value) if value is not None else None
+
+@dataclass(frozen=True, slots=True)
+class WeatherObservation:
+    """
+    Current weather of one location, parsed from an OpenWeather /weather (or /group) entry.
+    Temperatures and wind speed are in the requested 'units'.
+    """
+    city_id: int
+    name: str
+    country: str
+    lat: float
+    lon: float
+    timezone_offset: int
+    observed_at: int
+    condition: str
+    description: str
+    temp: float
+    feels_like: float
+    temp_min: float
+    temp_max: float
+    pressure: float
+    humidity: float
+    visibility: float | None
+    wind_speed: float
+    wind_deg: float | None
+    wind_gust: float | None
+    clouds: float
+    sunrise: int | None
+    sunset: int | None
+    units: str = "standard"
+
+    @classmethod
+    def from_payload(cls, payload: dict, units: str = "standard") -> "WeatherObservation":
+        """
+        Build an observation from a decoded current weather entry.
+
+        Args:
+            payload (dict): One current weather entry.
+            units (str): Units the entry was requested in.
+
+        Returns:
+            WeatherObservation: The parsed observation.
+        """
+        main = payload.get("main", {})
+        wind = payload.get("wind", {})
+        sys_info = payload.get("sys", {})
+        coord = payload.get("coord", {})
+        weather = payload.get("weather") or [{}]
+        return cls(city_id=int(payload.get("id", 0)),
+                   name=payload.get("name", ""),
+                   country=sys_info.get("country", ""),
+                   lat=float(coord.get("lat", 0.0)),
+                   lon=float(coord.get("lon", 0.0)),
+                   timezone_offset=int(payload.get("timezone", sys_info.get("timezone", 0))),
+                   observed_at=int(payload.get("dt", 0)),
+                   condition=weather[0].get("main", ""),
+                   description=", ".join(item.get("description", "") for item in weather if item),
+                   temp=float(main.get("temp", 0.0)),
+                   feels_like=float(main.get("feels_like", main.get("temp", 0.0))),
+                   temp_min=float(main.get("temp_min", main.get("temp", 0.0))),
+                   temp_max=float(main.get("temp_max", main.get("temp", 0.0))),
+                   pressure=float(main.get("pressure", 0.0)),
+                   humidity=float(main.get("humidity", 0.0)),
+                   visibility=_float(payload.get("visibility")),
+                   wind_speed=float(wind.get("speed", 0.0)),
+                   wind_deg=_float(wind.get("deg")),
+                   wind_gust=_float(wind.get("gust")),
+                   clouds=float(payload.get("clouds", {}).get("all", 0.0)),
+                   sunrise=sys_info.get("sunrise"),
+                   sunset=sys_info.get("sunset"),
+                   units=units)
+
+    @property
+    def location(self) -> str:
+        return f"{self.name}, {self.country}" if self.country else self.name
+
+    def local_time(self, timestamp: int | None, fmt: str = "%I:%M %p") -> str | None:
+        return local_datetime(timestamp, self.timezone_offset).strftime(fmt) if timestamp else None
+
+    def with_units(self, units: str) -> "WeatherObservation":
+        """The same observation with temperatures and wind speeds in other units"""
+        if units == self.units:
+            return self
+        return replace(self,
+                       temp=convert_temperature(self.temp, self.units, units),
+                       feels_like=convert_temperature(self.feels_like, self.units, units),
+                       temp_min=convert_temperature(self.temp_min, self.units, units),
+                       temp_max=convert_temperature(self.temp_max, self.units, units),
+                       wind_speed=convert_speed(self.wind_speed, self.units, units),
+                       wind_gust=convert_speed(self.wind_gust, self.units, units),
+                       units=units)
+
+    def to_prompt(self) -> dict:
+        """Compact view for LLM prompts, without the nested payload structure"""
+        symbol = temperature_symbol(self.units)
+        speed = "mph" if self.units == "imperial" else "m/s"
+        return {
+            "location": self.location,
+            "coordinates": [self.lat, self.lon],
+            "observed_local": self.local_time(self.observed_at, "%Y-%m-%d %H:%M"),
+            "conditions": self.description,
+            "temperature": f"{self.temp}{symbol} (feels like {self.feels_like}{symbol}, min {self.temp_min}{symbol}, max {self.temp_max}{symbol})",
+            "humidity_percent": self.humidity,
+            "pressure_hpa": self.pressure,
+            "wind": f"{self.wind_speed} {speed}" + (f" from {self.wind_deg:g}°" if self.wind_deg is not None else "")
+                    + (f", gusts {self.wind_gust} {speed}" if self.wind_gust else ""),
+            "cloud_cover_percent": self.clouds,
+            "visibility_m": self.visibility,
+            "sunrise_local": self.local_time(self.sunrise),
+            "sunset_local": self.local_time(self.sunset),
+            "timezone": format_offset(self.timezone_offset),
+        }
+
+    def to_record(self) -> dict:
+        """Storage record with the LIST_DATA_COLUMNS names, temperatures in Celsius"""
+        speed_factor = 0.44704 if self.units == "imperial" else 1.0
+        return {
+            "Location": self.location,
+            "Coordinates_Latitude": self.lat,
+            "Coordinates_Longitude": self.lon,
+            "Weather_Conditions": self.description,
+            "Temperature_Current": to_celsius(self.temp, self.units),
+            "Temperature_Feels_Like": to_celsius(self.feels_like, self.units),
+            "Temperature_Minimum": to_celsius(self.temp_min, self.units),
+            "Temperature_Maximum": to_celsius(self.temp_max, self.units),
+            "Pressure_hPa": self.pressure,
+            "Humidity_Percent": self.humidity,
+            "Visibility_km": round(self.visibility / 1000, 2) if self.visibility is not None else None,
+            "Wind_Speed_m_s": round(self.wind_speed * speed_factor, 2),
+            "Wind_Direction_Degrees": self.wind_deg,
+            "Wind_Gusts_m_s": round(self.wind_gust * speed_factor, 2) if self.wind_gust is not None else None,
+            "Cloud_Cover_Percent": self.clouds,
+            "Sunrise": self.local_time(self.sunrise),
+            "Sunset": self.local_time(self.sunset),
+            "Timezone": format_offset(self.timezone_offset),
+            "Observed_At": datetime.fromtimestamp(self.observed_at, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }
+
+@dataclass(frozen=True, slots=True)
+class ForecastSeries:
+    """
+    5-day / 3-hour forecast of one location. The steps live in one NumPy structured array
+    ('points', dtype FORECAST_DTYPE) instead of a list of nested dicts; condition
+    descriptions are stored once in 'conditions' and referenced by index.
+    """
+    city_id: int
+    name: str
+    country: str
+    lat: float
+    lon: float
+    timezone_offset: int
+    sunrise: int | None
+    sunset: int | None
+    points: np.ndarray
+    conditions: tuple[str, ...]
+    units: str = "standard"
+
+    @classmethod
+    def from_payload(cls, payload: dict, units: str = "standard") -> "ForecastSeries":
+        """
+        Build a series from a decoded /forecast response.
+
+        Args:
+            payload (dict): The forecast response.
+            units (str): Units the forecast was requested in.
+
+        Returns:
+            ForecastSeries: The parsed series.
+        """
+        city = payload.get("city", {})
+        coord = city.get("coord", {})
+        entries = payload.get("list", [])
+        conditions = {}
+        points = np.zeros(len(entries), dtype=FORECAST_DTYPE)
+        nan = float("nan")
+        for index, entry in enumerate(entries):
+            main = entry.get("main", {})
+            wind = entry.get("wind", {})
+            description = ", ".join(item.get("description", "") for item in entry.get("weather", []) if item)
+            points[index] = (entry.get("dt", 0),
+                             main.get("temp", nan),
+                             main.get("feels_like", nan),
+                             main.get("temp_min", nan),
+                             main.get("temp_max", nan),
+                             main.get("pressure", nan),
+                             main.get("humidity", nan),
+                             entry.get("clouds", {}).get("all", nan),
+                             entry.get("visibility", nan),
+                             wind.get("speed", nan),
+                             wind.get("deg", nan),
+                             wind.get("gust", nan),
+                             entry.get("pop", 0.0),
+                             entry.get("rain", {}).get("3h", 0.0),
+                             entry.get("snow", {}).get("3h", 0.0),
+                             conditions.setdefault(description, len(conditions)))
+        return cls(city_id=int(city.get("id", 0)),
+                   name=city.get("name", ""),
+                   country=city.get("country", ""),
+                   lat=float(coord.get("lat", 0.0)),
+                   lon=float(coord.get("lon", 0.0)),
+                   timezone_offset=int(city.get("timezone", 0)),
+                   sunrise=city.get("sunrise"),
+                   sunset=city.get("sunset"),
+                   points=points,
+                   conditions=tuple(conditions),
+                   units=units)
+
+    @property
+    def location(self) -> str:
+        return f"{self.name}, {self.country}" if self.country else self.name
+
+    def condition_names(self) -> list[str]:
+        return [self.conditions[index] for index in self.points["condition"]]
+
+    def with_units(self, units: str) -> "ForecastSeries":
+        """The same series with temperatures and wind speeds in other units"""
+        if units == self.units:
+            return self
+        points = self.points.copy()
+        for field in ("temp", "feels_like", "temp_min", "temp_max"):
+            celsius = points[field] - 273.15 if self.units == "standard" else \
+                (points[field] - 32) * 5 / 9 if self.units == "imperial" else points[field]
+            points[field] = celsius + 273.15 if units == "standard" else \
+                celsius * 9 / 5 + 32 if units == "imperial" else celsius
+        if (self.units == "imperial") != (units == "imperial"):
+            factor = 1 / 0.44704 if units == "imperial" else 0.44704
+            points["wind_speed"] *= factor
+            points["wind_gust"] *= factor
+        return replace(self, points=points, units=units)
+
+    def to_prompt(self) -> dict:
+        """Compact view for LLM prompts: one short row per forecast step"""
+        symbol = temperature_symbol(self.units)
+        rows = [f"{local_datetime(int(point['dt']), self.timezone_offset):%a %d %b %H:%M}: "
+                f"{point['temp']:.1f}{symbol}, {self.conditions[point['condition']]}, "
+                f"rain {point['pop'] * 100:.0f}%, wind {point['wind_speed']:.1f}"
+                for point in self.points]
+        return {"location": self.location,
+                "coordinates": [self.lat, self.lon],
+                "timezone": format_offset(self.timezone_offset),
+                "forecast": rows}
+
+# *************** Function to parse an OpenWeather response once into records
+def parse_weather_response(body: bytes | str | dict, units: str = "standard") -> list[WeatherObservation] | ForecastSeries:
+    """
+    Parse a current weather, group or forecast response.
+
+    Args:
+        body (bytes | str | dict): Raw response body, or the already decoded JSON.
+        units (str): Units the data was requested in.
+
+    Returns:
+        list[WeatherObservation] | ForecastSeries: Observations for /weather and /group
+            responses, the series for /forecast responses.
+    """
+    payload = body if isinstance(body, dict) else _loads(body)
+    if "city" in payload and "list" in payload:
+        return ForecastSeries.from_payload(payload, units)
+    if "list" in payload:
+        return [WeatherObservation.from_payload(entry, units) for entry in payload["list"]]
+    return [WeatherObservation.from_payload(payload, units)]
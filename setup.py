@@ -1,31 +1,324 @@
 from dotenv import load_dotenv
+from datetime import datetime
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import atexit
+import json
 import os 
 import logging
-import streamlit as st
+import queue
+import random
+import threading
 
 load_dotenv()
 
-logging.basicConfig(
-    filename='error.log', # Set a file for save logger output 
-    level=logging.INFO, # Set the logging level
-    format='%(asctime)s [%(levelname)s] - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-    )
-
 LOGGER = logging.getLogger(__name__)
-LOGGER.info("Init Global Variable")
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+API_SECRET_NAMES = ("weather_key", "OPENAI_API_KEY", "ASTRADB_TOKEN_KEY", "ASTRADB_API_ENDPOINT", "ASTRADB_COLLECTION_NAME")
+
+@lru_cache(maxsize=1)
+def load_api_secrets() -> dict:
+    """
+    Read the API secrets from the environment (upper-cased names, e.g. WEATHER_KEY), falling
+    back to the [api] section of Streamlit's secrets.toml only when some are missing.
+
+    Returns:
+        dict: Secret name -> value.
+    """
+    secrets = {name: os.getenv(name.upper()) for name in API_SECRET_NAMES}
+    missing = [name for name, value in secrets.items() if not value]
+    if missing:
+        try:
+            import streamlit as st
+            api_secrets = st.secrets["api"]
+            secrets.update({name: api_secrets[name] for name in missing if name in api_secrets})
+        except Exception as e:
+            LOGGER.warning(f"Streamlit secrets not available: {str(e)}")
+    return secrets
+
+class _LazySecrets(type):
+    """Resolves the SetupApi attributes on first access instead of at import time"""
+    _NAMES = {
+        "weather_key": "weather_key",
+        "open_ai_key": "OPENAI_API_KEY",
+        "ASTRADB_TOKEN_KEY": "ASTRADB_TOKEN_KEY",
+        "ASTRADB_API_ENDPOINT": "ASTRADB_API_ENDPOINT",
+        "ASTRADB_COLLECTION_NAME": "ASTRADB_COLLECTION_NAME",
+    }
 
-load_dotenv() 
+    def __getattr__(cls, name: str):
+        if name == "api_key":
+            return load_api_secrets()
+        if name not in cls._NAMES:
+            raise AttributeError(name)
+        value = load_api_secrets()[cls._NAMES[name]]
+        setattr(cls, name, value)
+        return value
 
-class SetupApi:
-    api_key = st.secrets["api"]
-    weather_key = api_key["weather_key"]  
-    open_ai_key = api_key["OPENAI_API_KEY"]
-    ASTRADB_TOKEN_KEY = api_key["ASTRADB_TOKEN_KEY"]
-    ASTRADB_API_ENDPOINT = api_key["ASTRADB_API_ENDPOINT"]
-    ASTRADB_COLLECTION_NAME = api_key["ASTRADB_COLLECTION_NAME"]
+class SetupApi(metaclass=_LazySecrets):
+    """API secrets: weather_key, open_ai_key, ASTRADB_TOKEN_KEY, ASTRADB_API_ENDPOINT, ASTRADB_COLLECTION_NAME"""
+
+class SetupConfig:
+    # ********** AstraDB client
+    ASTRADB_BACKEND = os.getenv("ASTRADB_BACKEND", "astra") # 'astra' or 'memory' (local stand-in)
+    ASTRADB_TIMEOUT_MS = int(os.getenv("ASTRADB_TIMEOUT_MS", "10000"))
+    ASTRADB_HEALTH_CHECK_INTERVAL_S = float(os.getenv("ASTRADB_HEALTH_CHECK_INTERVAL_S", "60"))
+    
+    # ********** Write-behind insert queue
+    WRITE_BATCH_SIZE = int(os.getenv("WRITE_BATCH_SIZE", "100"))
+    WRITE_FLUSH_INTERVAL_S = float(os.getenv("WRITE_FLUSH_INTERVAL_S", "1.0"))
+    WRITE_MAX_PENDING = int(os.getenv("WRITE_MAX_PENDING", "1000"))
+    WRITE_CHUNK_SIZE = int(os.getenv("WRITE_CHUNK_SIZE", "20"))
+    WRITE_CONCURRENCY = int(os.getenv("WRITE_CONCURRENCY", "4"))
+    WRITE_MAX_RETRIES = int(os.getenv("WRITE_MAX_RETRIES", "3"))
+    WRITE_RETRY_BACKOFF_S = float(os.getenv("WRITE_RETRY_BACKOFF_S", "0.5"))
+    
+    # ********** In-memory weather data snapshots (WeatherDataManager)
+    DATA_MAX_SEGMENTS = int(os.getenv("DATA_MAX_SEGMENTS", "32"))
+    DATA_HOT_DAYS = float(os.getenv("DATA_HOT_DAYS", "30")) # 0 keeps every age in memory
+    DATA_HOT_MAX_ROWS = int(os.getenv("DATA_HOT_MAX_ROWS", "50000")) # 0 means no row cap
+    DATA_HOT_LOW_WATER = float(os.getenv("DATA_HOT_LOW_WATER", "0.9")) # share of the row cap kept after an eviction
+    DATA_EVICT_INTERVAL_S = float(os.getenv("DATA_EVICT_INTERVAL_S", "300"))
+    DATA_LOAD_BATCH_SIZE = int(os.getenv("DATA_LOAD_BATCH_SIZE", "1000"))
+    DATA_PUSHDOWN_RANGES = os.getenv("DATA_PUSHDOWN_RANGES", "false").lower() == "true" # push numeric/time ranges to AstraDB
+    DATA_PUSHDOWN_CACHE_SIZE = int(os.getenv("DATA_PUSHDOWN_CACHE_SIZE", "64"))
+    ANALYSIS_MAX_ROWS = int(os.getenv("ANALYSIS_MAX_ROWS", "50"))
+    DATA_COLD_DIR = os.getenv("DATA_COLD_DIR", os.path.join(BASE_DIR, "cache", "weather_cold"))
+    
+    # ********** Location resolution (gazetteer + geocode cache)
+    GAZETTEER_PATH = os.getenv("GAZETTEER_PATH", os.path.join(BASE_DIR, "data", "city_gazetteer.csv"))
+    GEOCODE_CACHE_PATH = os.getenv("GEOCODE_CACHE_PATH", os.path.join(BASE_DIR, "cache", "geocode_index.json.gz"))
+    LOCATION_FUZZY_CUTOFF = float(os.getenv("LOCATION_FUZZY_CUTOFF", "0.85"))
+    GEOCODE_SAVE_DELAY_S = float(os.getenv("GEOCODE_SAVE_DELAY_S", "5"))
+    
+    # ********** OpenWeather grouped current weather requests
+    WEATHER_GROUP_ENABLED = os.getenv("WEATHER_GROUP_ENABLED", "true").lower() == "true"
+    WEATHER_BATCH_WINDOW_MS = float(os.getenv("WEATHER_BATCH_WINDOW_MS", "50"))
+    
+    # ********** OpenWeather quota (token bucket shared through a local state file)
+    OPENWEATHER_CALLS_PER_MINUTE = float(os.getenv("OPENWEATHER_CALLS_PER_MINUTE", "60"))
+    OPENWEATHER_BURST = float(os.getenv("OPENWEATHER_BURST", "10"))
+    OPENWEATHER_LIMIT_STATE_PATH = os.getenv("OPENWEATHER_LIMIT_STATE_PATH", os.path.join(BASE_DIR, "cache", "openweather_bucket.json"))
+    OPENWEATHER_LIMIT_QUEUE_TIMEOUT_S = float(os.getenv("OPENWEATHER_LIMIT_QUEUE_TIMEOUT_S", "10"))
     
+    # ********** OpenWeather client resilience
+    OPENWEATHER_CONNECT_TIMEOUT_S = float(os.getenv("OPENWEATHER_CONNECT_TIMEOUT_S", "3.05"))
+    OPENWEATHER_READ_TIMEOUT_S = float(os.getenv("OPENWEATHER_READ_TIMEOUT_S", "10"))
+    OPENWEATHER_MAX_RETRIES = int(os.getenv("OPENWEATHER_MAX_RETRIES", "2"))
+    OPENWEATHER_BACKOFF_BASE_S = float(os.getenv("OPENWEATHER_BACKOFF_BASE_S", "0.5"))
+    OPENWEATHER_BACKOFF_MAX_S = float(os.getenv("OPENWEATHER_BACKOFF_MAX_S", "8"))
+    OPENWEATHER_BREAKER_FAILURES = int(os.getenv("OPENWEATHER_BREAKER_FAILURES", "5"))
+    OPENWEATHER_BREAKER_RESET_S = float(os.getenv("OPENWEATHER_BREAKER_RESET_S", "30"))
+    OPENWEATHER_HEDGE_ENABLED = os.getenv("OPENWEATHER_HEDGE_ENABLED", "false").lower() == "true"
     
+    # ********** LLM models used by the stage profiles in model/llms.py
+    LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+    LLM_FAST_MODEL = os.getenv("LLM_FAST_MODEL", "gpt-4o-mini")
+    LLM_FALLBACK_MODEL = os.getenv("LLM_FALLBACK_MODEL") or None
+    LLM_BACKEND = os.getenv("LLM_BACKEND", "openai") # 'openai' or 'mock' (offline runs)
+    LLM_MOCK_RESPONSES_PATH = os.getenv("LLM_MOCK_RESPONSES_PATH", "")
+    CHAT_REQUEST_BUDGET_S = float(os.getenv("CHAT_REQUEST_BUDGET_S", "90"))
+    LLM_MIN_STAGE_BUDGET_S = float(os.getenv("LLM_MIN_STAGE_BUDGET_S", "2"))
+    
+    # ********** Forecast analytics (helper/forecast_analytics_helper.py)
+    FORECAST_TEMPLATED_ANSWERS = os.getenv("FORECAST_TEMPLATED_ANSWERS", "true").lower() == "true"
+    
+    # ********** Weather records kept per chat topic for the 'create' intent
+    SESSION_MAX_TOPICS = int(os.getenv("SESSION_MAX_TOPICS", "1000"))
+    SESSION_MAX_TURNS = int(os.getenv("SESSION_MAX_TURNS", "5"))
+    SESSION_TTL_S = float(os.getenv("SESSION_TTL_S", "3600"))
+    
+    # ********** Follow-up questions patch the last filters of the topic (helper/followup_helper.py)
+    FOLLOWUP_CARRY_OVER = os.getenv("FOLLOWUP_CARRY_OVER", "true").lower() == "true"
+    FOLLOWUP_REUSE_TTL_S = float(os.getenv("FOLLOWUP_REUSE_TTL_S", "600"))
+    
+    # ********** Batch entry points in engine/chat.py
+    CHAT_BATCH_CONCURRENCY = int(os.getenv("CHAT_BATCH_CONCURRENCY", "8"))
+    CHAT_BATCH_CHUNK_SIZE = int(os.getenv("CHAT_BATCH_CHUNK_SIZE", "100"))
+    
+    # ********** Speculative filter extraction next to intent detection (helper/speculation_helper.py)
+    CHAT_SPECULATIVE_FILTERS = os.getenv("CHAT_SPECULATIVE_FILTERS", "false").lower() == "true"
+    CHAT_SPECULATIVE_PREFETCH = os.getenv("CHAT_SPECULATIVE_PREFETCH", "true").lower() == "true"
+    SPECULATION_WORKERS = int(os.getenv("SPECULATION_WORKERS", "8"))
+    
+    # ********** Headless HTTP service in engine/api.py
+    API_HOST = os.getenv("API_HOST", "0.0.0.0")
+    API_PORT = int(os.getenv("API_PORT", "8000"))
+    API_WORKERS = int(os.getenv("API_WORKERS", "2"))
+    TOPIC_STORE_PATH = os.getenv("TOPIC_STORE_PATH", os.path.join(BASE_DIR, "DB_FILE.json"))
+    
+    # ********** Logging
+    LOG_FILE = os.getenv("LOG_FILE", "error.log") # may contain {pid} for one file per worker process
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_LEVELS = os.getenv("LOG_LEVELS", "") # per module file, e.g. "chat=DEBUG,weather_api_helper=WARNING"
+    LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+    LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+    LOG_MAX_MESSAGE_CHARS = int(os.getenv("LOG_MAX_MESSAGE_CHARS", "2000"))
+    LOG_PAYLOADS = os.getenv("LOG_PAYLOADS", "false").lower() == "true" # debug payload dumps are opt-in
+    LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "1.0"))
+    LOG_PAYLOAD_MAX_ITEMS = int(os.getenv("LOG_PAYLOAD_MAX_ITEMS", "5"))
+
+# ********** Non-blocking logging pipeline
+class JsonLogFormatter(logging.Formatter):
+    """One JSON object per line: time, level, module, function, message and optional payload"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "module": record.module,
+            "function": record.funcName,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "payload", None) is not None:
+            entry["payload"] = record.payload
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class ModuleLevelFilter(logging.Filter):
+    """Applies a minimum level per module file name (record.module), with a default level"""
+
+    def __init__(self, default_level: int, levels: dict):
+        super().__init__()
+        self.default_level = default_level
+        self.levels = levels
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= self.levels.get(record.module, self.default_level)
+
+class TruncatingQueueHandler(QueueHandler):
+    """Queue handler that caps the message size before the record leaves the calling thread"""
+
+    def __init__(self, log_queue: queue.Queue, max_chars: int):
+        super().__init__(log_queue)
+        self.max_chars = max_chars
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = super().prepare(record)
+        record.msg = truncate_text(record.msg, self.max_chars)
+        return record
+
+def truncate_text(text: str, max_chars: int) -> str:
+    """Cut a text to max_chars, noting how much was dropped"""
+    text = str(text)
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}... [truncated {len(text) - max_chars} chars]"
+
+def summarize_payload(payload, max_items: int | None = None, max_chars: int | None = None):
+    """
+    Shrink a payload for logging: lists keep their first items, dicts their first keys, and
+    the result is cut to max_chars.
+
+    Args:
+        payload (Any): The object to log.
+        max_items (int | None): Items kept per list or dict level.
+        max_chars (int | None): Maximum length of the serialized result.
+
+    Returns:
+        str: Compact JSON-like text of the payload.
+    """
+    max_items = max_items or SetupConfig.LOG_PAYLOAD_MAX_ITEMS
+    max_chars = max_chars or SetupConfig.LOG_MAX_MESSAGE_CHARS
+
+    def shrink(value, depth: int = 0):
+        if depth > 4:
+            return "..."
+        if isinstance(value, dict):
+            items = list(value.items())
+            shrunk = {str(key): shrink(item, depth + 1) for key, item in items[:max_items]}
+            if len(items) > max_items:
+                shrunk["..."] = f"+{len(items) - max_items} keys"
+            return shrunk
+        if isinstance(value, (list, tuple)):
+            shrunk = [shrink(item, depth + 1) for item in value[:max_items]]
+            if len(value) > max_items:
+                shrunk.append(f"... +{len(value) - max_items} items")
+            return shrunk
+        if isinstance(value, str):
+            return truncate_text(value, 200)
+        return value if isinstance(value, (int, float, bool, type(None))) else truncate_text(repr(value), 200)
+
+    return truncate_text(json.dumps(shrink(payload), ensure_ascii=False, default=str), max_chars)
+
+def log_payload(message: str, payload, level: int = logging.DEBUG) -> None:
+    """
+    Log a large object (filters, API payloads, histories) only when payload logging is enabled
+    (LOG_PAYLOADS) and the record is sampled (LOG_PAYLOAD_SAMPLE_RATE). The payload is
+    summarized and sent as a structured field.
+
+    Args:
+        message (str): Short description of the payload.
+        payload (Any): The object to log.
+        level (int): Log level, DEBUG by default.
+    """
+    if not SetupConfig.LOG_PAYLOADS or not LOGGER.isEnabledFor(level):
+        return
+    if SetupConfig.LOG_PAYLOAD_SAMPLE_RATE < 1 and random.random() >= SetupConfig.LOG_PAYLOAD_SAMPLE_RATE:
+        return
+    LOGGER.log(level, message, extra={"payload": summarize_payload(payload)}, stacklevel=2)
+
+def _parse_levels(spec: str) -> dict:
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        module, _, level = item.partition("=")
+        levels[module.strip()] = logging.getLevelName(level.strip().upper())
+    return {module: level for module, level in levels.items() if isinstance(level, int)}
+
+def configure_logging() -> QueueListener:
+    """
+    Route every log record through a queue: callers only enqueue records, a background
+    listener formats them as JSON lines and writes them to a size-rotated file.
+
+    Returns:
+        QueueListener: The running listener, stopped at exit.
+    """
+    default_level = logging.getLevelName(SetupConfig.LOG_LEVEL.upper())
+    default_level = default_level if isinstance(default_level, int) else logging.INFO
+    levels = _parse_levels(SetupConfig.LOG_LEVELS)
+
+    file_handler = RotatingFileHandler(SetupConfig.LOG_FILE.format(pid=os.getpid()),
+                                       maxBytes=SetupConfig.LOG_MAX_BYTES,
+                                       backupCount=SetupConfig.LOG_BACKUP_COUNT,
+                                       encoding="utf-8",
+                                       delay=True)
+    file_handler.setFormatter(JsonLogFormatter())
+
+    log_queue = queue.Queue(-1)
+    queue_handler = TruncatingQueueHandler(log_queue, SetupConfig.LOG_MAX_MESSAGE_CHARS)
+    queue_handler.addFilter(ModuleLevelFilter(default_level, levels))
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(default_level)
+    LOGGER.setLevel(min([default_level, *levels.values()]))
+
+    listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+_LOG_LISTENER = None
+_LOG_LOCK = threading.Lock()
+
+def setup_logging() -> QueueListener:
+    """
+    Configure logging once per process. Called by the entry points (the API workers, the batch
+    CLI and the Streamlit UI) rather than on import, so importing a module opens no log file.
+
+    Returns:
+        QueueListener: The running listener.
+    """
+    global _LOG_LISTENER
+    if _LOG_LISTENER is None:
+        with _LOG_LOCK:
+            if _LOG_LISTENER is None:
+                _LOG_LISTENER = configure_logging()
+                LOGGER.info("Init Global Variable")
+    return _LOG_LISTENER
+
 LIST_COLUMNS_FILTER  = {
         "q": "City name, optionally with a country code (e.g., 'London')",
         "zip": "ZIP or postal code, optionally with a country code (e.g., '10001,us')",
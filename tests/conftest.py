@@ -0,0 +1,25 @@
+# ********** IMPORT LIBRARIES **********
+import os
+import sys
+
+# *************** Offline backends, set before setup.py reads the environment
+os.environ.setdefault("ASTRADB_BACKEND", "memory")
+os.environ.setdefault("LLM_BACKEND", "mock")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from helper import data_client_helper
+from helper.data_client_helper import AstraCollectionProvider, InMemoryCollection
+
+@pytest.fixture
+def collection():
+    """A fresh in-memory collection shared by every data path, with empty pushdown caches"""
+    collection = InMemoryCollection("test")
+    AstraCollectionProvider().use_collection(collection)
+    data_client_helper._PUSHDOWN_CACHE.clear()
+    data_client_helper._KNOWN_VALUES.clear()
+    yield collection
+    AstraCollectionProvider().reset()
+    data_client_helper._PUSHDOWN_CACHE.clear()
+    data_client_helper._KNOWN_VALUES.clear()
@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+
+from helper.aggregate_helper import WeatherAggregates, answer_from_aggregates, match_aggregate_question
+
+FRAME = pd.DataFrame([
+    {"Location": "Kuala Lumpur, MY", "Observed_At": "2025-01-05T03:00:00Z", "Temperature_Current": 30.0, "Humidity_Percent": 80},
+    {"Location": "Kuala Lumpur, MY", "Observed_At": "2025-01-06T03:00:00Z", "Temperature_Current": 32.0, "Humidity_Percent": 70},
+    {"Location": "Paris, FR", "Observed_At": "2025-01-05T10:00:00Z", "Temperature_Current": 6.0, "Humidity_Percent": 90},
+    {"Location": "Paris, FR", "Observed_At": "2025-01-05T16:00:00Z", "Temperature_Current": "8.0", "Humidity_Percent": None},
+])
+
+@pytest.fixture
+def aggregates():
+    return WeatherAggregates().update(FRAME)
+
+def test_update_is_incremental(aggregates):
+    split = WeatherAggregates().update(FRAME.iloc[:2]).update(FRAME.iloc[2:])
+    pd.testing.assert_frame_equal(split.daily.sort_index(), aggregates.daily.sort_index())
+    assert aggregates.locations == ["Kuala Lumpur, MY", "Paris, FR"]
+
+def test_average_per_location(aggregates):
+    answer = answer_from_aggregates("What is the average temperature?", aggregates)
+    assert answer.startswith("Average Temperature_Current per location:")
+    assert "31.0" in answer and "7.0" in answer
+
+def test_alias_selects_the_stored_location(aggregates):
+    answer = answer_from_aggregates("average temperature in KL", aggregates)
+    assert "Kuala Lumpur, MY" in answer and "Paris" not in answer
+
+def test_named_place_without_records(aggregates):
+    assert answer_from_aggregates("maximum humidity in Tokyo", aggregates) == "No stored weather records for Tokyo."
+    assert answer_from_aggregates("maximum humidity in Springfield", aggregates) == "No stored weather records for Springfield."
+
+def test_counts_and_single_days(aggregates):
+    answer = answer_from_aggregates("how many records for Paris?", aggregates)
+    assert answer.startswith("Number of records per location:") and "2" in answer and "Kuala" not in answer
+    answer = answer_from_aggregates("minimum temperature on 2025-01-05", aggregates)
+    assert "on 2025-01-05" in answer and "30.0" in answer and "6.0" in answer
+
+def test_latest_record(aggregates):
+    answer = answer_from_aggregates("latest humidity in Kuala Lumpur", aggregates)
+    assert answer.startswith("Latest record per location:")
+    assert "2025-01-06T03:00:00Z" in answer and "Paris" not in answer
+
+@pytest.mark.parametrize("question", [
+    "average temperature last week",
+    "average temperature yesterday",
+    "maximum temperature in March",
+    "average temperature when humidity is above 80",
+    "median temperature",
+    "average temperature over the past 3 days",
+    "tell me about Paris",
+])
+def test_other_questions_go_to_analysis_code(aggregates, question):
+    assert match_aggregate_question(question) is None or answer_from_aggregates(question, aggregates) is None
+
+def test_no_answer_without_records():
+    assert answer_from_aggregates("average temperature", WeatherAggregates()) is None
@@ -0,0 +1,89 @@
+import pytest
+
+from helper.analysis_code_helper import Predicate, extract_predicates, referenced_columns
+
+COLUMNS = ["Location", "Observed_At", "Temperature_Current", "Humidity_Percent", "Weather_Conditions"]
+
+# ********** referenced_columns
+@pytest.mark.parametrize("code, expected", [
+    ("result = df['Temperature_Current'].mean()", ["Temperature_Current"]),
+    ("result = df[['Location', 'Humidity_Percent']]", ["Location", "Humidity_Percent"]),
+    ("result = df.groupby('Location')['Temperature_Current'].max()", ["Location", "Temperature_Current"]),
+    ("result = df.loc[df.Humidity_Percent > 80, 'Location']", ["Location", "Humidity_Percent"]),
+    ("result = df.sort_values('Observed_At').tail(3)[['Location', 'Observed_At']]", ["Location", "Observed_At"]),
+    ("result = df.dropna(subset=['Humidity_Percent'])['Humidity_Percent'].mean()", ["Humidity_Percent"]),
+    ("result = df.drop_duplicates(subset='Location')['Location']", ["Location"]),
+    ("result = len(df[df['Location'] == 'Paris, FR'])", ["Location"]),
+    ("df = df[['Location', 'Temperature_Current']]\nprint(df)", ["Location", "Temperature_Current"]),
+])
+def test_referenced_columns_projects_narrowed_code(code, expected):
+    assert referenced_columns(code, COLUMNS) == expected
+
+@pytest.mark.parametrize("code", [
+    "print(df)",
+    "result = df.describe()",
+    "result = df.columns",
+    "df = df[df['Location'] == 'Paris, FR']\nprint(df)",
+    # *************** Column names inside expression strings
+    "result = df.query('Temperature_Current > 30')['Location']",
+    "result = df.filter(like='Temp')['Location']",
+    # *************** Rows depend on every column without a constant subset
+    "result = df.dropna()['Location']",
+    "result = df.drop_duplicates()['Location']",
+    "result = df.dropna(subset=columns)['Location']",
+    "result = df.dropna(axis=1)['Location']",
+    "result = df.dropna(subset=['Location'], axis=1)['Location']",
+    "result = 1 +",
+    "result = 42",
+])
+def test_referenced_columns_needs_every_column(code):
+    assert referenced_columns(code, COLUMNS) is None
+
+# ********** extract_predicates
+@pytest.mark.parametrize("code, expected", [
+    ("df = df[df['Location'] == 'Paris, FR']",
+     [Predicate("Location", "eq", "Paris, FR")]),
+    ("df = df[(df.Temperature_Current > 30) & (df['Humidity_Percent'] <= 80)]",
+     [Predicate("Temperature_Current", "gt", 30), Predicate("Humidity_Percent", "lte", 80)]),
+    ("df = df[30 < df['Temperature_Current']]",
+     [Predicate("Temperature_Current", "gt", 30)]),
+    ("df = df[df['Location'].isin(['Paris, FR', 'Tokyo, JP'])]",
+     [Predicate("Location", "in", ("Paris, FR", "Tokyo, JP"))]),
+    ("df = df[df['Weather_Conditions'].str.contains('rain', case=False)]",
+     [Predicate("Weather_Conditions", "contains", "rain", case=False)]),
+    ("df = df[df['Weather_Conditions'].str.contains('rain', regex=False)]",
+     [Predicate("Weather_Conditions", "contains", "rain", regex=False)]),
+    ("df = df[df['Temperature_Current'].between(10, 20)]",
+     [Predicate("Temperature_Current", "gte", 10), Predicate("Temperature_Current", "lte", 20)]),
+    ("df = df.loc[df['Observed_At'] >= '2025-01-01', ['Location', 'Observed_At']]",
+     [Predicate("Observed_At", "gte", "2025-01-01")]),
+    # *************** Row-local conjuncts that are not pushed do not block the others
+    ("df = df[(df['Location'] == 'Paris, FR') & (df['Temperature_Current'].astype(float).round() != 7)]",
+     [Predicate("Location", "eq", "Paris, FR")]),
+])
+def test_extract_predicates(code, expected):
+    assert extract_predicates(code, COLUMNS) == expected
+
+@pytest.mark.parametrize("code", [
+    # *************** Keywords that change the match, or are not constants
+    "import re\ndf = df[df['Weather_Conditions'].str.contains('rain', flags=re.IGNORECASE)]",
+    "df = df[df['Weather_Conditions'].str.contains('rain', na=False)]",
+    "df = df[df['Weather_Conditions'].str.contains('rain', case=ignore_case)]",
+    "df = df[df['Weather_Conditions'].str.contains(pattern)]",
+    "df = df[df['Temperature_Current'].between(10, 20, inclusive='left')]",
+    "df = df[df['Location'].isin(locations)]",
+    # *************** Masks that depend on other rows
+    "df = df[df['Temperature_Current'] == df['Temperature_Current'].max()]",
+    "df = df[(df['Location'] == 'Paris, FR') & (df['Temperature_Current'] > df['Temperature_Current'].mean())]",
+    # *************** df used before the filter, or no filter at all
+    "print(len(df))\ndf = df[df['Location'] == 'Paris, FR']",
+    "result = df[df['Location'] == 'Paris, FR']",
+    "df = df.query('Location == \"Paris, FR\"')",
+    "df = df[df['Location'] == 'Paris, FR'",
+])
+def test_extract_predicates_declines(code):
+    assert extract_predicates(code, COLUMNS) == []
+
+def test_or_masks_are_not_split():
+    code = "df = df[(df['Location'] == 'Paris, FR') | (df['Location'] == 'Tokyo, JP')]"
+    assert extract_predicates(code, COLUMNS) == []
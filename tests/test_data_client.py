@@ -0,0 +1,85 @@
+import pandas as pd
+import pytest
+
+from helper.analysis_code_helper import Predicate
+from helper.data_client_helper import (ASTRA_IN_MAX_VALUES,
+                                       apply_predicates,
+                                       compact_duplicates,
+                                       record_key,
+                                       to_astra_filter)
+
+RECORD = {"Location": "Paris, FR", "Observed_At": "2025-01-05T10:00:00Z",
+          "Temperature_Current": 7.25, "Weather_Conditions": "light rain"}
+
+# ********** record_key
+def test_record_key_ignores_id_and_missing_values():
+    key = record_key(RECORD)
+    assert key.startswith("paris-fr|2025-01-05T10:00:00Z|")
+    assert record_key({**RECORD, "_id": "random-uuid"}) == key
+    assert record_key({**RECORD, "Humidity_Percent": None}) == key
+
+def test_record_key_normalizes_floats_and_text():
+    assert record_key({**RECORD, "Temperature_Current": 7.2500000001}) == record_key(RECORD)
+    assert record_key({**RECORD, "Weather_Conditions": " light rain "}) == record_key(RECORD)
+
+def test_record_key_changes_with_values():
+    assert record_key({**RECORD, "Temperature_Current": 8.0}) != record_key(RECORD)
+    assert record_key({"Temperature_Current": 1.0}).startswith("unknown|na|")
+
+# ********** compact_duplicates
+def test_compact_duplicates_keeps_one_keyed_copy(collection):
+    other = {**RECORD, "Location": "Tokyo, JP"}
+    collection.insert_many([{**RECORD, "_id": "a"}, {**RECORD, "_id": "b"}, {**other, "_id": "c"},
+                            {**other, "_id": record_key(other)}])
+
+    assert compact_duplicates(dry_run=True) == {"scanned": 4, "distinct": 2, "rekeyed": 1, "deleted": 3}
+    assert len(collection.find({})) == 4
+
+    assert compact_duplicates() == {"scanned": 4, "distinct": 2, "rekeyed": 1, "deleted": 3}
+    assert sorted(document["_id"] for document in collection.find({})) == sorted([record_key(RECORD), record_key(other)])
+
+    # *************** A second run finds nothing left to do
+    assert compact_duplicates() == {"scanned": 2, "distinct": 2, "rekeyed": 0, "deleted": 0}
+
+# ********** to_astra_filter / apply_predicates parity
+RECORDS = [
+    {"_id": "1", "Location": "Paris, FR", "Observed_At": "2025-01-05T10:00:00Z", "Temperature_Current": 7.0, "Weather_Conditions": "light rain"},
+    {"_id": "2", "Location": "Paris, FR", "Observed_At": "2025-01-06T10:00:00Z", "Temperature_Current": "9.5", "Weather_Conditions": "clear sky"},
+    {"_id": "3", "Location": "Tokyo, JP", "Observed_At": "2025-01-05T11:00:00Z", "Temperature_Current": 12.0, "Weather_Conditions": "Heavy Rain"},
+    {"_id": "4", "Location": "Kuala Lumpur, MY", "Observed_At": "2025-01-07T03:00:00Z", "Temperature_Current": 31.0, "Weather_Conditions": "thunderstorm"},
+    {"_id": "5", "Location": "Kuala Lumpur, MY", "Temperature_Current": None, "Weather_Conditions": None},
+]
+
+PARITY_CASES = [
+    [Predicate("Location", "eq", "Paris, FR")],
+    [Predicate("Location", "in", ("Tokyo, JP", "Kuala Lumpur, MY"))],
+    [Predicate("Weather_Conditions", "contains", "rain")],
+    [Predicate("Weather_Conditions", "contains", "rain", case=False)],
+    [Predicate("Weather_Conditions", "contains", "r.in", regex=True)],
+    [Predicate("Weather_Conditions", "contains", "r.in", regex=False)],
+    [Predicate("Location", "contains", "Paris"), Predicate("Temperature_Current", "gt", 8)],
+    [Predicate("Observed_At", "gte", "2025-01-06"), Predicate("Observed_At", "lt", "2025-01-07")],
+    [Predicate("Temperature_Current", "gte", 7), Predicate("Temperature_Current", "lte", 12)],
+    [Predicate("Weather_Conditions", "contains", "snow")],
+]
+
+@pytest.mark.parametrize("predicates", PARITY_CASES)
+def test_pushed_filter_returns_the_local_rows(collection, predicates):
+    collection.insert_many(RECORDS)
+    expected = set(apply_predicates(pd.DataFrame(RECORDS), predicates)["_id"])
+
+    astra_filter = to_astra_filter(predicates)
+    if astra_filter is None:
+        assert expected == set()
+        return
+    pushed = collection.find(astra_filter)
+    assert expected <= {document["_id"] for document in pushed}
+    assert set(apply_predicates(pd.DataFrame(pushed, columns=list(RECORDS[0])), predicates)["_id"]) == expected
+
+def test_long_in_lists_are_filtered_locally(collection):
+    values = tuple(f"City {index}" for index in range(ASTRA_IN_MAX_VALUES + 1))
+    assert to_astra_filter([Predicate("Location", "in", values)]) == {}
+    assert to_astra_filter([Predicate("Location", "in", values[:2])]) == {"Location": {"$in": list(values[:2])}}
+
+def test_ranges_are_not_pushed_by_default(collection):
+    assert to_astra_filter([Predicate("Temperature_Current", "gt", 8)]) == {}
@@ -0,0 +1,51 @@
+import pytest
+
+from helper.followup_helper import apply_filter_delta, is_followup, resolve_followup_locally
+from helper.session_store_helper import FilterState
+
+PARIS = {"field_name": "q", "value_target": "Paris,FR"}
+METRIC = {"field_name": "units", "value_target": "metric"}
+
+@pytest.fixture
+def state():
+    return FilterState(intent="current_weather", filters=[PARIS, METRIC], fetched={})
+
+@pytest.mark.parametrize("text", ["and tomorrow?", "same for Tokyo", "in Fahrenheit please", "Tokyo?",
+                                  "what about next 6 hours", "also London"])
+def test_is_followup(text):
+    assert is_followup(text)
+
+@pytest.mark.parametrize("text", ["", "save the weather data for Tokyo", "show me the stored records",
+                                  "what's the weather going to be like in Paris and Tokyo over the next week",
+                                  "how are you doing today my friend?"])
+def test_is_not_followup(text):
+    assert not is_followup(text)
+
+def test_time_word_switches_to_forecast(state):
+    assert resolve_followup_locally("and tomorrow?", state) == {"intent": "forecast", "filter_created": [PARIS, METRIC]}
+
+def test_new_city_replaces_the_previous_one(state):
+    result = resolve_followup_locally("same for Tokyo", state)
+    assert result["intent"] == "current_weather"
+    assert result["filter_created"] == [METRIC, {"field_name": "q", "value_target": "Tokyo,JP"}]
+
+def test_added_city_keeps_the_previous_one(state):
+    result = resolve_followup_locally("Tokyo too", state)
+    assert result["filter_created"] == [PARIS, METRIC, {"field_name": "q", "value_target": "Tokyo,JP"}]
+
+def test_units_language_and_steps(state):
+    result = resolve_followup_locally("next 6 hours in fahrenheit, in french", state)
+    assert result["intent"] == "forecast"
+    assert result["filter_created"] == [PARIS,
+                                        {"field_name": "units", "value_target": "imperial"},
+                                        {"field_name": "lang", "value_target": "fr"},
+                                        {"field_name": "cnt", "value_target": 2}]
+
+def test_unrecognized_followup_is_left_to_the_model(state):
+    assert resolve_followup_locally("and what about that?", state) is None
+
+def test_current_weather_drops_the_forecast_count():
+    state = FilterState(intent="forecast", filters=[PARIS, {"field_name": "cnt", "value_target": 8}], fetched={})
+    assert apply_filter_delta(state, "current_weather", [{"field_name": "cnt", "value_target": 16}], True) == \
+        {"intent": "current_weather", "filter_created": [PARIS]}
+    assert resolve_followup_locally("and right now?", state) == {"intent": "current_weather", "filter_created": [PARIS]}
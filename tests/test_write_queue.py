@@ -0,0 +1,118 @@
+from types import SimpleNamespace
+import threading
+
+import pytest
+
+from helper.write_queue_helper import DUPLICATE_ERROR_CODE, WeatherWriteQueue
+
+class FlakyCollection:
+    """insert_many fails for the first 'failures' calls, then stores the documents"""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.calls = 0
+        self.stored = []
+        self._lock = threading.Lock()
+
+    def insert_many(self, documents, **kwargs):
+        with self._lock:
+            self.calls += 1
+            if self.calls <= self.failures:
+                raise ConnectionError("timed out")
+            self.stored.extend(documents)
+        return SimpleNamespace(inserted_ids=[document["_id"] for document in documents])
+
+class DuplicateError(Exception):
+    def __init__(self, inserted_ids, codes):
+        super().__init__("some documents already exist")
+        self.partial_result = SimpleNamespace(inserted_ids=inserted_ids)
+        self.error_descriptors = [SimpleNamespace(error_code=code) for code in codes]
+
+def make_queue(collection, written=None, **kwargs):
+    options = {"batch_size": 100, "flush_interval_s": 0.05, "chunk_size": 2, "concurrency": 2,
+               "max_retries": 2, "retry_backoff_s": 0.0, **kwargs}
+    return WeatherWriteQueue(get_collection=lambda: collection,
+                             on_written=written.extend if written is not None else None,
+                             **options)
+
+def records(*ids):
+    return [{"_id": record_id, "Location": "Paris, FR"} for record_id in ids]
+
+def test_transient_errors_are_retried():
+    collection, written = FlakyCollection(failures=2), []
+    write_queue = make_queue(collection, written, chunk_size=10)
+    try:
+        assert write_queue.submit(records("a", "b")).wait(timeout=5) == 2
+    finally:
+        write_queue.close()
+    assert collection.calls == 3
+    assert [document["_id"] for document in written] == ["a", "b"]
+
+def test_ticket_fails_after_the_last_retry():
+    collection, written = FlakyCollection(failures=10), []
+    write_queue = make_queue(collection, written, chunk_size=10)
+    try:
+        with pytest.raises(ConnectionError):
+            write_queue.submit(records("a")).wait(timeout=5)
+    finally:
+        write_queue.close()
+    assert collection.calls == 3
+    assert written == []
+
+def test_only_submissions_in_a_failed_chunk_fail():
+    class FailingChunk(FlakyCollection):
+        def insert_many(self, documents, **kwargs):
+            if any(document["_id"] == "bad" for document in documents):
+                raise ConnectionError("rejected")
+            return super().insert_many(documents, **kwargs)
+
+    collection, written = FailingChunk(), []
+    write_queue = make_queue(collection, written)
+    try:
+        good = write_queue.submit(records("a", "b"))
+        bad = write_queue.submit(records("bad"))
+        assert write_queue.flush(timeout=5)
+        assert good.wait(timeout=5) == 2
+        with pytest.raises(ConnectionError):
+            bad.wait(timeout=5)
+    finally:
+        write_queue.close()
+    assert [document["_id"] for document in written] == ["a", "b"]
+
+def test_duplicate_only_errors_are_not_retried():
+    class Duplicates(FlakyCollection):
+        def insert_many(self, documents, **kwargs):
+            self.calls += 1
+            raise DuplicateError(["a"], [DUPLICATE_ERROR_CODE])
+
+    # *************** Records already stored are durable too
+    collection, written = Duplicates(), []
+    write_queue = make_queue(collection, written, chunk_size=10)
+    try:
+        assert write_queue.submit(records("a", "b")).wait(timeout=5) == 2
+    finally:
+        write_queue.close()
+    assert collection.calls == 1
+    assert [document["_id"] for document in written] == ["a", "b"]
+
+def test_mixed_errors_are_retried():
+    class Mixed(FlakyCollection):
+        def insert_many(self, documents, **kwargs):
+            self.calls += 1
+            raise DuplicateError([], [DUPLICATE_ERROR_CODE, "SERVER_ERROR"])
+
+    collection = Mixed()
+    write_queue = make_queue(collection, chunk_size=10)
+    try:
+        with pytest.raises(DuplicateError):
+            write_queue.submit(records("a")).wait(timeout=5)
+    finally:
+        write_queue.close()
+    assert collection.calls == 3
+
+def test_closed_queue_rejects_submissions():
+    write_queue = make_queue(FlakyCollection())
+    assert write_queue.submit([]).wait(timeout=1) == 0
+    write_queue.close()
+    with pytest.raises(RuntimeError):
+        write_queue.submit(records("a"))
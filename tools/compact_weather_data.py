@@ -0,0 +1,24 @@
+# ********** IMPORT LIBRARIES **********
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from helper.data_client_helper import compact_duplicates
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    One-time compaction of the weather collection: stored records are re-keyed by content
+    and duplicates are deleted.
+    """
+    parser = argparse.ArgumentParser(description="Remove duplicate weather records from the collection.")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would change")
+    args = parser.parse_args(argv)
+
+    stats = compact_duplicates(dry_run=args.dry_run)
+    print(f"{'Would compact' if args.dry_run else 'Compacted'}: {stats['scanned']} records scanned, "
+          f"{stats['distinct']} distinct, {stats['rekeyed']} re-keyed, {stats['deleted']} deleted")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
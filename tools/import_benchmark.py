@@ -0,0 +1,80 @@
+# ********** IMPORT LIBRARIES **********
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Heavy packages that must only load on the intent path that needs them
+DEFERRED_MODULES = ("pandas", "astrapy", "streamlit", "langchain_openai", "langchain_community", "openai")
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+# *************** Function to run `python -X importtime` and parse its report
+def _import_report(code: str) -> list[tuple[str, int, bool]]:
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=BASE_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Running '{code}' failed:\n{result.stderr[-2000:]}")
+
+    report = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            # *************** Top-level imports have a single space of indentation
+            report.append((match.group(4), int(match.group(2)), len(match.group(3)) == 1))
+    return report
+
+# *************** Function to measure the import of one module in a fresh interpreter
+def measure_import(module: str, startup: set[str]) -> dict:
+    """
+    Import a module under `python -X importtime` and parse the report.
+
+    Args:
+        module (str): Dotted module name, e.g. "engine.chat".
+        startup (set[str]): Modules the bare interpreter imports, excluded from the total.
+
+    Returns:
+        dict: {"total_ms": cumulative import time, "modules": {name: cumulative_us}}
+    """
+    report = [entry for entry in _import_report(f"import {module}") if entry[0] not in startup]
+    total_us = sum(cumulative_us for _, cumulative_us, top_level in report if top_level)
+    return {"total_ms": total_us / 1000, "modules": {name: cumulative_us for name, cumulative_us, _ in report}}
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Check the import time of the engine against a budget and that heavy packages stay deferred.
+    Exits with status 1 on a regression.
+    """
+    parser = argparse.ArgumentParser(description="Import-time benchmark with a regression budget.")
+    parser.add_argument("modules", nargs="*", default=["engine.chat"], help="Modules to import")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "1500")),
+                        help="Maximum cumulative import time per module (median of the runs)")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imported modules to list")
+    args = parser.parse_args(argv)
+
+    startup = {name for name, _, _ in _import_report("pass")}
+    failed = False
+    for module in args.modules:
+        runs = [measure_import(module, startup) for _ in range(max(1, args.runs))]
+        runs.sort(key=lambda run: run["total_ms"])
+        median = runs[len(runs) // 2]
+
+        print(f"{module}: {median['total_ms']:.1f} ms (median of {len(runs)}, budget {args.budget_ms:.0f} ms)")
+        for name, cumulative_us in sorted(median["modules"].items(), key=lambda item: -item[1])[:args.top]:
+            print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+        eager = [name for name in DEFERRED_MODULES if name in median["modules"]]
+        if eager:
+            print(f"  FAIL: imported eagerly: {', '.join(eager)}")
+            failed = True
+        if median["total_ms"] > args.budget_ms:
+            print(f"  FAIL: over budget by {median['total_ms'] - args.budget_ms:.1f} ms")
+            failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())